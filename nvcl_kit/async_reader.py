@@ -0,0 +1,393 @@
+"""
+This module contains an asyncio version of the 'NVCLReader' class
+"""
+
+import sys
+import asyncio
+import logging
+from collections import OrderedDict
+
+from nvcl_kit.reader import NVCLReader
+from nvcl_kit.dataset_collection import DatasetCollection, DatasetCatalogue, iter_dataset_collection
+from nvcl_kit.log_collection import MosaicLogIndex
+from nvcl_kit.svc_interface import _AsyncServiceInterface
+from nvcl_kit.wfs_helpers import get_borehole_list
+from nvcl_kit.borehole_data import np
+
+LOG_LVL = logging.INFO
+''' Initialise debug level, set to 'logging.INFO' or 'logging.DEBUG'
+'''
+
+# Set up debugging
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(LOG_LVL)
+
+if not LOGGER.hasHandlers():
+
+    # Create logging console handler
+    HANDLER = logging.StreamHandler(sys.stdout)
+
+    # Create logging formatter
+    FORMATTER = logging.Formatter('%(name)s -- %(levelname)s - %(funcName)s: %(message)s')
+
+    # Add formatter to ch
+    HANDLER.setFormatter(FORMATTER)
+
+    # Add handler to LOGGER and set level
+    LOGGER.addHandler(HANDLER)
+
+
+class AsyncNVCLReader(NVCLReader):
+    ''' An asyncio version of 'NVCLReader'. All methods which call the NVCL services are coroutines
+        that take the same parameters and return the same results as their 'NVCLReader' counterparts e.g.
+
+        ::
+
+            async with AsyncNVCLReader(param_builder('sa'), skip_bhlist=True) as reader:
+                await reader.load_borehole_list()
+                logs = await asyncio.gather(*[reader.get_logs_data(n_id) for n_id in reader.get_nvcl_id_list()])
+
+        The batch methods e.g. 'get_logs_data_many()' are also awaitable and run their requests concurrently
+        on the event loop. 'prune_cache()' and 'vacuum_cache()' are awaitable and run in a worker thread.
+
+        Requests are sent using 'aiohttp' if it is installed, otherwise they are sent from a thread pool.
+        Use the 'pool_maxsize' parameter to set the maximum number of connections to the NVCL service.
+
+        NB: The constructor fetches the borehole list synchronously, use 'skip_bhlist=True' and
+        'load_borehole_list()' to fetch it without blocking the event loop
+    '''
+
+    _svc_class = _AsyncServiceInterface
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        ''' Closes any open connections to the NVCL service
+        '''
+        if hasattr(self, 'svc'):
+            await self.svc.close()
+
+    async def load_borehole_list(self):
+        ''' Fetches the list of boreholes from the WFS service without blocking the event loop.
+            Use this when the reader was created with 'skip_bhlist=True'
+        '''
+        self.borehole_list, self.wfs_error, self.wfs = await asyncio.to_thread(get_borehole_list, self.param_obj)
+
+    async def _call_many(self, fn, id_list, max_workers, *args, **kwargs):
+        ''' Async version of 'NVCLReader._call_many()', at most 'max_workers' calls are awaited at once
+        '''
+        id_list = list(OrderedDict.fromkeys(id_list))
+        if max_workers is None:
+            max_workers = self.param_obj.MAX_WORKERS
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def call(id):
+            async with semaphore:
+                return await fn(id, *args, **kwargs)
+
+        results = await asyncio.gather(*[call(id) for id in id_list])
+        return OrderedDict(zip(id_list, results))
+
+    async def get_borehole_data_many(self, log_id_list, height_resol, class_name, top_n=1, max_workers=None):
+        ''' Async version of 'NVCLReader.get_borehole_data_many()', 'max_workers' is the number of calls awaited at once
+        '''
+        return await self._call_many(self.get_borehole_data, log_id_list, max_workers, height_resol, class_name, top_n=top_n)
+
+    async def get_datasetid_list_many(self, nvcl_id_list, max_workers=None):
+        ''' Async version of 'NVCLReader.get_datasetid_list_many()', 'max_workers' is the number of calls awaited at once
+        '''
+        return await self._call_many(self.get_datasetid_list, nvcl_id_list, max_workers)
+
+    async def get_tray_depths_many(self, log_id_list, max_workers=None):
+        ''' Async version of 'NVCLReader.get_tray_depths_many()', 'max_workers' is the number of calls awaited at once
+        '''
+        return await self._call_many(self.get_tray_depths, log_id_list, max_workers)
+
+    async def get_logs_data_many(self, nvcl_id_list, max_workers=None):
+        ''' Async version of 'NVCLReader.get_logs_data_many()', 'max_workers' is the number of calls awaited at once
+        '''
+        return await self._call_many(self.get_logs_data, nvcl_id_list, max_workers)
+
+    async def get_spectrallog_data_many(self, nvcl_id_list, max_workers=None):
+        ''' Async version of 'NVCLReader.get_spectrallog_data_many()', 'max_workers' is the number of calls awaited at once
+        '''
+        return await self._call_many(self.get_spectrallog_data, nvcl_id_list, max_workers)
+
+    async def prune_cache(self):
+        ''' Async version of 'NVCLReader.prune_cache()', the persistent cache is pruned in a worker thread
+        '''
+        return await asyncio.to_thread(super().prune_cache)
+
+    async def vacuum_cache(self):
+        ''' Async version of 'NVCLReader.vacuum_cache()', the persistent cache is vacuumed in a worker thread
+        '''
+        await asyncio.to_thread(super().vacuum_cache)
+
+    async def get_borehole_data(self, log_id, height_resol, class_name, top_n=1):
+        ''' Async version of 'NVCLReader.get_borehole_data()'
+        '''
+        LOGGER.debug(f"get_borehole_data({log_id}, {height_resol}, {class_name}, {top_n}")
+        if top_n < 1:
+            LOGGER.warning("top_n parameter has invalid value, setting to default")
+            top_n = 1
+        json_data = await self.svc.get_downsampled_data(log_id,
+                                                        interval=height_resol, outputformat='json',
+                                                        startdepth=self.min_depth, enddepth=self.max_depth)
+        return self._parse_borehole_data(json_data, class_name, top_n, self.records, self.bh_data_engine)
+
+    async def get_borehole_data_columns(self, log_id, height_resol, class_name, top_n=1):
+        ''' Async version of 'NVCLReader.get_borehole_data_columns()'
+        '''
+        LOGGER.debug(f"get_borehole_data_columns({log_id}, {height_resol}, {class_name}, {top_n}")
+        if np is None:
+            LOGGER.warning("'numpy' package is not installed, cannot return columns")
+            return None
+        if top_n < 1:
+            LOGGER.warning("top_n parameter has invalid value, setting to default")
+            top_n = 1
+        json_data = await self.svc.get_downsampled_data(log_id,
+                                                        interval=height_resol, outputformat='json',
+                                                        startdepth=self.min_depth, enddepth=self.max_depth)
+        return self._parse_borehole_columns(json_data, class_name, top_n)
+
+    async def _get_collection_response(self, request_fn, *args, **options):
+        ''' Async version of 'NVCLReader._get_collection_response()'
+        '''
+        if self.use_json:
+            response_str = await request_fn(*args, outputformat='json', **options)
+            if self._check_json_response(response_str):
+                return response_str
+        return await request_fn(*args, **options)
+
+    async def load_dataset_catalogue(self):
+        ''' Async version of 'NVCLReader.load_dataset_catalogue()'
+        '''
+        return self._set_dataset_catalogue(DatasetCatalogue(await self._get_collection_response(self.svc.get_dataset_collection,
+                                                                                                'all', headersOnly='yes')))
+
+    async def get_dataset_collection(self, nvcl_id):
+        ''' Async version of 'NVCLReader.get_dataset_collection()'
+        '''
+        return await self._get_dataset_collection(nvcl_id)
+
+    async def _get_dataset_collection(self, nvcl_id):
+        ''' Async version of 'NVCLReader._get_dataset_collection()'
+        '''
+        coll = self.dataset_colls.get(nvcl_id)
+        if coll is not None:
+            return coll
+        return await self.svc.flights.do_async(('DatasetCollection', nvcl_id), self._load_dataset_collection, nvcl_id)
+
+    async def _load_dataset_collection(self, nvcl_id):
+        ''' Async version of 'NVCLReader._load_dataset_collection()'
+        '''
+        return self._memoise_dataset_collection(nvcl_id, DatasetCollection(
+            await self._get_collection_response(self.svc.get_dataset_collection, nvcl_id), self.records))
+
+    async def _iter_dataset_collection(self, nvcl_id, record_type):
+        ''' Async version of 'NVCLReader._iter_dataset_collection()'
+        '''
+        coll = self.dataset_colls.get(nvcl_id)
+        if coll is not None:
+            return iter(getattr(coll, record_type)())
+        return iter_dataset_collection(await self._get_collection_response(self.svc.get_dataset_collection, nvcl_id), record_type,
+                                       self.records)
+
+    async def iter_datasetid_list(self, nvcl_id):
+        ''' Async generator version of 'NVCLReader.iter_datasetid_list()'
+        '''
+        catalogue = self._get_dataset_catalogue(nvcl_id)
+        if catalogue is not None:
+            records = catalogue.dataset_ids(nvcl_id)
+        else:
+            records = await self._iter_dataset_collection(nvcl_id, 'dataset_ids')
+        for record in records:
+            yield record
+
+    async def iter_dataset_list(self, nvcl_id):
+        ''' Async generator version of 'NVCLReader.iter_dataset_list()'
+        '''
+        catalogue = self._get_dataset_catalogue(nvcl_id)
+        if catalogue is not None:
+            records = catalogue.datasets(nvcl_id)
+        else:
+            records = await self._iter_dataset_collection(nvcl_id, 'datasets')
+        for record in records:
+            yield record
+
+    async def iter_logs_data(self, nvcl_id):
+        ''' Async generator version of 'NVCLReader.iter_logs_data()'
+        '''
+        for record in await self._iter_dataset_collection(nvcl_id, 'logs'):
+            yield record
+
+    async def iter_imagelog_data(self, nvcl_id):
+        ''' Async generator version of 'NVCLReader.iter_imagelog_data()'
+        '''
+        for record in await self._iter_dataset_collection(nvcl_id, 'image_logs'):
+            yield record
+
+    async def iter_spectrallog_data(self, nvcl_id):
+        ''' Async generator version of 'NVCLReader.iter_spectrallog_data()'
+        '''
+        for record in await self._iter_dataset_collection(nvcl_id, 'spectral_logs'):
+            yield record
+
+    async def iter_profilometer_data(self, nvcl_id):
+        ''' Async generator version of 'NVCLReader.iter_profilometer_data()'
+        '''
+        for record in await self._iter_dataset_collection(nvcl_id, 'profilometer_logs'):
+            yield record
+
+    async def get_datasetid_list(self, nvcl_id):
+        ''' Async version of 'NVCLReader.get_datasetid_list()'
+        '''
+        catalogue = self._get_dataset_catalogue(nvcl_id)
+        if catalogue is not None:
+            return catalogue.dataset_ids(nvcl_id)
+        return (await self._get_dataset_collection(nvcl_id)).dataset_ids()
+
+    async def get_dataset_list(self, nvcl_id):
+        ''' Async version of 'NVCLReader.get_dataset_list()'
+        '''
+        catalogue = self._get_dataset_catalogue(nvcl_id)
+        if catalogue is not None:
+            return catalogue.datasets(nvcl_id)
+        return (await self._get_dataset_collection(nvcl_id)).datasets()
+
+    async def get_all_imglogs(self, dataset_id):
+        ''' Async version of 'NVCLReader.get_all_imglogs()'
+        '''
+        return await self._filter_mosaic_logs(dataset_id)
+
+    async def get_mosaic_imglogs(self, dataset_id):
+        ''' Async version of 'NVCLReader.get_mosaic_imglogs()'
+        '''
+        return await self._filter_mosaic_logs(dataset_id, 'Mosaic')
+
+    async def get_tray_thumb_imglogs(self, dataset_id):
+        ''' Async version of 'NVCLReader.get_tray_thumb_imglogs()'
+        '''
+        return await self._filter_mosaic_logs(dataset_id, 'Tray Thumbnail Images')
+
+    async def get_tray_imglogs(self, dataset_id):
+        ''' Async version of 'NVCLReader.get_tray_imglogs()'
+        '''
+        return await self._filter_mosaic_logs(dataset_id, 'Tray Images')
+
+    async def get_imagery_imglogs(self, dataset_id):
+        ''' Async version of 'NVCLReader.get_imagery_imglogs()'
+        '''
+        return await self._filter_mosaic_logs(dataset_id, 'Imagery')
+
+    async def _filter_mosaic_logs(self, dataset_id, target_log_name='*'):
+        ''' Async version of 'NVCLReader._filter_mosaic_logs()'
+        '''
+        return (await self._get_mosaic_log_index(dataset_id)).logs(target_log_name)
+
+    async def _get_mosaic_log_index(self, dataset_id):
+        ''' Async version of 'NVCLReader._get_mosaic_log_index()'
+        '''
+        index = self.mosaic_log_indexes.get(dataset_id)
+        if index is not None:
+            return index
+        return await self.svc.flights.do_async(('MosaicLogIndex', dataset_id), self._load_mosaic_log_index, dataset_id)
+
+    async def _load_mosaic_log_index(self, dataset_id):
+        ''' Async version of 'NVCLReader._load_mosaic_log_index()'
+        '''
+        return self._memoise_mosaic_log_index(dataset_id, MosaicLogIndex(
+            await self._get_collection_response(self.svc.get_log_collection, dataset_id, True), self.records))
+
+    async def get_mosaic_image(self, log_id, **options):
+        ''' Async version of 'NVCLReader.get_mosaic_image()'
+        '''
+        return await self.svc.get_mosaic(log_id, **options)
+
+    async def get_tray_thumb_html(self, dataset_id, log_id, **options):
+        ''' Async version of 'NVCLReader.get_tray_thumb_html()'
+        '''
+        return await self.svc.get_mosaic_tray_thumbnail(dataset_id, log_id, **options)
+
+    async def get_tray_thumb_jpg(self, log_id, sample_no='0'):
+        ''' Async version of 'NVCLReader.get_tray_thumb_jpg()'
+        '''
+        return await self.svc.get_display_tray_thumb(log_id, sample_no)
+
+    async def get_tray_depths(self, log_id):
+        ''' Async version of 'NVCLReader.get_tray_depths()'
+        '''
+        return self._parse_tray_depths(await self.svc.get_image_tray_depth(log_id), self.records)
+
+    async def get_scalar_logs(self, dataset_id):
+        ''' Async version of 'NVCLReader.get_scalar_logs()'
+        '''
+        return self._parse_scalar_logs(await self._get_collection_response(self.svc.get_log_collection, dataset_id), self.records)
+
+    async def iter_scalar_logs(self, dataset_id):
+        ''' Async generator version of 'NVCLReader.iter_scalar_logs()'
+        '''
+        for record in self._iter_scalar_logs(await self._get_collection_response(self.svc.get_log_collection, dataset_id),
+                                             self.records):
+            yield record
+
+    async def get_scalar_data(self, log_id_list):
+        ''' Async version of 'NVCLReader.get_scalar_data()'
+        '''
+        return await self.svc.download_scalar(log_id_list)
+
+    async def get_sampled_scalar_data(self, log_id, **options):
+        ''' Async version of 'NVCLReader.get_sampled_scalar_data()'
+        '''
+        return await self.svc.get_downsampled_data(log_id, **options)
+
+    async def plot_scalar_png(self, log_id, **options):
+        ''' Async version of 'NVCLReader.plot_scalar_png()'
+        '''
+        return await self.svc.get_plot_scalar(log_id, **options)
+
+    async def plot_scalars_html(self, log_id_list, **options):
+        ''' Async version of 'NVCLReader.plot_scalars_html()'
+        '''
+        # NB: Service only plots the first 6 log ids
+        return await self.svc.get_plot_multi_scalar(log_id_list[:6], **options)
+
+    async def get_algorithms(self):
+        ''' Async version of 'NVCLReader.get_algorithms()'
+        '''
+        return self._parse_algorithms(await self.svc.get_algorithms())
+
+    async def get_logs_data(self, nvcl_id):
+        ''' Async version of 'NVCLReader.get_logs_data()'
+        '''
+        return (await self._get_dataset_collection(nvcl_id)).logs()
+
+    async def get_imagelog_data(self, nvcl_id):
+        ''' Async version of 'NVCLReader.get_imagelog_data()'
+        '''
+        return (await self._get_dataset_collection(nvcl_id)).image_logs()
+
+    async def get_spectrallog_data(self, nvcl_id):
+        ''' Async version of 'NVCLReader.get_spectrallog_data()'
+        '''
+        return (await self._get_dataset_collection(nvcl_id)).spectral_logs()
+
+    async def get_spectrallog_datasets(self, log_id, **options):
+        ''' Async version of 'NVCLReader.get_spectrallog_datasets()'
+        '''
+        return await self.svc.get_spectral_data(log_id, **self._sample_no_opts(options))
+
+    async def get_profilometer_data(self, nvcl_id):
+        ''' Async version of 'NVCLReader.get_profilometer_data()'
+        '''
+        return (await self._get_dataset_collection(nvcl_id)).profilometer_logs()
+
+    async def get_profilometer_datasets(self, proflog_id, **options):
+        ''' Async version of 'NVCLReader.get_profilometer_datasets()'
+        '''
+        prof_json = await self.svc.get_prof_data(proflog_id, **self._sample_no_opts(options, outputformat='json'))
+        return self._parse_profilometer_datasets(prof_json)
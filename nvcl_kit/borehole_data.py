@@ -0,0 +1,232 @@
+"""
+This module contains a vectorised version of the aggregation done by 'NVCLReader.get_borehole_data()', which picks the
+mineral classes with the largest counts at each depth of a 'getDownsampledData' response, and the columnar version
+used by 'NVCLReader.get_borehole_data_columns()'. It uses 'numpy', which is optional and is installed by the 'fast'
+extra, i.e. 'pip install nvcl_kit[fast]'
+"""
+
+from collections import OrderedDict
+from itertools import repeat
+from operator import itemgetter
+from types import SimpleNamespace
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from nvcl_kit.records import NAMESPACE_TYPES, make_record
+
+BOREHOLE_DATA_ENGINES = ['auto', 'python', 'numpy']
+''' Implementations of 'NVCLReader.get_borehole_data()': 'numpy' vectorises the selection and builds the output
+    column by column, 'python' does neither, 'auto' is 'numpy' if it is installed else 'python'. They return the same
+    results. Both still make one object per data point, which takes most of the time, so 'numpy' is only a little faster.
+    'NVCLReader.get_borehole_data_columns()' makes no objects and is the fast path
+'''
+
+# Class texts of invalid and non-mineral data points
+_INVALID_CLASSES = ('INVALID', 'NOTAROK')
+
+
+def get_engine(engine):
+    ''' Returns the implementation of 'NVCLReader.get_borehole_data()' to use
+
+    :param engine: one of 'BOREHOLE_DATA_ENGINES'
+    :returns: 'numpy' or 'python', which is used if 'numpy' is not installed
+    '''
+    if engine in ('auto', 'numpy') and np is not None:
+        return 'numpy'
+    return 'python'
+
+
+def _number_array(values):
+    ''' Makes an array of numbers
+
+    :param values: list of values
+    :returns: one dimensional 'numpy' array, or None if they are not all integers or floats or if any of them are NaN
+    '''
+    arr = np.array(values)
+    if arr.ndim != 1 or arr.dtype.kind not in 'iuf' or (arr.dtype.kind == 'f' and np.isnan(arr).any()):
+        return None
+    return arr
+
+
+def select_top_n(meas_list, top_n):
+    ''' Picks the mineral classes with the largest counts at each depth, like 'NVCLReader.get_borehole_data()'.
+        Data points are sorted by depth then by count with one stable 'numpy.lexsort()', instead of
+        being grouped and sorted one depth at a time
+
+    :param meas_list: list of data point dicts, decoded from a JSON 'getDownsampledData' response
+    :param top_n: number of mineral classes to pick at each depth
+    :returns: SimpleNamespace( 'depths'= list of depths which have valid data points, taken from 'roundedDepth',
+                               'index'= array of the 'meas_list' indices of the picked data points, by depth then largest count,
+                               'group'= array of the position in 'depths' of each picked data point,
+                               'rank'= array of the rank of each picked data point at its depth, 0 is the largest count,
+                               'depth'= array of the depth of each picked data point,
+                               'count'= array of the class count of each picked data point,
+                               'code'= array of the class text code of each picked data point,
+                               'texts'= list of the class texts of all the data points, indexed by code )
+              or None if 'meas_list' has values which cannot be compared as numbers
+    '''
+    try:
+        depth_list = [meas['roundedDepth'] for meas in meas_list]
+        depth = _number_array(depth_list)
+        # Class texts are coded, so that each distinct text is checked once
+        texts = [meas.get('classText', 'INVALID') for meas in meas_list]
+        vocab = {text: code for code, text in enumerate(dict.fromkeys(texts))}
+        codes = np.fromiter(map(vocab.__getitem__, texts), dtype=np.intp, count=len(texts))
+        invalid_codes = [code for text, code in vocab.items() if text.upper() in _INVALID_CLASSES]
+        valid_index = np.flatnonzero(~np.isin(codes, invalid_codes))
+        count = _number_array([meas_list[idx]['classCount'] for idx in valid_index.tolist()])
+    except (KeyError, AttributeError, TypeError):
+        return None
+    if depth is None or count is None:
+        return None
+    if len(valid_index) == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return SimpleNamespace(depths=[], index=empty, group=empty, rank=empty, depth=np.empty(0), count=count,
+                               code=empty, texts=list(vocab))
+
+    # Sort valid data points by depth then largest count, the sort is stable so equal counts keep their order
+    order = np.lexsort((-count, depth[valid_index]))
+    index = valid_index[order]
+    sorted_depth = depth[index]
+
+    # Rank within each depth
+    run_starts = np.flatnonzero(np.concatenate(([True], sorted_depth[1:] != sorted_depth[:-1])))
+    run_lengths = np.diff(np.append(run_starts, len(sorted_depth)))
+    group = np.repeat(np.arange(len(run_starts)), run_lengths)
+    rank = np.arange(len(sorted_depth)) - np.repeat(run_starts, run_lengths)
+    keep = rank < top_n
+
+    # A depth is that of the first data point at that depth, as 'itertools.groupby()' gives after a stable sort,
+    # so 5 is returned instead of 5.0 if it comes first, even if it is invalid
+    first_index = dict(zip(reversed(depth_list), range(len(depth_list) - 1, -1, -1)))
+    depths = [meas_list[first_index[depth_val]]['roundedDepth'] for depth_val in sorted_depth[run_starts].tolist()]
+    return SimpleNamespace(depths=depths, index=index[keep], group=group[keep], rank=rank[keep], depth=sorted_depth[keep],
+                           count=count[order][keep], code=codes[index[keep]], texts=list(vocab))
+
+
+def bgr2rgba_array(bgr):
+    ''' Vectorised version of 'reader.bgr2rgba()'
+
+    :param bgr: array of BGR colour integers
+    :returns: array of RGBA floats, one row per colour
+    '''
+    rgba = np.ones((len(bgr), 4))
+    rgba[:, 0] = (bgr & 255) / 255.0
+    rgba[:, 1] = ((bgr & 65280) >> 8) / 255.0
+    rgba[:, 2] = (bgr >> 16) / 255.0
+    return rgba
+
+
+def numpy_borehole_data(meas_list, class_name, top_n, records=NAMESPACE_TYPES):
+    ''' Vectorised version of the aggregation done by 'NVCLReader.get_borehole_data()'
+
+    :param meas_list: list of data point dicts, decoded from a JSON 'getDownsampledData' response
+    :param class_name: name of scalar class, returned in output for informational purposes
+    :param top_n: number of mineral classes to return at each depth
+    :param records: (optional) record types, 'records.NAMESPACE_TYPES' (default) or 'records.COMPACT_TYPES'
+    :returns: dict: key - depth, float; value - see 'NVCLReader.get_borehole_data()', or None if 'meas_list' has values
+              which cannot be compared as numbers, then the 'python' engine should be used
+    '''
+    sel = select_top_n(meas_list, top_n)
+    if sel is None:
+        return None
+    picked = [meas_list[idx] for idx in sel.index.tolist()]
+    if not picked:
+        return OrderedDict()
+    try:
+        bgr = np.array([meas['colour'] for meas in picked])
+    except KeyError:
+        return None
+    if bgr.ndim != 1 or bgr.dtype.kind not in 'iu':
+        return None
+    red, green, blue = bgr2rgba_array(bgr)[:, :3].T.tolist()
+    colours = list(zip(red, green, blue, repeat(1.0)))
+    point_list = _make_points(picked, class_name, colours, records)
+    depths = sel.depths
+    # If there's only one element at each depth, then substitute list with element
+    if top_n == 1:
+        return OrderedDict(zip(depths, point_list))
+    # Data points are sorted by depth, each depth starts with rank 0
+    starts = np.flatnonzero(sel.rank == 0).tolist()
+    ends = starts[1:] + [len(point_list)]
+    return OrderedDict((depths[group_pos], point_list[start:end])
+                       for group_pos, start, end in zip(sel.group[starts].tolist(), starts, ends))
+
+
+def _make_points(picked, class_name, colours, records):
+    ''' Makes the data point objects of the picked data points. If they all have the same keys, in the same order,
+        as they usually do, then the attribute dicts are made column by column, so that the only per data point work
+        in Python is making the object
+
+    :param picked: list of data point dicts
+    :param class_name: name of scalar class
+    :param colours: list of RGBA tuples, one per data point
+    :param records: record types, see 'numpy_borehole_data()'
+    :returns: list of data point objects, with the same attributes in the same order as the 'python' engine gives
+    '''
+    key_orders = set(map(tuple, picked))
+    if len(key_orders) == 1:
+        keys = key_orders.pop()
+        if 'roundedDepth' in keys and 'colour' in keys:
+            # The 'colour' value replaces the original, in the same position
+            out_keys = ('className',) + tuple(key for key in keys if key != 'roundedDepth')
+            columns = [repeat(class_name)]
+            for key in out_keys[1:]:
+                columns.append(colours if key == 'colour' else map(itemgetter(key), picked))
+            attr_dicts = map(dict, map(zip, repeat(out_keys), zip(*columns)))
+            try:
+                return [records.mineral_point(**attrs) for attrs in attr_dicts]
+            except TypeError:
+                # The record type does not have these attributes, see 'make_record()'
+                pass
+    point_list = []
+    for elem, col in zip(picked, colours):
+        kv_dict = {'className': class_name, **elem, 'colour': col}
+        del kv_dict['roundedDepth']
+        point_list.append(make_record(records.mineral_point, kv_dict))
+    return point_list
+
+
+def empty_columns(class_name):
+    ''' Returns the columns of a borehole without any data, see 'columnar_borehole_data()'
+
+    :param class_name: name of scalar class
+    :returns: SimpleNamespace object of empty arrays
+    '''
+    return SimpleNamespace(class_name=class_name, depth=np.empty(0), rank=np.empty(0, dtype=np.intp),
+                           class_code=np.empty(0, dtype=np.intp), class_texts=[], class_count=np.empty(0),
+                           colour=np.empty((0, 4)))
+
+
+def columnar_borehole_data(meas_list, class_name, top_n):
+    ''' Columnar version of the aggregation done by 'NVCLReader.get_borehole_data()'. The same data points are returned,
+        in the same order, but as arrays with one row per data point instead of an object per data point
+
+    :param meas_list: list of data point dicts, decoded from a JSON 'getDownsampledData' response
+    :param class_name: name of scalar class, returned in output for informational purposes
+    :param top_n: number of mineral classes to return at each depth
+    :returns: see 'NVCLReader.get_borehole_data_columns()', or None if 'meas_list' has values which cannot be put in arrays
+    '''
+    sel = select_top_n(meas_list, top_n)
+    if sel is None:
+        return None
+    if len(sel.index) == 0:
+        return empty_columns(class_name)
+    try:
+        bgr = np.array([meas_list[idx]['colour'] for idx in sel.index.tolist()])
+    except KeyError:
+        return None
+    if bgr.ndim != 1 or bgr.dtype.kind not in 'iu':
+        return None
+    # Only the class texts which are returned are in the vocabulary
+    used_codes, class_code = np.unique(sel.code, return_inverse=True)
+    return SimpleNamespace(class_name=class_name,
+                           depth=sel.depth.astype(float),
+                           rank=sel.rank,
+                           class_code=class_code.reshape(-1),
+                           class_texts=[sel.texts[code] for code in used_codes.tolist()],
+                           class_count=sel.count,
+                           colour=bgr2rgba_array(bgr))
@@ -0,0 +1,994 @@
+"""
+This module contains the cache used to store NVCL service responses
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+import sqlite3
+import threading
+import logging
+import math
+import urllib.parse
+from collections import OrderedDict
+from types import SimpleNamespace
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+LOG_LVL = logging.INFO
+''' Initialise debug level, set to 'logging.INFO' or 'logging.DEBUG'
+'''
+
+# Set up debugging
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(LOG_LVL)
+
+if not LOGGER.hasHandlers():
+
+    # Create logging console handler
+    HANDLER = logging.StreamHandler(sys.stdout)
+
+    # Create logging formatter
+    FORMATTER = logging.Formatter('%(name)s -- %(levelname)s - %(funcName)s: %(message)s')
+
+    # Add formatter to ch
+    HANDLER.setFormatter(FORMATTER)
+
+    # Add handler to LOGGER and set level
+    LOGGER.addHandler(HANDLER)
+
+MEM_CACHE_SIZE = 0
+''' Default size of the in-memory response cache (bytes), it is disabled by default
+'''
+
+UNCACHED_ENDPOINTS = {'checktsgstatus', 'downloadtsg', 'checkwfsstatus', 'downloadwfs'}
+''' NVCL service endpoints whose responses are never cached, they start downloads or report their status
+'''
+
+SQLITE_FILENAME = 'nvcl_kit_cache.sqlite3'
+''' Name of the SQLite cache database file, used when 'cache_path' is a folder
+'''
+
+MEMO_SIZE = 256
+''' Default number of parsed responses kept by each 'TTLMemo'
+'''
+
+CACHE_POLICIES = ['lru', 'lfu']
+''' Eviction policies of the persistent caches: least recently used, least frequently used
+'''
+
+KEY_STATS_SIZE = 10000
+''' Number of canonical cache keys remembered when looking for key collisions
+'''
+
+NUMERIC_PARAMS = {'startdepth', 'enddepth', 'samplinginterval', 'interval', 'width', 'height', 'graphtype', 'legend',
+                  'startsampleno', 'endsampleno', 'sampleno'}
+''' NVCL service parameters whose values are numbers, e.g. 'startdepth=0' and 'startdepth=0.0' are the same request
+'''
+
+_PLOT_DEFAULTS = {'startdepth': '0', 'enddepth': '99999', 'samplinginterval': '1', 'width': '300', 'height': '600',
+                  'graphtype': '1'}
+
+PARAM_DEFAULTS = {
+    'getdatasetcollection': {'outputformat': 'xml'},
+    'mosaic': {'width': '3', 'startsampleno': '0', 'endsampleno': '99999'},
+    'mosaictraythumbnail': {'width': '3', 'startsampleno': '0', 'endsampleno': '99999'},
+    'plotscalar': {**_PLOT_DEFAULTS, 'legend': '1'},
+    'plotmultiscalars': {**_PLOT_DEFAULTS, 'legend': 'yes'},
+    'downloadtsg': {'linescan': 'yes', 'forcerecreate': 'no'},
+    'downloadwfs': {'typename': 'sa:SamplingFeatureCollection', 'forcerecreate': 'no'},
+    'getprofdata': {'startsampleno': '0', 'endsampleno': '999999', 'outputformat': 'binary'},
+}
+''' Default values of NVCL service parameters, keyed on endpoint name. These are left out of cache keys
+'''
+
+CACHE_COMPRESSIONS = [None, 'auto', 'gzip', 'zstd']
+''' Compression of persistent cache entries: none, 'zstd' if the 'zstandard' package is installed else 'gzip', 'gzip', 'zstd'
+'''
+
+MIN_COMPRESS_SIZE = 256
+''' Responses smaller than this are not compressed (bytes)
+'''
+
+# Responses which start with these are already compressed: JPEG, PNG, GIF, gzip, zip, zstd
+_COMPRESSED_MAGICS = (b'\xff\xd8\xff', b'\x89PNG', b'GIF8', b'\x1f\x8b', b'PK\x03\x04', b'\x28\xb5\x2f\xfd')
+
+LOW_WATER = 0.9
+''' When a persistent cache grows larger than its maximum size, entries are evicted until it is
+    this fraction of its maximum size
+'''
+
+# Cache file header: magic, time stored, time last read, number of reads, length of JSON metadata
+_MAGIC = b'NVCLKIT\x01'
+_HEADER = struct.Struct('<8sddII')
+_ACCESS = struct.Struct('<dI')
+_ACCESS_OFFSET = 16
+_STORED = struct.Struct('<d')
+_STORED_OFFSET = 8
+
+# Files written by versions of 'nvcl_kit' which did not shard the cache were named '<cache_path><quoted request URL>.txt'
+_OLD_LAYOUT_PREFIXES = ('http%3A%2F%2F', 'https%3A%2F%2F')
+_OLD_LAYOUT_SUFFIX = '.txt'
+
+# Cache folders which have already been reported as holding files in the old layout
+_OLD_LAYOUT_WARNED = set()
+_OLD_LAYOUT_LOCK = threading.Lock()
+
+
+def make_cache(cache_path, cache_backend='file', ttl=None, max_size=None, policy='lru', compression='auto'):
+    ''' Makes a response cache
+
+    :param cache_path: cache folder path, or SQLite database file path; if None then caching is disabled
+    :param cache_backend: 'file' for a 'FileCache', 'sqlite' for an 'SQLiteCache', or any object
+                          with 'get(key)' and 'put(key, value)' methods
+    :param ttl: time to live of cache entries, see 'get_ttl()'
+    :param max_size: maximum total size of the cache entries (bytes), if None then the size is not limited
+    :param policy: eviction policy used when 'max_size' is exceeded, 'lru' or 'lfu'
+    :param compression: compression of cache entries, one of 'CACHE_COMPRESSIONS'
+    :returns: cache object or None
+    '''
+    if not isinstance(cache_backend, str):
+        return cache_backend
+    if cache_path is None:
+        return None
+    if cache_backend == 'file':
+        return FileCache(cache_path, ttl, max_size, policy, compression)
+    if cache_backend == 'sqlite':
+        return SQLiteCache(cache_path, ttl, max_size, policy, compression)
+    LOGGER.warning(f"Unknown cache backend '{cache_backend}', caching is disabled")
+    return None
+
+
+def _endpoint_name(name):
+    ''' Extracts the NVCL service endpoint name from a cache key or endpoint name
+        e.g. 'https://blah/NVCLDataServices/getDatasetCollection.html?holeidentifier=X' -> 'getdatasetcollection'
+
+    :param name: cache key or endpoint name, string
+    :returns: lower case endpoint name
+    '''
+    name = name.split('?', 1)[0].rsplit('/', 1)[-1].lower()
+    if name.endswith('.html'):
+        name = name[:-5]
+    return name
+
+
+def is_cacheable(url):
+    ''' Returns True if responses from an NVCL service endpoint may be cached, see 'UNCACHED_ENDPOINTS'
+
+    :param url: URL of request or cache key, string
+    '''
+    return _endpoint_name(url) not in UNCACHED_ENDPOINTS
+
+
+def get_ttl(ttl, key):
+    ''' Looks up the time to live of a cache entry
+
+    :param ttl: None, entries never expire; or a number of seconds, used for all entries; or a dict
+                which maps NVCL service endpoint names to numbers of seconds or None,
+                e.g. {'getDatasetCollection': 86400, 'getspectraldata': None, '*': 604800}
+                where '*' is used for the endpoints which are not listed. Endpoint names are not case sensitive.
+    :param key: cache key, string, or None if unknown
+    :returns: time to live in seconds, or None if the entry never expires
+    '''
+    if not isinstance(ttl, dict):
+        return ttl
+    if key is not None:
+        endpoint = _endpoint_name(key)
+        for name, secs in ttl.items():
+            if name != '*' and _endpoint_name(name) == endpoint:
+                return secs
+    return ttl.get('*')
+
+
+def _normalise_number(value):
+    ''' Normalises a numeric parameter value e.g. '0.0' -> '0', '1.50' -> '1.5'
+
+    :param value: parameter value, string
+    :returns: normalised value, or the value if it is not a number
+    '''
+    try:
+        num = float(value)
+    except ValueError:
+        return value
+    if not math.isfinite(num):
+        return value
+    if num.is_integer():
+        return str(int(num))
+    return repr(num)
+
+
+def canonical_key(url, enc_params):
+    ''' Makes a canonical cache key for a request, so that the same request made with parameters in a different order,
+        numbers written differently or with default values gives the same key.
+        Parameters are sorted by name, the order of repeated parameters e.g. 'logid' is kept
+
+    :param url: URL of request, string
+    :param enc_params: URL encoded parameters as a byte string, or None
+    :returns: cache key, string
+    '''
+    if not enc_params:
+        return f'{url}?'
+    defaults = PARAM_DEFAULTS.get(_endpoint_name(url), {})
+    params = []
+    for name, value in urllib.parse.parse_qsl(enc_params.decode('ascii'), keep_blank_values=True):
+        if name in NUMERIC_PARAMS:
+            value = _normalise_number(value)
+        if defaults.get(name) == value:
+            continue
+        params.append((name, value))
+    params.sort(key=lambda param: param[0])
+    return f'{url}?{urllib.parse.urlencode(params)}'
+
+
+class KeyStats:
+    ''' Thread safe counters of cache lookups, hits and canonical cache key collisions.
+        A collision is counted when differently written requests are given the same canonical key
+    '''
+
+    def __init__(self, max_keys=KEY_STATS_SIZE):
+        '''
+        :param max_keys: number of canonical keys remembered when looking for collisions
+        '''
+        self.max_keys = max_keys
+        self.lookups = 0
+        self.hits = 0
+        self.collisions = 0
+        # Canonical key -> set of request keys as sent
+        self._variants = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key, raw_key, hit):
+        ''' Counts a cache lookup
+
+        :param key: canonical cache key, string
+        :param raw_key: request key before canonicalisation, string
+        :param hit: True if the response was read from a cache
+        '''
+        with self._lock:
+            self.lookups += 1
+            if hit:
+                self.hits += 1
+            variants = self._variants.get(key)
+            if variants is None:
+                self._variants[key] = {raw_key}
+                if len(self._variants) > self.max_keys:
+                    self._variants.popitem(last=False)
+                return
+            self._variants.move_to_end(key)
+            if raw_key not in variants:
+                self.collisions += 1
+                variants.add(raw_key)
+
+    def stats(self):
+        ''' Returns the counters
+
+        :returns: SimpleNamespace( 'lookups'= number of lookups, 'hits'= number of hits, 'hit_ratio'= hits / lookups,
+                                   'collisions'= number of requests which shared a canonical key with a differently written request )
+        '''
+        with self._lock:
+            return SimpleNamespace(lookups=self.lookups, hits=self.hits,
+                                   hit_ratio=self.hits / self.lookups if self.lookups else 0.0,
+                                   collisions=self.collisions)
+
+
+def _compress(value, codec):
+    ''' Compresses a response, unless it is small or already compressed e.g. a JPEG or PNG image
+
+    :param value: response as a byte string
+    :param codec: 'gzip', 'zstd' or None
+    :returns: (data, codec) tuple, codec is None if the data is not compressed
+    '''
+    if codec is None or len(value) < MIN_COMPRESS_SIZE or value.startswith(_COMPRESSED_MAGICS):
+        return value, None
+    if codec == 'zstd':
+        data = zstandard.ZstdCompressor(level=3).compress(value)
+    else:
+        data = gzip.compress(value, compresslevel=6, mtime=0)
+    if len(data) >= len(value):
+        return value, None
+    return data, codec
+
+
+def _decompress(data, codec):
+    ''' Decompresses a cache entry
+
+    :param data: cache entry as a byte string
+    :param codec: 'gzip', 'zstd' or None if not compressed
+    :returns: response as a byte string
+    :raises ValueError: if the entry cannot be decompressed
+    '''
+    if codec is None:
+        return data
+    try:
+        if codec == 'gzip':
+            return gzip.decompress(data)
+        if codec == 'zstd' and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompress(data)
+    except Exception as exc:
+        raise ValueError(f"cannot decompress '{codec}' entry: {exc}") from exc
+    raise ValueError(f"cannot decompress '{codec}' entry")
+
+
+def _is_expired(ttl, key, stored_at, now, negative_ttl=None):
+    ''' Returns True if a cache entry has expired
+
+    :param ttl: time to live of cache entries, see 'get_ttl()'
+    :param key: cache key, string, or None if unknown
+    :param stored_at: time when entry was stored, seconds since epoch
+    :param now: current time, seconds since epoch
+    :param negative_ttl: time to live of a negative entry, i.e. a failed or empty response (seconds),
+                         it is used instead of 'ttl'. None if the entry is not a negative entry
+    '''
+    secs = get_ttl(ttl, key) if negative_ttl is None else negative_ttl
+    return secs is not None and now - stored_at > secs
+
+
+class MemoryCache:
+    ''' An in-process least recently used (LRU) cache of responses, bounded by the total size of the responses.
+        It is thread safe and counts its hits and misses.
+    '''
+
+    def __init__(self, max_bytes, ttl=None):
+        '''
+        :param max_bytes: maximum total size of the cached responses (bytes)
+        :param ttl: time to live of cache entries, see 'get_ttl()'
+        '''
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # Values are (response, time stored, negative entry time to live or None) tuples
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        ''' Reads a response from the cache
+
+        :param key: cache key, string
+        :returns: response as a byte string or None if not in cache or expired
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and _is_expired(self.ttl, key, entry[1], time.time(), entry[2]):
+                del self._entries[key]
+                self.size -= len(entry[0])
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_entry(self, key):
+        ''' Reads an entry from the cache, including expired entries, which are counted as misses
+
+        :param key: cache key, string
+        :returns: SimpleNamespace( 'value'= response as a byte string, 'stored_at'= time when stored,
+                                   'expired'= True if expired, 'validators'= empty dict,
+                                   'negative_ttl'= time to live of a negative entry or None ) or None if not in cache
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expired = _is_expired(self.ttl, key, entry[1], time.time(), entry[2])
+            if expired:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return SimpleNamespace(value=entry[0], stored_at=entry[1], expired=expired, validators={},
+                                   negative_ttl=entry[2])
+
+    def put(self, key, value, stored_at=None, negative_ttl=None):
+        ''' Writes a response to the cache, evicting the least recently used responses to make room.
+            Responses larger than the cache are not stored
+
+        :param key: cache key, string
+        :param value: response as a byte string
+        :param stored_at: optional time when the response was first stored, seconds since epoch, default is now
+        :param negative_ttl: optional time to live of a negative entry, i.e. a failed or empty response (seconds),
+                             it expires after this time whatever the cache's time to live
+        '''
+        if len(value) > self.max_bytes:
+            return
+        if stored_at is None:
+            stored_at = time.time()
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self.size -= len(old_entry[0])
+            self._entries[key] = (value, stored_at, negative_ttl)
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted[0])
+
+    def clear(self):
+        ''' Removes all responses from the cache and resets the counters
+        '''
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        ''' Returns cache statistics
+
+        :returns: SimpleNamespace( 'hits'= number of hits, 'misses'= number of misses, 'entries'= number of responses,
+                                   'size'= total size of responses (bytes), 'max_bytes'= maximum size (bytes) )
+        '''
+        with self._lock:
+            return SimpleNamespace(hits=self.hits, misses=self.misses, entries=len(self._entries),
+                                   size=self.size, max_bytes=self.max_bytes)
+
+
+class _PersistentCache:
+    ''' Expiry and eviction shared by the on-disk caches. Subclasses implement 'get_entry()', 'put()', 'touch()',
+        '_list_entries()' and '_remove()'
+    '''
+
+    def __init__(self, ttl=None, max_size=None, policy='lru', compression='auto'):
+        '''
+        :param ttl: time to live of cache entries, see 'get_ttl()'
+        :param max_size: maximum total size of the cache entries (bytes), if None then the size is not limited
+        :param policy: eviction policy used when 'max_size' is exceeded, 'lru' or 'lfu'
+        :param compression: compression of cache entries, one of 'CACHE_COMPRESSIONS'
+        '''
+        if policy not in CACHE_POLICIES:
+            LOGGER.warning(f"Unknown cache policy '{policy}', using 'lru'")
+            policy = 'lru'
+        if compression not in CACHE_COMPRESSIONS:
+            LOGGER.warning(f"Unknown cache compression '{compression}', using 'auto'")
+            compression = 'auto'
+        if compression == 'zstd' and zstandard is None:
+            LOGGER.warning("'zstandard' package is not installed, using 'gzip' cache compression")
+            compression = 'gzip'
+        if compression == 'auto':
+            compression = 'zstd' if zstandard is not None else 'gzip'
+        # Codec used to compress new entries, entries are decompressed using the codec they were written with
+        self.codec = compression
+        self.ttl = ttl
+        self.max_size = max_size
+        self.policy = policy
+        # Estimated total size of entries, only kept when 'max_size' is set
+        self._size = None
+        self._size_lock = threading.Lock()
+
+    def get(self, key):
+        ''' Reads a response from the cache
+
+        :param key: cache key, string
+        :returns: response as a byte string or None if not in cache or expired
+        '''
+        entry = self.get_entry(key)
+        if entry is None or entry.expired:
+            return None
+        return entry.value
+
+    def _make_entry(self, key, value, stored_at, accessed_at, hits, validators=None, negative_ttl=None):
+        ''' Makes the result of 'get_entry()'
+
+        :returns: SimpleNamespace( 'value'= response as a byte string, 'stored_at'= time when stored or last revalidated,
+                                   'accessed_at'= time when last read, 'hits'= number of reads, 'expired'= True if expired,
+                                   'validators'= dict of HTTP validators e.g. {'etag': '"abc"', 'last_modified': '...'},
+                                   'negative_ttl'= time to live of a negative entry or None )
+        '''
+        return SimpleNamespace(value=value, stored_at=stored_at, accessed_at=accessed_at, hits=hits,
+                               expired=_is_expired(self.ttl, key, stored_at, time.time(), negative_ttl),
+                               validators=validators or {}, negative_ttl=negative_ttl)
+
+    def _added(self, key, nbytes):
+        ''' Tracks the total size of the cache after an entry is written, evicting entries if it is too large
+
+        :param key: cache key of the new entry, it is not evicted
+        :param nbytes: size of the new entry (bytes)
+        '''
+        if self.max_size is None:
+            return
+        with self._size_lock:
+            if self._size is None:
+                self._size = sum(entry.size for entry in self._list_entries())
+            else:
+                self._size += nbytes
+            if self._size <= self.max_size:
+                return
+        self._shrink(int(self.max_size * LOW_WATER), remove_expired=False, keep_key=key)
+
+    def prune(self):
+        ''' Removes expired entries, then evicts entries until the cache is no larger than its maximum size
+
+        :returns: number of entries removed
+        '''
+        return self._shrink(self.max_size, remove_expired=True)
+
+    def _shrink(self, target_size, remove_expired, keep_key=None):
+        ''' Removes entries
+
+        :param target_size: maximum total size of the remaining entries (bytes), if None then the size is not limited
+        :param remove_expired: if True then expired entries are removed
+        :param keep_key: optional cache key of an entry which is not evicted, e.g. a new entry which has not been read yet
+        :returns: number of entries removed
+        '''
+        now = time.time()
+        victims = []
+        remaining = []
+        for entry in self._list_entries():
+            if remove_expired and _is_expired(self.ttl, entry.key, entry.stored_at, now, entry.negative_ttl):
+                victims.append(entry)
+            else:
+                remaining.append(entry)
+        total = sum(entry.size for entry in remaining)
+        if target_size is not None and total > target_size:
+            if self.policy == 'lfu':
+                remaining.sort(key=lambda entry: (entry.hits, entry.accessed_at))
+            else:
+                remaining.sort(key=lambda entry: entry.accessed_at)
+            for entry in remaining:
+                if total <= target_size:
+                    break
+                if keep_key is not None and entry.key == keep_key:
+                    continue
+                victims.append(entry)
+                total -= entry.size
+        self._remove(victims)
+        with self._size_lock:
+            self._size = total
+        LOGGER.debug(f'removed {len(victims)} cache entries')
+        return len(victims)
+
+
+class FileCache(_PersistentCache):
+    ''' An on-disk cache of responses, one file per request.
+
+        Files are named after the SHA-256 hash of the request and sharded into two levels of
+        sub-folders using the first four hex digits of the hash, e.g.
+
+        ::
+
+            <cache_path>/3f/a2/3fa2c4...e1
+
+        so that no folder grows too large. Files are written to a temporary file and renamed into
+        place, so several processes may share the same cache folder without reading partially written files.
+
+        Each file starts with a small header holding the time it was stored, the time it was last read,
+        the number of reads, the request key, the compression codec, the HTTP validators and, for
+        negative entries, their time to live.
+    '''
+
+    def __init__(self, cache_path, ttl=None, max_size=None, policy='lru', compression='auto'):
+        '''
+        :param cache_path: cache folder path, it is created if it does not exist
+        :param ttl: time to live of cache entries, see 'get_ttl()'
+        :param max_size: maximum total size of the cache files (bytes), if None then the size is not limited
+        :param policy: eviction policy used when 'max_size' is exceeded, 'lru' or 'lfu'
+        :param compression: compression of cache entries, one of 'CACHE_COMPRESSIONS'
+        '''
+        super().__init__(ttl, max_size, policy, compression)
+        self.cache_path = cache_path
+        self._warn_old_layout()
+
+    def _old_layout_files(self):
+        ''' Lists the files left in the cache folder by versions of 'nvcl_kit' which did not shard the cache.
+            These are not read, they can be removed with 'vacuum()'
+
+        :returns: list of file paths
+        '''
+        try:
+            with os.scandir(self.cache_path) as dir_entries:
+                return [dir_entry.path for dir_entry in dir_entries
+                        if dir_entry.name.startswith(_OLD_LAYOUT_PREFIXES) and dir_entry.name.endswith(_OLD_LAYOUT_SUFFIX)
+                        and dir_entry.is_file()]
+        except OSError:
+            return []
+
+    def _warn_old_layout(self):
+        ''' Logs a warning, once per cache folder, if it holds files in the old layout
+        '''
+        cache_path = os.path.abspath(self.cache_path)
+        with _OLD_LAYOUT_LOCK:
+            if cache_path in _OLD_LAYOUT_WARNED:
+                return
+            _OLD_LAYOUT_WARNED.add(cache_path)
+        old_files = self._old_layout_files()
+        if old_files:
+            LOGGER.warning(f"Cache folder {self.cache_path} has {len(old_files)} files written by an older version of "
+                           "nvcl_kit, they are no longer used. Call 'NVCLReader.vacuum_cache()' to remove them")
+
+    def _path(self, key):
+        ''' Makes the path of a cache file
+
+        :param key: cache key, string
+        :returns: path of cache file
+        '''
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_path, digest[:2], digest[2:4], digest)
+
+    @staticmethod
+    def _read_header(cache_file):
+        ''' Reads the header of a cache file
+
+        :param cache_file: file object, positioned at the start of the file
+        :returns: (stored_at, accessed_at, hits, metadata dict) tuple
+        :raises ValueError: if the file does not start with a header
+        '''
+        header = cache_file.read(_HEADER.size)
+        if len(header) < _HEADER.size or header[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("not a cache file")
+        _, stored_at, accessed_at, hits, meta_len = _HEADER.unpack(header)
+        meta = json.loads(cache_file.read(meta_len).decode('utf-8'))
+        return stored_at, accessed_at, hits, meta
+
+    def get_entry(self, key):
+        ''' Reads an entry from the cache, including expired entries
+
+        :param key: cache key, string
+        :returns: SimpleNamespace, see '_make_entry()', or None if not in cache
+        '''
+        path = self._path(key)
+        # Reads are only recorded when they are needed for eviction
+        track = self.max_size is not None
+        try:
+            with open(path, 'r+b' if track else 'rb') as cache_file:
+                stored_at, accessed_at, hits, meta = self._read_header(cache_file)
+                value = _decompress(cache_file.read(), meta.get('codec'))
+                if track:
+                    accessed_at = time.time()
+                    hits += 1
+                    cache_file.seek(_ACCESS_OFFSET)
+                    cache_file.write(_ACCESS.pack(accessed_at, hits))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            LOGGER.warning(f"Cannot read cache file {path}: {exc}")
+            return None
+        LOGGER.debug(f'read cache:{path}')
+        return self._make_entry(key, value, stored_at, accessed_at, hits, meta.get('validators'), meta.get('negative_ttl'))
+
+    def put(self, key, value, validators=None, negative_ttl=None):
+        ''' Writes a response to the cache
+
+        :param key: cache key, string
+        :param value: response as a byte string
+        :param validators: optional dict of HTTP validators, used to revalidate the entry when it expires
+        :param negative_ttl: optional time to live of a negative entry, i.e. a failed or empty response (seconds),
+                             it expires after this time whatever the cache's time to live
+        '''
+        path = self._path(key)
+        shard_dir = os.path.dirname(path)
+        data, codec = _compress(value, self.codec)
+        meta = {'key': key, 'codec': codec, 'validators': validators or {}}
+        if negative_ttl is not None:
+            meta['negative_ttl'] = negative_ttl
+        meta = json.dumps(meta).encode('utf-8')
+        now = time.time()
+        tmp_path = None
+        try:
+            os.makedirs(shard_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=shard_dir, prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(_HEADER.pack(_MAGIC, now, now, 0, len(meta)))
+                tmp_file.write(meta)
+                tmp_file.write(data)
+            # Atomic, readers see either the old file or the complete new file
+            os.replace(tmp_path, path)
+        except OSError as os_exc:
+            LOGGER.warning(f"Cannot write cache file {path}: {os_exc}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        LOGGER.debug(f'write cache:{path}')
+        self._added(key, _HEADER.size + len(meta) + len(data))
+
+    def touch(self, key):
+        ''' Marks an entry as fresh, e.g. after the service confirms it has not been modified
+
+        :param key: cache key, string
+        '''
+        path = self._path(key)
+        try:
+            with open(path, 'r+b') as cache_file:
+                self._read_header(cache_file)
+                cache_file.seek(_STORED_OFFSET)
+                cache_file.write(_STORED.pack(time.time()))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as exc:
+            LOGGER.warning(f"Cannot write cache file {path}: {exc}")
+
+    def _walk_files(self):
+        ''' Lists the cache files and any leftover temporary files
+
+        :returns: iterator of (path, is temporary file) tuples
+        '''
+        for dir_path, _, file_names in os.walk(self.cache_path):
+            for file_name in file_names:
+                yield os.path.join(dir_path, file_name), file_name.startswith('.tmp-')
+
+    def _list_entries(self):
+        ''' Lists the cache entries
+
+        :returns: iterator of SimpleNamespace( 'id'= file path, 'key'= cache key or None, 'size'= file size,
+                                               'stored_at'= time when stored, 'accessed_at'= time when last read,
+                                               'hits'= number of reads, 'negative_ttl'= time to live of a negative entry or None )
+        '''
+        for path, is_tmp in self._walk_files():
+            if is_tmp:
+                continue
+            try:
+                with open(path, 'rb') as cache_file:
+                    stat = os.fstat(cache_file.fileno())
+                    stored_at, accessed_at, hits, meta = self._read_header(cache_file)
+            except (OSError, ValueError):
+                continue
+            yield SimpleNamespace(id=path, key=meta.get('key'), size=stat.st_size, stored_at=stored_at,
+                                  accessed_at=accessed_at, hits=hits, negative_ttl=meta.get('negative_ttl'))
+
+    def _remove(self, entries):
+        ''' Removes cache entries
+
+        :param entries: list of entries from '_list_entries()'
+        '''
+        for entry in entries:
+            try:
+                os.remove(entry.id)
+            except FileNotFoundError:
+                pass
+            except OSError as os_exc:
+                LOGGER.warning(f"Cannot remove cache file {entry.id}: {os_exc}")
+
+    def vacuum(self, tmp_age=3600.0):
+        ''' Removes leftover temporary files, empty sub-folders and files written by older versions of 'nvcl_kit'
+
+        :param tmp_age: temporary files older than this are removed (seconds), younger ones may still be being written
+        '''
+        now = time.time()
+        for path, is_tmp in list(self._walk_files()):
+            try:
+                if is_tmp and now - os.path.getmtime(path) > tmp_age:
+                    os.remove(path)
+            except OSError:
+                pass
+        for dir_path, _, _ in os.walk(self.cache_path, topdown=False):
+            if dir_path != self.cache_path:
+                try:
+                    os.rmdir(dir_path)
+                except OSError:
+                    # Not empty
+                    pass
+        for path in self._old_layout_files():
+            try:
+                os.remove(path)
+            except OSError as os_exc:
+                LOGGER.warning(f"Cannot remove cache file {path}: {os_exc}")
+
+
+class SQLiteCache(_PersistentCache):
+    ''' A cache of responses stored in a single SQLite database file, using write-ahead logging (WAL)
+        so that it can be shared by several threads and processes.
+
+        Each row holds the request key, the response, the time it was stored, the time it was last read,
+        the number of reads, its size, the compression codec, the HTTP validators and, for negative entries,
+        their time to live.
+    '''
+
+    def __init__(self, db_path, ttl=None, max_size=None, policy='lru', compression='auto'):
+        '''
+        :param db_path: path of database file, it and its folder are created if they do not exist.
+                        If this is a folder, or ends with a path separator, then the database file is created inside it
+        :param ttl: time to live of cache entries, see 'get_ttl()'
+        :param max_size: maximum total size of the responses (bytes), if None then the size is not limited
+        :param policy: eviction policy used when 'max_size' is exceeded, 'lru' or 'lfu'
+        :param compression: compression of cache entries, one of 'CACHE_COMPRESSIONS'
+        '''
+        super().__init__(ttl, max_size, policy, compression)
+        if os.path.isdir(db_path) or db_path.endswith(('/', os.sep)):
+            db_path = os.path.join(db_path, SQLITE_FILENAME)
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        # sqlite3 connections cannot be shared between threads
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS responses (
+                                key TEXT PRIMARY KEY,
+                                value BLOB NOT NULL,
+                                stored_at REAL NOT NULL,
+                                size INTEGER NOT NULL,
+                                accessed_at REAL NOT NULL DEFAULT 0,
+                                hits INTEGER NOT NULL DEFAULT 0,
+                                codec TEXT,
+                                validators TEXT,
+                                negative_ttl REAL)''')
+
+    def _connect(self):
+        ''' Returns this thread's database connection
+
+        :returns: sqlite3.Connection object
+        '''
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        ''' Closes this thread's database connection
+        '''
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get_entry(self, key):
+        ''' Reads an entry from the cache, including expired entries
+
+        :param key: cache key, string
+        :returns: SimpleNamespace, see '_make_entry()', or None if not in cache
+        '''
+        try:
+            conn = self._connect()
+            row = conn.execute('''SELECT value, stored_at, accessed_at, hits, codec, validators, negative_ttl
+                                  FROM responses WHERE key = ?''', (key,)).fetchone()
+            if row is None:
+                return None
+            data, stored_at, accessed_at, hits, codec, validators, negative_ttl = row
+            value = _decompress(data, codec)
+            validators = json.loads(validators) if validators else {}
+            # Reads are only recorded when they are needed for eviction
+            if self.max_size is not None:
+                accessed_at = time.time()
+                hits += 1
+                with conn:
+                    conn.execute('UPDATE responses SET accessed_at = ?, hits = ? WHERE key = ?',
+                                 (accessed_at, hits, key))
+        except (sqlite3.Error, ValueError) as db_exc:
+            LOGGER.warning(f"Cannot read cache database {self.db_path}: {db_exc}")
+            return None
+        LOGGER.debug(f'read cache:{key}')
+        return self._make_entry(key, value, stored_at, accessed_at, hits, validators, negative_ttl)
+
+    def put(self, key, value, validators=None, negative_ttl=None):
+        ''' Writes a response to the cache
+
+        :param key: cache key, string
+        :param value: response as a byte string
+        :param validators: optional dict of HTTP validators, used to revalidate the entry when it expires
+        :param negative_ttl: optional time to live of a negative entry, i.e. a failed or empty response (seconds),
+                             it expires after this time whatever the cache's time to live
+        '''
+        data, codec = _compress(value, self.codec)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute('''INSERT OR REPLACE INTO responses
+                                (key, value, stored_at, size, accessed_at, hits, codec, validators, negative_ttl)
+                                VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)''',
+                             (key, sqlite3.Binary(data), now, len(data), now, codec, json.dumps(validators or {}),
+                              negative_ttl))
+        except sqlite3.Error as db_exc:
+            LOGGER.warning(f"Cannot write cache database {self.db_path}: {db_exc}")
+            return
+        LOGGER.debug(f'write cache:{key}')
+        self._added(key, len(data))
+
+    def touch(self, key):
+        ''' Marks an entry as fresh, e.g. after the service confirms it has not been modified
+
+        :param key: cache key, string
+        '''
+        try:
+            with self._connect() as conn:
+                conn.execute('UPDATE responses SET stored_at = ? WHERE key = ?', (time.time(), key))
+        except sqlite3.Error as db_exc:
+            LOGGER.warning(f"Cannot write cache database {self.db_path}: {db_exc}")
+
+    def _list_entries(self):
+        ''' Lists the cache entries
+
+        :returns: list of SimpleNamespace( 'id'= key, 'key'= key, 'size'= stored size, 'stored_at'= time when stored,
+                                           'accessed_at'= time when last read, 'hits'= number of reads,
+                                           'negative_ttl'= time to live of a negative entry or None )
+        '''
+        try:
+            rows = self._connect().execute('''SELECT key, size, stored_at, accessed_at, hits, negative_ttl
+                                              FROM responses''').fetchall()
+        except sqlite3.Error as db_exc:
+            LOGGER.warning(f"Cannot read cache database {self.db_path}: {db_exc}")
+            return []
+        return [SimpleNamespace(id=key, key=key, size=size, stored_at=stored_at, accessed_at=accessed_at, hits=hits,
+                                negative_ttl=negative_ttl)
+                for key, size, stored_at, accessed_at, hits, negative_ttl in rows]
+
+    def _remove(self, entries):
+        ''' Removes cache entries
+
+        :param entries: list of entries from '_list_entries()'
+        '''
+        try:
+            with self._connect() as conn:
+                conn.executemany('DELETE FROM responses WHERE key = ?', [(entry.id,) for entry in entries])
+        except sqlite3.Error as db_exc:
+            LOGGER.warning(f"Cannot remove from cache database {self.db_path}: {db_exc}")
+
+    def vacuum(self):
+        ''' Rebuilds the database file to reclaim the space left by removed entries
+        '''
+        try:
+            conn = self._connect()
+            conn.execute('VACUUM')
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        except sqlite3.Error as db_exc:
+            LOGGER.warning(f"Cannot vacuum cache database {self.db_path}: {db_exc}")
+
+
+class TTLMemo:
+    ''' Thread safe memo of parsed responses e.g. 'DatasetCollection' objects keyed on nvcl id or 'MosaicLogIndex'
+        objects keyed on dataset id. The least recently used are evicted when it is full, entries may also expire
+    '''
+
+    def __init__(self, max_entries=MEMO_SIZE, ttl=None):
+        '''
+        :param max_entries: maximum number of entries
+        :param ttl: optional time to live in seconds, default is never expire
+        '''
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (value, time stored)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        ''' Reads a value from the memo
+
+        :param key: key e.g. nvcl id
+        :returns: value or None if not found or expired
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and time.time() - entry[1] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        ''' Writes a value to the memo, evicting the least recently used to make room
+
+        :param key: key e.g. nvcl id
+        :param value: value e.g. 'DatasetCollection' object
+        '''
+        if self.max_entries < 1:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        ''' Removes all entries from the memo
+        '''
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
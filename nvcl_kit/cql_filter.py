@@ -1,6 +1,7 @@
 import sys
 import logging
 import json
+from contextlib import nullcontext
 from urllib3.util import Retry
 
 from shapely import Polygon
@@ -9,6 +10,8 @@ from requests import Session
 from requests.adapters import HTTPAdapter
 from urllib3.exceptions import HTTPError
 
+from nvcl_kit.transfer_stats import ACCEPT_ENCODING
+
 LOG_LVL = logging.INFO
 ''' Initialise debug level, set to 'logging.INFO' or 'logging.DEBUG'
 '''
@@ -43,7 +46,7 @@ def make_cql_filter(bbox: dict, poly: Polygon) -> str:
     else:
         return "nvclCollection = 'true'"
 
-def make_cql_request(url: str, prov: str, cql_filter: str, max_features: int):
+def make_cql_request(url: str, prov: str, cql_filter: str, max_features: int, limiter=None, stats=None):
     """
     Makes an OGC WFS GetFeature v1.1.0 request using GET and expecting a JSON response
     Caller can supply a CQL filter
@@ -52,6 +55,8 @@ def make_cql_request(url: str, prov: str, cql_filter: str, max_features: int):
     :param prov: provider e.g. 'nsw'
     :param cql_filter: CQL filter string e.g. filter by polygon
     :param max_features: maximum number of features to return, if < 1 then all boreholes are returned
+    :param limiter: optional 'RateLimiter' object, limits the provider's requests in flight and request rate
+    :param stats: optional 'TransferStats' object, counts the responses and bytes received
     :returns: list of features, each feature is a dict
     """
     # NB: Does not perform WFS request paging, may be required in future
@@ -77,9 +82,13 @@ def make_cql_request(url: str, prov: str, cql_filter: str, max_features: int):
                             status_forcelist=[429, 502, 503, 504]
                            )
             s.mount('https://', HTTPAdapter(max_retries=retries))
+            s.headers['Accept-Encoding'] = ACCEPT_ENCODING
 
             # Sending the request
-            response = s.get(url, params=params)
+            with limiter or nullcontext():
+                response = s.get(url, params=params)
+            if stats is not None:
+                stats.add_response(response)
     except (HTTPError, requests.RequestException) as e:
         LOGGER.error(f"{prov} returned error sending WFS GetFeature: {e}")
         return []
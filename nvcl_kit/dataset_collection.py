@@ -0,0 +1,392 @@
+"""
+This module contains a parsed 'getDatasetCollection' response and a catalogue of all of a provider's datasets.
+Responses may be XML or JSON
+"""
+
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from nvcl_kit.xml_helpers import clean_xml_parse, iterparse_elements, parse_dates, parse_date_str, TextExtractor, ElementFinder
+from nvcl_kit.json_helpers import is_json, load_json, JsonFinder, JsonTextExtractor
+from nvcl_kit.records import NAMESPACE_TYPES, copy_record
+
+RECORD_TYPES = ['dataset_ids', 'datasets', 'logs', 'image_logs', 'spectral_logs', 'profilometer_logs']
+''' Types of records in a 'getDatasetCollection' response, see 'iter_dataset_collection()'
+'''
+
+
+class DatasetCollection:
+    ''' A parsed 'getDatasetCollection' response for one borehole. The XML or JSON is parsed once, then the dataset,
+        log, image log, spectral log and profilometer log lists are each derived from it once, when first used.
+        Lists of new record objects are returned, so that callers may change them
+    '''
+
+    def __init__(self, response_str, records=NAMESPACE_TYPES):
+        '''
+        :param response_str: response from '_ServiceInterface.get_dataset_collection()', may be empty
+        :param records: optional record types of the logs, 'records.NAMESPACE_TYPES' (default) or 'records.COMPACT_TYPES'
+        '''
+        self._fmt = _JSON if is_json(response_str) else _XML
+        self._records = records
+        self.root = self._fmt.parse(response_str) if response_str else None
+        self._lists = {}
+
+    def is_valid(self):
+        ''' Returns True if the response was parsed, False if it was empty or not XML or JSON
+
+        :returns: boolean
+        '''
+        return self.root is not None and self._fmt.is_valid(self.root)
+
+    def _derive(self, record_type):
+        ''' Derives a list of records from the XML or JSON, once
+
+        :param record_type: one of 'RECORD_TYPES'
+        :returns: list of copies of the records
+        '''
+        lst = self._lists.get(record_type)
+        if lst is None:
+            lst = []
+            if self.root is not None:
+                _, record_fn = _RECORDS[record_type]
+                for elem in self._fmt.records[record_type](self.root):
+                    lst.extend(record_fn(elem, self._fmt, self._records))
+            self._lists[record_type] = lst
+        if record_type == 'dataset_ids':
+            return list(lst)
+        return [copy_record(record) for record in lst]
+
+    def dataset_ids(self):
+        ''' Returns a list of dataset ids, see 'NVCLReader.get_datasetid_list()'
+        '''
+        return self._derive('dataset_ids')
+
+    def datasets(self):
+        ''' Returns a list of dataset objects, see 'NVCLReader.get_dataset_list()'
+        '''
+        return self._derive('datasets')
+
+    def logs(self):
+        ''' Returns a list of generic log objects, see 'NVCLReader.get_logs_data()'
+        '''
+        return self._derive('logs')
+
+    def image_logs(self):
+        ''' Returns a list of image log objects, see 'NVCLReader.get_imagelog_data()'
+        '''
+        return self._derive('image_logs')
+
+    def spectral_logs(self):
+        ''' Returns a list of spectral log objects, see 'NVCLReader.get_spectrallog_data()'
+        '''
+        return self._derive('spectral_logs')
+
+    def profilometer_logs(self):
+        ''' Returns a list of profilometer log objects, see 'NVCLReader.get_profilometer_data()'
+        '''
+        return self._derive('profilometer_logs')
+
+
+class DatasetCatalogue:
+    ''' An index of all of a provider's datasets keyed on nvcl id, made from a 'getDatasetCollection' response
+        requested with 'holeidentifier=all' and 'headersOnly=yes'. The nvcl id of a dataset is the last part of
+        its borehole URI e.g. 'http://blah/resource/feature/blah/borehole/6315' -> '6315'
+    '''
+
+    def __init__(self, response_str):
+        '''
+        :param response_str: response from '_ServiceInterface.get_dataset_collection()', may be empty
+        '''
+        self.stored_at = time.time()
+        self._valid = False
+        # nvcl id -> list of dataset ids, nvcl id -> list of dataset objects
+        self._dataset_ids = {}
+        self._datasets = {}
+        fmt = _JSON if is_json(response_str) else _XML
+        root = fmt.parse(response_str) if response_str else None
+        if root is None or not fmt.is_valid(root):
+            return
+        self._valid = True
+        for child in fmt.records['datasets'](root):
+            borehole_uri, dataset_id = fmt.catalogue_texts(child)
+            nvcl_id = borehole_uri.rstrip('/').rsplit('/', 1)[-1]
+            if not nvcl_id or not dataset_id:
+                continue
+            self._dataset_ids.setdefault(nvcl_id, []).append(dataset_id)
+            dataset_obj = _parse_dataset(child, fmt)
+            if dataset_obj is not None:
+                self._datasets.setdefault(nvcl_id, []).append(dataset_obj)
+
+    def is_valid(self):
+        ''' Returns True if the response was parsed, False if it was empty or not XML or JSON
+
+        :returns: boolean
+        '''
+        return self._valid
+
+    def nvcl_ids(self):
+        ''' Returns the nvcl ids of all the boreholes which have datasets
+
+        :returns: a list of nvcl ids
+        '''
+        return list(self._dataset_ids.keys())
+
+    def dataset_ids(self, nvcl_id):
+        ''' Returns the dataset ids of a borehole, see 'NVCLReader.get_datasetid_list()'
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter
+        :returns: a list of dataset ids, empty if the borehole has no datasets
+        '''
+        return list(self._dataset_ids.get(nvcl_id, []))
+
+    def datasets(self, nvcl_id):
+        ''' Returns the dataset objects of a borehole, see 'NVCLReader.get_dataset_list()'
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter
+        :returns: a list of dataset objects, empty if the borehole has no datasets
+        '''
+        return [copy_record(dataset_obj) for dataset_obj in self._datasets.get(nvcl_id, [])]
+
+    def __len__(self):
+        return len(self._dataset_ids)
+
+    def __contains__(self, nvcl_id):
+        return nvcl_id in self._dataset_ids
+
+
+def _json_dates(ds_obj):
+    ''' Parses dates from a JSON dataset object, the JSON version of 'xml_helpers.parse_dates()'
+
+    :param ds_obj: dataset dict
+    :returns: dict: keys are 'modified_date' and/or 'created_date', values are datetime objects
+    '''
+    date_dict = {}
+    for date_str, key in zip(_JSON_DATE_TEXTS(ds_obj), ['modified_date', 'created_date']):
+        # Dates may be written as milliseconds since the epoch
+        if date_str.isdigit():
+            date_obj = datetime.fromtimestamp(int(date_str) / 1000.0, tz=timezone.utc)
+        else:
+            date_obj = parse_date_str(date_str)
+        if date_obj is not None:
+            date_dict[key] = date_obj
+    return date_dict
+
+
+def _json_dataset_elems(*names):
+    ''' Makes a function which finds the JSON objects at a path of keys in each dataset
+
+    :param names: path of XML element names below '<Dataset>' e.g. 'SpectralLogs', 'SpectralLog'
+    :returns: function which takes the decoded response and returns a list of dicts
+    '''
+    finder = JsonFinder(*names)
+    return lambda root: [obj for ds_obj in _JSON_DATASETS(root) for obj in finder(ds_obj)]
+
+
+_JSON_DATASETS = JsonFinder('DatasetCollection', 'Dataset')
+_JSON_DATE_TEXTS = JsonTextExtractor('modifiedDate', 'createdDate')
+
+# Response formats: how to parse a response and the precompiled paths used to extract records from it,
+# see 'xml_helpers.TextExtractor' and 'json_helpers.JsonTextExtractor'. 'records' is added below
+_XML = SimpleNamespace(
+    parse=clean_xml_parse,
+    is_valid=lambda root: root.tag != '',
+    dates=parse_dates,
+    dataset_id_texts=TextExtractor('./DatasetID'),
+    catalogue_texts=TextExtractor('./boreholeURI', './DatasetID'),
+    dataset_texts=TextExtractor('./DatasetID', './DatasetName', './boreholeURI', './trayID', './sectionID', './domainID'),
+    logs=ElementFinder('./Logs/Log'),
+    log_texts=TextExtractor('LogID', 'logName', 'ispublic', 'logType', 'algorithmoutID', 'maskLogId'),
+    image_logs=ElementFinder('./ImageLogs/Log'),
+    image_log_texts=TextExtractor('LogName', 'LogID', 'SampleCount'),
+    spectral_log_texts=TextExtractor('./logID', './logName', './wavelengthUnits', './sampleCount', './script', './wavelengths',
+                                     defaults=('', '', '', 0, '', '')),
+    prof_log_texts=TextExtractor('./logID', './logName', './sampleCount', './floatsPerSample', './minVal', './maxVal',
+                                 defaults=('', '', 0, 0.0, 0.0, 0.0)))
+_JSON = SimpleNamespace(
+    parse=load_json,
+    is_valid=lambda root: isinstance(root, (list, dict)),
+    dates=_json_dates,
+    dataset_id_texts=JsonTextExtractor('DatasetID'),
+    catalogue_texts=JsonTextExtractor('boreholeURI', 'DatasetID'),
+    dataset_texts=JsonTextExtractor('DatasetID', 'DatasetName', 'boreholeURI', 'trayID', 'sectionID', 'domainID'),
+    logs=JsonFinder('Logs', 'Log'),
+    log_texts=JsonTextExtractor('LogID', 'logName', 'ispublic', 'logType', 'algorithmoutID', 'maskLogId'),
+    image_logs=JsonFinder('ImageLogs', 'Log'),
+    image_log_texts=JsonTextExtractor('LogName', 'LogID', 'SampleCount'),
+    spectral_log_texts=JsonTextExtractor('logID', 'logName', 'wavelengthUnits', 'sampleCount', 'script', 'wavelengths',
+                                         defaults=('', '', '', 0, '', '')),
+    prof_log_texts=JsonTextExtractor('logID', 'logName', 'sampleCount', 'floatsPerSample', 'minVal', 'maxVal',
+                                     defaults=('', '', 0, 0.0, 0.0, 0.0)))
+
+
+def iter_dataset_collection(response_str, record_type, records=NAMESPACE_TYPES):
+    ''' Parses records from a 'getDatasetCollection' response incrementally, without building the whole XML tree.
+        Log and dataset records are yielded one '<Dataset>' element at a time, spectral and profilometer logs
+        one log element at a time. JSON responses are decoded whole.
+        A ValueError is raised if an XML response is cut short
+
+    :param response_str: response from '_ServiceInterface.get_dataset_collection()', may be empty
+    :param record_type: one of 'RECORD_TYPES' e.g. 'logs', the name of the 'DatasetCollection' method
+                        which returns the same records
+    :param records: optional record types of the logs, 'records.NAMESPACE_TYPES' (default) or 'records.COMPACT_TYPES'
+    :returns: a generator of records
+    '''
+    if not response_str:
+        return
+    if is_json(response_str):
+        yield from getattr(DatasetCollection(response_str, records), record_type)()
+        return
+    tag_path, record_fn = _RECORDS[record_type]
+    for elem in iterparse_elements(response_str, tag_path):
+        yield from record_fn(elem, _XML, records)
+
+
+def _dataset_ids(child, fmt=_XML, records=NAMESPACE_TYPES):
+    ''' Yields the dataset id of a '<Dataset>' element
+
+    :param child: '<Dataset>' XML element or JSON dataset dict
+    :param fmt: response format, '_XML' or '_JSON'
+    :param records: record types, see 'DatasetCollection'
+    '''
+    dataset_id, = fmt.dataset_id_texts(child)
+    if dataset_id:
+        yield dataset_id
+
+
+def _datasets(child, fmt=_XML, records=NAMESPACE_TYPES):
+    ''' Yields the dataset object of a '<Dataset>' element
+
+    :param child: '<Dataset>' XML element or JSON dataset dict
+    :param fmt: response format, '_XML' or '_JSON'
+    :param records: record types, see 'DatasetCollection'
+    '''
+    dataset_obj = _parse_dataset(child, fmt)
+    if dataset_obj is not None:
+        yield dataset_obj
+
+
+def _parse_dataset(child, fmt=_XML):
+    ''' Parses a dataset object from a '<Dataset>' element
+
+    :param child: '<Dataset>' XML element or JSON dataset dict
+    :param fmt: response format, '_XML' or '_JSON'
+    :returns: a SimpleNamespace object, see 'NVCLReader.get_dataset_list()', or None if the id or name is missing
+    '''
+    dataset_id, dataset_name, *optional_vals = fmt.dataset_texts(child)
+    # Compulsory
+    if not dataset_id or not dataset_name:
+        return None
+    # Optional
+    dataset_obj = SimpleNamespace(dataset_id=dataset_id,
+                                  dataset_name=dataset_name)
+    for label, val in zip(['borehole_uri', 'tray_id', 'section_id', 'domain_id'], optional_vals):
+        if val:
+            setattr(dataset_obj, label, val)
+    # Look for created & modified dates
+    for key, val in fmt.dates(child).items():
+        setattr(dataset_obj, key, val)
+    return dataset_obj
+
+
+def _logs(ds_child, fmt=_XML, records=NAMESPACE_TYPES):
+    ''' Yields the generic log objects of a '<Dataset>' element, see 'NVCLReader.get_logs_data()'
+
+    :param ds_child: '<Dataset>' XML element or JSON dataset dict
+    :param fmt: response format, '_XML' or '_JSON'
+    :param records: record types, see 'DatasetCollection'
+    '''
+    # Get the dates from the 'Dataset' elements
+    date_dict = fmt.dates(ds_child)
+    # Get the log data from the 'Logs' elements
+    for log_child in fmt.logs(ds_child):
+        log_id, log_name, is_public, log_type, algorithm_id, mask_log_id = fmt.log_texts(log_child)
+        if log_name != '' and log_id != '':
+            # Set dates, if they were found
+            yield records.log(log_id=log_id, log_name=log_name, is_public=is_public, log_type=log_type,
+                              algorithm_id=algorithm_id, mask_log_id=mask_log_id, **date_dict)
+
+
+def _image_logs(ds_child, fmt=_XML, records=NAMESPACE_TYPES):
+    ''' Yields the image log objects of a '<Dataset>' element, see 'NVCLReader.get_imagelog_data()'
+
+    :param ds_child: '<Dataset>' XML element or JSON dataset dict
+    :param fmt: response format, '_XML' or '_JSON'
+    :param records: record types, see 'DatasetCollection'
+    '''
+    date_dict = fmt.dates(ds_child)
+    for log_child in fmt.image_logs(ds_child):
+        log_name, log_id, sample_count = fmt.image_log_texts(log_child)
+        if log_name != '' and log_id != '':
+            yield records.log(log_id=log_id, log_name=log_name, sample_count=sample_count, **date_dict)
+
+
+def _spectral_logs(child, fmt=_XML, records=NAMESPACE_TYPES):
+    ''' Yields the spectral log object of a '<SpectralLog>' element, see 'NVCLReader.get_spectrallog_data()'
+
+    :param child: '<SpectralLog>' XML element or JSON spectral log dict
+    :param fmt: response format, '_XML' or '_JSON'
+    :param records: record types, see 'DatasetCollection'
+    '''
+    log_id, log_name, wavelength_units, sample_count_text, script_raw, wavelengths = fmt.spectral_log_texts(child)
+    try:
+        sample_count = int(sample_count_text)
+    except ValueError:
+        sample_count = 0
+    script_str = script_raw.replace('; ', ';')
+    script_str_list = script_str.split(';')
+    script_dict = {}
+    for assgn in script_str_list:
+        var, eq, val = assgn.partition('=')
+        if var and eq == '=':
+            script_dict[var] = val
+    try:
+        wv_list = [float(wv_str) for wv_str in wavelengths.split(',')]
+    except ValueError:
+        wv_list = []
+    yield records.spectral_log(log_id=log_id, log_name=log_name, wavelength_units=wavelength_units,
+                               sample_count=sample_count, script_raw=script_raw, script=script_dict,
+                               wavelengths=wv_list)
+
+
+def _profilometer_logs(child, fmt=_XML, records=NAMESPACE_TYPES):
+    ''' Yields the profilometer log object of a '<ProfLog>' element, see 'NVCLReader.get_profilometer_data()'
+
+    :param child: '<ProfLog>' XML element or JSON profilometer log dict
+    :param fmt: response format, '_XML' or '_JSON'
+    :param records: record types, see 'DatasetCollection'
+    '''
+    log_id, log_name, sample_count_text, floats_text, min_text, max_text = fmt.prof_log_texts(child)
+    try:
+        sample_count = int(sample_count_text)
+    except ValueError:
+        sample_count = 0.0
+    try:
+        floats_per_sample = float(floats_text)
+    except ValueError:
+        floats_per_sample = 0.0
+    try:
+        min_val = float(min_text)
+    except ValueError:
+        min_val = 0.0
+    try:
+        max_val = float(max_text)
+    except ValueError:
+        max_val = 0.0
+    yield records.profilometer_log(log_id=log_id, log_name=log_name, sample_count=sample_count,
+                                   floats_per_sample=floats_per_sample, min_val=min_val, max_val=max_val)
+
+
+# Record type -> (path of record elements below the root element, function which yields records from an element)
+_RECORDS = {
+    'dataset_ids': (('Dataset',), _dataset_ids),
+    'datasets': (('Dataset',), _datasets),
+    'logs': (('Dataset',), _logs),
+    'image_logs': (('Dataset',), _image_logs),
+    'spectral_logs': (('*', 'SpectralLogs', 'SpectralLog'), _spectral_logs),
+    'profilometer_logs': (('*', 'ProfilometerLogs', 'ProfLog'), _profilometer_logs),
+}
+_XML.records = {record_type: ElementFinder('./' + '/'.join(tag_path)) for record_type, (tag_path, _) in _RECORDS.items()}
+_JSON.records = {record_type: _JSON_DATASETS for record_type in ['dataset_ids', 'datasets', 'logs', 'image_logs']}
+_JSON.records['spectral_logs'] = _json_dataset_elems('SpectralLogs', 'SpectralLog')
+_JSON.records['profilometer_logs'] = _json_dataset_elems('ProfilometerLogs', 'ProfLog')
@@ -0,0 +1,140 @@
+"""
+This module contains functions used to decode the JSON versions of NVCL service responses,
+which are requested with 'outputformat=json'. JSON keys are the names of the XML elements,
+the first letter may be upper or lower case e.g. 'DatasetID' or 'datasetID'
+"""
+
+import json
+
+
+def is_json(response_str):
+    ''' Returns True if a response looks like JSON, i.e. it starts with '{' or '['
+
+    :param response_str: response string or byte string, may be empty
+    :returns: boolean
+    '''
+    if not response_str:
+        return False
+    head = response_str[:64].lstrip()[:1]
+    return head in ('{', '[', b'{', b'[')
+
+
+def load_json(response_str):
+    ''' Decodes a JSON response
+
+    :param response_str: response string or byte string
+    :returns: decoded JSON object or None if it could not be decoded
+    '''
+    try:
+        return json.loads(response_str)
+    except (json.JSONDecodeError, UnicodeDecodeError, TypeError):
+        return None
+
+
+def _key_names(name):
+    ''' Returns the JSON keys which may be used for an XML element name
+
+    :param name: XML element name e.g. 'DatasetID'
+    :returns: tuple of keys e.g. ('DatasetID', 'datasetID')
+    '''
+    return tuple(dict.fromkeys([name, name[:1].lower() + name[1:], name[:1].upper() + name[1:]]))
+
+
+def _lookup(obj, keys):
+    ''' Looks up the first of a list of keys found in a JSON object
+
+    :param obj: dict
+    :param keys: keys from '_key_names()'
+    :returns: value or None if not found
+    '''
+    for key in keys:
+        val = obj.get(key)
+        if val is not None:
+            return val
+    return None
+
+
+def _json_text(val):
+    ''' Converts a JSON value to the text of the equivalent XML element
+
+    :param val: JSON value
+    :returns: string
+    '''
+    if isinstance(val, str):
+        return val
+    if isinstance(val, bool):
+        return 'true' if val else 'false'
+    if isinstance(val, (int, float)):
+        return str(val)
+    if isinstance(val, list):
+        return ','.join(_json_text(item) for item in val)
+    return ''
+
+
+class JsonFinder:
+    ''' Finds the list of objects at a path of keys, the JSON equivalent of 'xml_helpers.ElementFinder'.
+        A key is skipped if it is missing but a later key is present, so that the outer wrapper objects are optional,
+        and a single object is returned as a list of one object
+
+        ::
+
+            datasets = JsonFinder('DatasetCollection', 'Dataset')(json_obj)
+    '''
+
+    def __init__(self, *names):
+        '''
+        :param names: path of XML element names e.g. 'Logs', 'Log'
+        '''
+        self.names = names
+        self._keys = [_key_names(name) for name in names]
+
+    def __call__(self, obj):
+        '''
+        :param obj: decoded JSON object
+        :returns: list of dicts
+        '''
+        for idx, keys in enumerate(self._keys):
+            if not isinstance(obj, dict):
+                break
+            val = _lookup(obj, keys)
+            if val is not None:
+                obj = val
+            elif all(_lookup(obj, later_keys) is None for later_keys in self._keys[idx + 1:]):
+                return []
+        if isinstance(obj, list):
+            return [item for item in obj if isinstance(item, dict)]
+        if isinstance(obj, dict):
+            return [obj]
+        return []
+
+
+class JsonTextExtractor:
+    ''' Extracts the values of a list of keys as texts, the JSON equivalent of 'xml_helpers.TextExtractor'.
+        Numbers and booleans are given the same texts as their XML elements and lists of numbers are
+        joined with commas
+
+        ::
+
+            log_texts = JsonTextExtractor('LogID', 'logName', 'sampleCount', defaults=('', '', 0))
+            log_id, log_name, sample_count = log_texts(log_obj)
+    '''
+
+    def __init__(self, *names, defaults=None):
+        '''
+        :param names: XML element names e.g. 'LogID'
+        :param defaults: optional tuple of values returned when a key is not found, default is all empty strings
+        '''
+        self.names = names
+        self.defaults = defaults if defaults is not None else ('',) * len(names)
+        self._keys = [_key_names(name) for name in names]
+
+    def __call__(self, obj):
+        '''
+        :param obj: dict
+        :returns: tuple of texts
+        '''
+        texts = []
+        for keys, default in zip(self._keys, self.defaults):
+            val = _lookup(obj, keys)
+            texts.append(default if val is None else _json_text(val))
+        return tuple(texts)
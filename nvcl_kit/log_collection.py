@@ -0,0 +1,74 @@
+"""
+This module contains a parsed mosaic 'getLogCollection' response, indexed by log name
+"""
+
+from nvcl_kit.xml_helpers import clean_xml_parse, TextExtractor, ElementFinder
+from nvcl_kit.json_helpers import is_json, load_json, JsonFinder, JsonTextExtractor
+from nvcl_kit.records import NAMESPACE_TYPES, copy_record
+
+
+class MosaicLogIndex:
+    ''' A parsed mosaic 'getLogCollection' response for one dataset. The response is parsed once into an index of
+        image logs keyed on lower case log name, so that the image log getters e.g. 'NVCLReader.get_mosaic_imglogs()'
+        and 'NVCLReader.get_tray_imglogs()' are each a lookup. Lists of new log objects are returned, so that callers may change them
+    '''
+
+    def __init__(self, response_str, records=NAMESPACE_TYPES):
+        '''
+        :param response_str: response from '_ServiceInterface.get_log_collection()' with 'use_mosaic' set, may be empty
+        :param records: optional record types of the logs, 'records.NAMESPACE_TYPES' (default) or 'records.COMPACT_TYPES'
+        '''
+        self._valid = False
+        # All the logs in response order, lower case log name -> list of logs
+        self._logs = []
+        self._index = {}
+        if not response_str:
+            return
+        if is_json(response_str):
+            root = load_json(response_str)
+            self._valid = isinstance(root, (list, dict))
+            log_elems, log_texts = _JSON_LOGS(root), _JSON_LOG_TEXTS
+        else:
+            root = clean_xml_parse(response_str)
+            self._valid = root.tag != ''
+            log_elems, log_texts = _LOGS(root), _LOG_TEXTS
+        for child in log_elems:
+            log_id, log_name, sample_count_text = log_texts(child)
+            try:
+                sample_count = int(sample_count_text)
+            except ValueError:
+                sample_count = 0.0
+            if not log_id or not log_name:
+                continue
+            log_obj = records.log(log_id=log_id,
+                                  log_name=log_name,
+                                  sample_count=sample_count)
+            self._logs.append(log_obj)
+            self._index.setdefault(log_name.lower(), []).append(log_obj)
+
+    def is_valid(self):
+        ''' Returns True if the response was parsed, False if it was empty or not XML or JSON
+
+        :returns: boolean
+        '''
+        return self._valid
+
+    def logs(self, target_log_name='*'):
+        ''' Returns the logs with a particular name
+
+        :param target_log_name: (optional) log name, case insensitive. Default is '*' which returns all logs
+        :returns: a list of log objects, SimpleNamespace or 'records.LogRecord'. Fields are: log_id, log_name, sample_count
+        '''
+        if target_log_name == '*':
+            return [copy_record(log_obj) for log_obj in self._logs]
+        return [copy_record(log_obj) for log_obj in self._index.get(target_log_name.lower(), [])]
+
+    def __len__(self):
+        return len(self._logs)
+
+
+# Precompiled element paths, see 'xml_helpers.TextExtractor' and 'json_helpers.JsonTextExtractor'
+_LOGS = ElementFinder('./Log')
+_LOG_TEXTS = TextExtractor('./LogID', './LogName', './SampleCount', defaults=('', '', 0))
+_JSON_LOGS = JsonFinder('LogCollection', 'Log')
+_JSON_LOG_TEXTS = JsonTextExtractor('LogID', 'LogName', 'SampleCount', defaults=('', '', 0))
@@ -42,12 +42,41 @@ def param_builder(provider: str, **options: dict) -> SimpleNamespace:
                    nvcl_url: URL of NVCL service
                    max_boreholes: Maximum number of boreholes to retrieve. If < 1 then all boreholes are loaded, default 0
                    use_cql: use "CQL_FILTER" in WFS GetFeature requests. Geoserver only.
-                   cache_path: the folder path for cache files
+                   cache_path: the folder path for cache files, or SQLite database file path
+                   cache_backend: 'file' (default) one file per response, or 'sqlite' single SQLite database file
+                   mem_cache_size: size of the in-memory response cache in bytes, default is 0 (disabled)
+                   cache_ttl: time to live of cached responses, seconds or a dict of seconds keyed on service endpoint name
+                              e.g. {'getDatasetCollection': 86400, 'getspectraldata': None, '*': 604800}, default is never expire
+                   cache_max_size: maximum total size of the cache in 'cache_path' in bytes, default is no limit
+                   cache_policy: eviction policy used when 'cache_max_size' is exceeded, 'lru' (default) or 'lfu'
+                   cache_compression: compression of cached responses in 'cache_path', 'auto' (default) is 'zstd' if the
+                                      'zstandard' package is installed else 'gzip'; or 'gzip', 'zstd', None
+                   cache_stale_window: seconds after 'cache_ttl' expiry during which a stale cached response is returned
+                                       at once and refreshed in the background, default is 0 (off)
+                   cache_negative_ttl: time to live of cached failed and empty responses in seconds, so that they are not
+                                       requested again during this time, default is 0 (off)
+                   pool_connections: number of per-host connection pools kept for the NVCL service, default 10
+                   pool_maxsize: maximum number of keep-alive connections to the NVCL service, default 10
+                   max_workers: number of worker threads used by NVCLReader batch methods e.g. 'get_logs_data_many()', default 8
+                   max_concurrent: maximum number of requests in flight to the provider's NVCL & WFS services, default is no limit
+                   rate_limit: maximum number of requests per second sent to the provider's NVCL & WFS services, default is no limit
+                   use_json: request dataset and log collections as JSON, falling back to XML if the provider does not
+                             return JSON, default is False
+                   compact_records: return boreholes, logs, spectral & profilometer logs, tray depths and mineral data points
+                                    as the compact record types in 'nvcl_kit.records' instead of SimpleNamespace objects,
+                                    default is False
+                   borehole_data_engine: implementation of 'NVCLReader.get_borehole_data()', 'python' (default) is not vectorised,
+                                         'numpy' is, 'auto' uses 'numpy' if it is installed else 'python'.
+                                         See 'borehole_data.BOREHOLE_DATA_ENGINES'
 
     :returns: a SimpleNamespace object containing required connection parameters
     """
     OPTION_LIST = ['bbox', 'polygon', 'depths', 'wfs_url', 'nvcl_url',
-                   'max_boreholes', 'use_cql', 'cache_path']
+                   'max_boreholes', 'use_cql', 'cache_path', 'pool_connections', 'pool_maxsize',
+                   'max_workers', 'max_concurrent', 'rate_limit', 'cache_backend', 'mem_cache_size',
+                   'cache_ttl', 'cache_max_size', 'cache_policy', 'cache_compression',
+                   'cache_stale_window', 'cache_negative_ttl', 'use_json', 'compact_records',
+                   'borehole_data_engine']
     # Deprecated options
     OLD_OPTION_LIST = ['borehole_crs', 'wfs_version', 'use_local_filtering']
 
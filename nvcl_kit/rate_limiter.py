@@ -0,0 +1,159 @@
+"""
+This module contains a per-provider limiter for the number of requests in flight and the request rate
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+# Shared limiters, keyed on (provider, max_concurrent, rate_limit, burst)
+_LIMITERS = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(prov, max_concurrent=None, rate_limit=None, burst=None):
+    ''' Returns a 'RateLimiter' shared by all the NVCL and WFS requests sent to a provider
+
+    :param prov: provider e.g. 'nsw'
+    :param max_concurrent: maximum number of requests in flight, if None then not limited
+    :param rate_limit: maximum number of requests per second, float, if None then not limited
+    :param burst: maximum number of requests which can be sent at once before 'rate_limit' applies,
+                  default is 'max(1, rate_limit)'
+    :returns: a 'RateLimiter' object, or None if neither 'max_concurrent' nor 'rate_limit' are set
+    '''
+    if max_concurrent is None and rate_limit is None:
+        return None
+    key = (prov, max_concurrent, rate_limit, burst)
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = RateLimiter(max_concurrent, rate_limit, burst)
+            _LIMITERS[key] = limiter
+    return limiter
+
+
+class RateLimiter:
+    ''' Limits the number of requests in flight using a semaphore and the request rate using a token bucket.
+        Can be used as a context manager around each request, in threads or in coroutines:
+
+        ::
+
+            with limiter:
+                response = session.get(url)
+
+            async with limiter:
+                response = await session.get(url)
+    '''
+
+    def __init__(self, max_concurrent=None, rate_limit=None, burst=None):
+        '''
+        :param max_concurrent: maximum number of requests in flight, if None then not limited
+        :param rate_limit: maximum number of requests per second, float, if None then not limited
+        :param burst: maximum number of requests which can be sent at once before 'rate_limit' applies,
+                      default is 'max(1, rate_limit)'
+        '''
+        self.max_concurrent = max_concurrent
+        self.rate_limit = rate_limit
+        self._semaphore = threading.BoundedSemaphore(max_concurrent) if max_concurrent is not None else None
+        self._capacity = float(burst if burst is not None else max(1.0, rate_limit or 1.0))
+        self._tokens = self._capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        # Futures of coroutines waiting for the semaphore, woken in order by 'release()'
+        self._waiters = deque()
+
+    def _reserve(self):
+        ''' Takes a token from the bucket
+
+        :returns: number of seconds to wait before the request may be sent
+        '''
+        if self.rate_limit is None:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._last) * self.rate_limit)
+            self._last = now
+            # Tokens can go negative, which queues up waiting requests in order
+            self._tokens -= 1.0
+            if self._tokens >= 0.0:
+                return 0.0
+            return -self._tokens / self.rate_limit
+
+    def acquire(self):
+        ''' Blocks until a request may be sent
+        '''
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        delay = self._reserve()
+        if delay > 0.0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        ''' Waits, without blocking the event loop, until a request may be sent.
+            The semaphore is shared with threads, so a coroutine which cannot take it waits on a future
+            which 'release()' wakes, instead of polling
+        '''
+        if self._semaphore is not None:
+            loop = asyncio.get_running_loop()
+            while True:
+                with self._lock:
+                    if self._semaphore.acquire(blocking=False):
+                        break
+                    waiter = loop.create_future()
+                    self._waiters.append(waiter)
+                try:
+                    await waiter
+                except asyncio.CancelledError:
+                    with self._lock:
+                        if waiter in self._waiters:
+                            self._waiters.remove(waiter)
+                        else:
+                            # Already woken, so pass the wake-up on to the next waiter
+                            self._wake_next()
+                    raise
+        delay = self._reserve()
+        if delay > 0.0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.release()
+                raise
+
+    def release(self):
+        ''' Signals that a request has finished
+        '''
+        if self._semaphore is not None:
+            with self._lock:
+                self._semaphore.release()
+                self._wake_next()
+
+    def _wake_next(self):
+        ''' Wakes the coroutine which has waited longest for the semaphore, must be called with '_lock' held
+        '''
+        if self._waiters:
+            waiter = self._waiters.popleft()
+            waiter.get_loop().call_soon_threadsafe(_set_waiter, waiter)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    async def __aenter__(self):
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def _set_waiter(waiter):
+    ''' Wakes a coroutine waiting in 'RateLimiter.acquire_async()', unless it was cancelled
+
+    :param waiter: future
+    '''
+    if not waiter.done():
+        waiter.set_result(None)
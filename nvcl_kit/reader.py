@@ -3,13 +3,14 @@ This module is the main interface used to NVCL borehole data from the NVCL servi
 """
 
 import sys
+import time
 
-import xml.etree.ElementTree as ET
 import json
 from collections import OrderedDict
 import itertools
 import logging
 from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
 
 from requests.exceptions import RequestException
 
@@ -18,9 +19,17 @@ from http.client import HTTPException
 from shapely import Polygon, LinearRing
 
 from nvcl_kit.svc_interface import _ServiceInterface
+from nvcl_kit.cache import MEM_CACHE_SIZE, CACHE_POLICIES, CACHE_COMPRESSIONS, get_ttl, TTLMemo
+from nvcl_kit.dataset_collection import DatasetCollection, DatasetCatalogue, iter_dataset_collection
+from nvcl_kit.log_collection import MosaicLogIndex
+from nvcl_kit.records import NAMESPACE_TYPES, get_record_types, make_record
+from nvcl_kit.borehole_data import BOREHOLE_DATA_ENGINES, get_engine, numpy_borehole_data, columnar_borehole_data, empty_columns, np
 
 from nvcl_kit.wfs_helpers import get_borehole_list
-from nvcl_kit.xml_helpers import clean_xml_parse, parse_dates
+from nvcl_kit.rate_limiter import get_limiter
+from nvcl_kit.transfer_stats import get_transfer_stats
+from nvcl_kit.xml_helpers import clean_xml_parse, iterparse_elements, TextExtractor, ElementFinder, ChildFinder
+from nvcl_kit.json_helpers import is_json, load_json, JsonFinder, JsonTextExtractor
 
 ENFORCE_IS_PUBLIC = True
 ''' Enforce the 'is_public' flag , i.e. any data with 'is_public' set to 'false'
@@ -61,6 +70,21 @@ MIN_DEPTH = 0.0
 ''' Default minimum depth to search for boreholes
 '''
 
+MAX_WORKERS = 8
+''' Default number of worker threads used by the batch methods e.g. 'get_logs_data_many()'
+'''
+
+# Precompiled element paths of the NVCL responses, see 'xml_helpers.TextExtractor'
+_LOG_ELEMS = ElementFinder('./Log')
+_TRAY_ELEMS = ElementFinder('./ImageTray')
+_TRAY_TEXTS = TextExtractor('./SampleNo', './StartValue', './EndValue')
+_SCALAR_LOG_TEXTS = TextExtractor('./LogID', './logName', './ispublic', './logType', './algorithmoutID', 'maskLogId')
+_ALG_VERSION_ELEMS = ElementFinder('algorithms/outputs/versions')
+_ALG_VERSION_CHILDREN = ChildFinder('algorithmoutputID', 'version')
+# The same for 'outputformat=json' responses, see 'json_helpers.JsonTextExtractor'
+_JSON_LOGS = JsonFinder('LogCollection', 'Log')
+_JSON_SCALAR_LOG_TEXTS = JsonTextExtractor('LogID', 'logName', 'ispublic', 'logType', 'algorithmoutID', 'maskLogId')
+
 
 def bgr2rgba(bgr):
     ''' Converts BGR colour integer into an RGB tuple
@@ -75,6 +99,9 @@ class NVCLReader:
     ''' A class to extract NVCL borehole data (see README.md for details)
     '''
 
+    # Class used to call the NVCL services
+    _svc_class = _ServiceInterface
+
     def __init__(self, param_obj, wfs=None, log_lvl=None, skip_bhlist=False):
         '''
         :param param_obj: SimpleNamespace() object with parameters.
@@ -95,6 +122,37 @@ class NVCLReader:
             * POLYGON - (optional) 2D 'shapely.Polygon' y/x axis order EPSG:4326, limit to boreholes inside this polygon
             * BBOX - (optional) 2D bounding box in EPSG:4326, only boreholes within box are retrieved
             * MAX_BOREHOLES - (optional) Maximum number of boreholes to retrieve. If < 1 then all boreholes are loaded
+            * CACHE_PATH - (optional) the folder path for cache files, or SQLite database file path
+            * CACHE_BACKEND - (optional) 'file' (default) or 'sqlite', or a cache object with 'get(key)' and 'put(key, value)' methods
+            * MEM_CACHE_SIZE - (optional) size of the in-memory response cache in bytes e.g. 32 * 1024 * 1024, default is 0 (disabled).
+              Responses of the TSG and WFS download and status services are never cached
+            * CACHE_TTL - (optional) time to live of cached responses, a number of seconds or a dict of seconds keyed on service
+              endpoint name e.g. {'getDatasetCollection': 86400, 'getspectraldata': None, '*': 604800}, default is never expire
+            * CACHE_MAX_SIZE - (optional) maximum total size of the files or database in CACHE_PATH (bytes), default is no limit
+            * CACHE_POLICY - (optional) eviction policy used when CACHE_MAX_SIZE is exceeded, 'lru' (default) or 'lfu'
+            * CACHE_COMPRESSION - (optional) compression of responses in CACHE_PATH, 'auto' (default) uses 'zstd' if the 'zstandard'
+              package is installed else 'gzip'; or 'gzip', 'zstd', None. JPEG and PNG images are not compressed
+            * CACHE_STALE_WINDOW - (optional) seconds after CACHE_TTL expiry during which a stale cached response is
+              returned at once and refreshed in the background, default is 0 (off)
+            * CACHE_NEGATIVE_TTL - (optional) time to live of cached failed and empty responses (seconds), so that they are
+              not requested again during this time, default is 0 (off). Each cached failed or empty response keeps the
+              time to live it was stored with
+            * POOL_CONNECTIONS - (optional) number of per-host connection pools kept for the NVCL service
+            * POOL_MAXSIZE - (optional) maximum number of keep-alive connections to the NVCL service
+            * MAX_WORKERS - (optional) number of worker threads used by the batch methods e.g. 'get_logs_data_many()'
+            * MAX_CONCURRENT - (optional) maximum number of requests in flight to the provider's NVCL & WFS services
+            * RATE_LIMIT - (optional) maximum number of requests per second sent to the provider's NVCL & WFS services
+            * USE_JSON - (optional) request dataset and log collections with 'outputformat=json', which are faster to
+              decode than XML. If the provider does not return JSON then XML is requested instead, default is False
+            * COMPACT_RECORDS - (optional) return boreholes, logs, spectral & profilometer logs, tray depths and mineral data
+              points as the compact record types in 'nvcl_kit.records' instead of SimpleNamespace objects. They have the same
+              attributes, but use less memory. Use 'records.record_dict()' instead of 'vars()' to convert them to dicts.
+              Dataset objects are always SimpleNamespace objects.
+              Default is False
+            * BOREHOLE_DATA_ENGINE - (optional) implementation of 'get_borehole_data()', one of 'borehole_data.BOREHOLE_DATA_ENGINES':
+              'python' (default) is not vectorised, 'numpy' is vectorised, 'auto' uses 'numpy' if it is installed
+              else 'python'. They return the same results. Both make one object per data point, for speed use
+              'get_borehole_data_columns()'. 'numpy' is installed by 'pip install nvcl_kit[fast]'
 
           ::
 
@@ -209,6 +267,70 @@ class NVCLReader:
             LOGGER.warning("'MAX_BOREHOLES' parameter is not an integer")
             return
 
+        # Check MAX_WORKERS value
+        if not hasattr(self.param_obj, 'MAX_WORKERS'):
+            self.param_obj.MAX_WORKERS = MAX_WORKERS
+        if not isinstance(self.param_obj.MAX_WORKERS, int) or self.param_obj.MAX_WORKERS < 1:
+            LOGGER.warning("'MAX_WORKERS' parameter is not a positive integer")
+            return
+
+        # Check MEM_CACHE_SIZE value
+        if not hasattr(self.param_obj, 'MEM_CACHE_SIZE'):
+            self.param_obj.MEM_CACHE_SIZE = MEM_CACHE_SIZE
+        if not isinstance(self.param_obj.MEM_CACHE_SIZE, int) or self.param_obj.MEM_CACHE_SIZE < 0:
+            LOGGER.warning("'MEM_CACHE_SIZE' parameter is not a non-negative integer")
+            return
+
+        # Check CACHE_TTL value
+        if hasattr(self.param_obj, 'CACHE_TTL'):
+            ttl = self.param_obj.CACHE_TTL
+            ttl_list = list(ttl.values()) if isinstance(ttl, dict) else [ttl]
+            if not all(secs is None or (type(secs) in [int, float] and secs >= 0) for secs in ttl_list):
+                LOGGER.warning("'CACHE_TTL' parameter is not a number of seconds or a dict of seconds")
+                return
+
+        # Check CACHE_MAX_SIZE value
+        if hasattr(self.param_obj, 'CACHE_MAX_SIZE'):
+            if not isinstance(self.param_obj.CACHE_MAX_SIZE, int) or self.param_obj.CACHE_MAX_SIZE < 1:
+                LOGGER.warning("'CACHE_MAX_SIZE' parameter is not a positive integer")
+                return
+
+        # Check CACHE_POLICY value
+        if hasattr(self.param_obj, 'CACHE_POLICY'):
+            if self.param_obj.CACHE_POLICY not in CACHE_POLICIES:
+                LOGGER.warning(f"'CACHE_POLICY' parameter is not one of {CACHE_POLICIES}")
+                return
+
+        # Check CACHE_COMPRESSION value
+        if hasattr(self.param_obj, 'CACHE_COMPRESSION'):
+            if self.param_obj.CACHE_COMPRESSION not in CACHE_COMPRESSIONS:
+                LOGGER.warning(f"'CACHE_COMPRESSION' parameter is not one of {CACHE_COMPRESSIONS}")
+                return
+
+        # Check CACHE_STALE_WINDOW value
+        if hasattr(self.param_obj, 'CACHE_STALE_WINDOW'):
+            if type(self.param_obj.CACHE_STALE_WINDOW) not in [int, float] or self.param_obj.CACHE_STALE_WINDOW < 0:
+                LOGGER.warning("'CACHE_STALE_WINDOW' parameter is not a non-negative number")
+                return
+
+        # Check CACHE_NEGATIVE_TTL value
+        if hasattr(self.param_obj, 'CACHE_NEGATIVE_TTL'):
+            if type(self.param_obj.CACHE_NEGATIVE_TTL) not in [int, float] or self.param_obj.CACHE_NEGATIVE_TTL < 0:
+                LOGGER.warning("'CACHE_NEGATIVE_TTL' parameter is not a non-negative number")
+                return
+
+        # Check MAX_CONCURRENT value
+        if hasattr(self.param_obj, 'MAX_CONCURRENT'):
+            if not isinstance(self.param_obj.MAX_CONCURRENT, int) or self.param_obj.MAX_CONCURRENT < 1:
+                LOGGER.warning("'MAX_CONCURRENT' parameter is not a positive integer")
+                return
+
+        # Check RATE_LIMIT value
+        if hasattr(self.param_obj, 'RATE_LIMIT'):
+            if type(self.param_obj.RATE_LIMIT) not in [int, float] or self.param_obj.RATE_LIMIT <= 0:
+                LOGGER.warning("'RATE_LIMIT' parameter is not a positive number")
+                return
+
         # Check USE_CQL
         if not hasattr(self.param_obj, 'USE_CQL'):
             self.param_obj.USE_CQL = True
@@ -216,15 +338,103 @@ class NVCLReader:
             LOGGER.warning("'USE_CQL' parameter is not boolean")
             return
 
+        # Check USE_JSON
+        if not hasattr(self.param_obj, 'USE_JSON'):
+            self.param_obj.USE_JSON = False
+        if not isinstance(self.param_obj.USE_JSON, bool):
+            LOGGER.warning("'USE_JSON' parameter is not boolean")
+            return
+
+        # Check COMPACT_RECORDS
+        if not hasattr(self.param_obj, 'COMPACT_RECORDS'):
+            self.param_obj.COMPACT_RECORDS = False
+        if not isinstance(self.param_obj.COMPACT_RECORDS, bool):
+            LOGGER.warning("'COMPACT_RECORDS' parameter is not boolean")
+            return
+
+        # Check BOREHOLE_DATA_ENGINE
+        if not hasattr(self.param_obj, 'BOREHOLE_DATA_ENGINE'):
+            self.param_obj.BOREHOLE_DATA_ENGINE = 'python'
+        if self.param_obj.BOREHOLE_DATA_ENGINE not in BOREHOLE_DATA_ENGINES:
+            LOGGER.warning(f"'BOREHOLE_DATA_ENGINE' parameter is not one of {BOREHOLE_DATA_ENGINES}")
+            return
+        if self.param_obj.BOREHOLE_DATA_ENGINE == 'numpy' and np is None:
+            LOGGER.warning("'numpy' package is not installed, using 'python' borehole data engine")
+
         # If gathering boreholes
         if not skip_bhlist:
             self.borehole_list, self.wfs_error, self.wfs = get_borehole_list(self.param_obj)
 
         # Initialise interface to NVCL service
-        if (hasattr(self.param_obj, 'CACHE_PATH')):
-            self.svc = _ServiceInterface(self.param_obj.NVCL_URL, TIMEOUT, self.param_obj.CACHE_PATH)
-        else:
-            self.svc = _ServiceInterface(self.param_obj.NVCL_URL, TIMEOUT)
+        self.svc = self._svc_class(self.param_obj.NVCL_URL, TIMEOUT, **self._svc_options())
+
+        # Parsed dataset collections, these expire at the same time as the cached responses
+        self.dataset_colls = TTLMemo(ttl=get_ttl(getattr(self.param_obj, 'CACHE_TTL', None), 'getDatasetCollection'))
+        # Parsed mosaic log collections keyed on dataset id
+        self.mosaic_log_indexes = TTLMemo(ttl=get_ttl(getattr(self.param_obj, 'CACHE_TTL', None), 'getLogCollection'))
+        # Index of all the provider's datasets, see 'load_dataset_catalogue()'
+        self.dataset_catalogue = None
+        # Set to False if the provider does not return JSON collections
+        self.use_json = self.param_obj.USE_JSON
+        # Types of the returned records, see 'nvcl_kit.records'
+        self.records = get_record_types(self.param_obj.COMPACT_RECORDS)
+        # Implementation of 'get_borehole_data()'
+        self.bh_data_engine = get_engine(self.param_obj.BOREHOLE_DATA_ENGINE)
+
+    def _svc_options(self):
+        ''' Collects the optional NVCL service interface parameters found in 'param_obj'
+
+        :returns: dict of keyword arguments for '_ServiceInterface'
+        '''
+        svc_opts = {}
+        for attr, opt in [('CACHE_PATH', 'cache_path'),
+                          ('CACHE_BACKEND', 'cache_backend'),
+                          ('MEM_CACHE_SIZE', 'mem_cache_size'),
+                          ('CACHE_TTL', 'cache_ttl'),
+                          ('CACHE_MAX_SIZE', 'cache_max_size'),
+                          ('CACHE_POLICY', 'cache_policy'),
+                          ('CACHE_COMPRESSION', 'cache_compression'),
+                          ('CACHE_STALE_WINDOW', 'cache_stale_window'),
+                          ('CACHE_NEGATIVE_TTL', 'cache_negative_ttl'),
+                          ('POOL_CONNECTIONS', 'pool_connections'),
+                          ('POOL_MAXSIZE', 'pool_maxsize')]:
+            if hasattr(self.param_obj, attr):
+                svc_opts[opt] = getattr(self.param_obj, attr)
+        # NVCL and WFS requests to the same provider share a limiter
+        svc_opts['limiter'] = get_limiter(getattr(self.param_obj, 'PROV', None), getattr(self.param_obj, 'MAX_CONCURRENT', None),
+                                          getattr(self.param_obj, 'RATE_LIMIT', None))
+        svc_opts['stats'] = get_transfer_stats(getattr(self.param_obj, 'PROV', None))
+        return svc_opts
+
+    def _get_collection_response(self, request_fn, *args, **options):
+        ''' Requests a dataset or log collection as JSON if 'USE_JSON' is set, else as XML.
+            XML is also requested if the provider does not return JSON
+
+        :param request_fn: '_ServiceInterface' method e.g. 'get_dataset_collection'
+        :param args: positional parameters of 'request_fn'
+        :param options: optional parameters of 'request_fn'
+        :returns: the response as a byte string or an empty string upon error
+        '''
+        if self.use_json:
+            response_str = request_fn(*args, outputformat='json', **options)
+            if self._check_json_response(response_str):
+                return response_str
+        return request_fn(*args, **options)
+
+    def _check_json_response(self, response_str):
+        ''' Checks the response to a JSON request. If it is not JSON then the provider does not support JSON
+            and JSON is not requested again
+
+        :param response_str: response to a request with 'outputformat=json'
+        :returns: True if the response is JSON, False if XML should be requested
+        '''
+        if is_json(response_str):
+            return True
+        # An empty response is an error, which does not show whether JSON is supported
+        if response_str:
+            LOGGER.info(f"{self.param_obj.NVCL_URL} did not return JSON, falling back to XML")
+            self.use_json = False
+        return False
 
     def get_borehole_data(self, log_id, height_resol, class_name, top_n=1):
         ''' Retrieves borehole mineral data for a borehole, will only return mineral class data
@@ -233,7 +443,9 @@ class NVCLReader:
         :param height_resol: height resolution, float
         :param class_name: name of scalar class, returned in output for informational purposes
         :param top_n: optional number
-        :returns: dict: key - depth, float; value - if top_n=1 then  SimpleNamespace( 'colour'= RGBA float tuple, 'className'= class name, 'classText'= mineral name ) & if top_n>1 then [ SimpleNamespace(..) .. ]
+        :returns: dict: key - depth, float; value - if top_n=1 then  SimpleNamespace( 'colour'= RGBA float tuple, 'className'= class name,
+                  'classText'= mineral name ) & if top_n>1 then [ SimpleNamespace(..) .. ].
+                  If the 'COMPACT_RECORDS' parameter is set then 'records.MineralPoint' objects are returned instead of SimpleNamespace objects
         '''
         LOGGER.debug(f"get_borehole_data({log_id}, {height_resol}, {class_name}, {top_n}")
         # Check top_n parameter
@@ -245,6 +457,19 @@ class NVCLReader:
         json_data = self.svc.get_downsampled_data(log_id,
                                                   interval=height_resol, outputformat='json',
                                                   startdepth=self.min_depth, enddepth=self.max_depth)
+        return self._parse_borehole_data(json_data, class_name, top_n, self.records, self.bh_data_engine)
+
+    @staticmethod
+    def _parse_borehole_data(json_data, class_name, top_n, records=NAMESPACE_TYPES, engine='python'):
+        ''' Parses borehole mineral data from a JSON 'getDownsampledData' response
+
+        :param json_data: JSON response from 'get_downsampled_data()'
+        :param class_name: name of scalar class, returned in output for informational purposes
+        :param top_n: number of mineral classes to return at each depth
+        :param records: (optional) record types, 'records.NAMESPACE_TYPES' (default) or 'records.COMPACT_TYPES'
+        :param engine: (optional) 'python' (default) or 'numpy', see 'borehole_data.BOREHOLE_DATA_ENGINES'
+        :returns: dict: key - depth, float; value - see 'get_borehole_data()'
+        '''
         if not json_data:
             LOGGER.debug(f"no json_data = {json_data}")
             return OrderedDict()
@@ -258,56 +483,277 @@ class NVCLReader:
         else:
             # Sometimes meas_list is None
             if isinstance(meas_list, list):
-                # Sort then group by depth
-                sorted_meas_list = sorted(meas_list, key=lambda x: x['roundedDepth'])
-                for depth, group in itertools.groupby(sorted_meas_list, lambda x: x['roundedDepth']):
-                    # Filter out invalid and non-mineral class values
-                    clean_group = itertools.filterfalse(
-                                 lambda x: x.get('classText', 'INVALID').upper() in ['INVALID', 'NOTAROK'],
-                                 group)
-
-                    # Make a dict keyed on depth, value is element with largest count
-                    try:
-                        sorted_elem = sorted(clean_group, key=lambda x: x['classCount'], reverse=True)
-                    except ValueError:
-                        # Sometimes 'filtered_group' is empty
-                        LOGGER.warning(f"No valid values at depth {depth}")
-                        continue
-                    # If found no data skip
-                    if len(sorted_elem) == 0:
-                        continue
-                    depth_dict[depth] = []
-                    for elem in sorted_elem[:top_n]:
-                        data_point = SimpleNamespace()
-                        col = bgr2rgba(elem['colour'])
-                        kv_dict = {'className': class_name, **elem, 'colour': col}
-                        del kv_dict['roundedDepth']
-                        for key, val in kv_dict.items():
-                            setattr(data_point, key, val)
-                        depth_dict[depth].append(data_point)
-                    # If there's only one element in list, then substitute list with element
-                    if top_n == 1 and len(depth_dict[depth]) == 1:
-                        depth_dict[depth] = depth_dict[depth][0]
-
-        LOGGER.debug(f"Returning {depth_dict}")
+                # Irregular data which cannot be put in arrays is left to the python version
+                numpy_dict = numpy_borehole_data(meas_list, class_name, top_n, records) if engine == 'numpy' else None
+                if numpy_dict is not None:
+                    depth_dict = numpy_dict
+                else:
+                    # Sort then group by depth
+                    sorted_meas_list = sorted(meas_list, key=lambda x: x['roundedDepth'])
+                    for depth, group in itertools.groupby(sorted_meas_list, lambda x: x['roundedDepth']):
+                        # Filter out invalid and non-mineral class values
+                        clean_group = itertools.filterfalse(
+                                     lambda x: x.get('classText', 'INVALID').upper() in ['INVALID', 'NOTAROK'],
+                                     group)
+
+                        # Make a dict keyed on depth, value is element with largest count
+                        try:
+                            sorted_elem = sorted(clean_group, key=lambda x: x['classCount'], reverse=True)
+                        except ValueError:
+                            # Sometimes 'filtered_group' is empty
+                            LOGGER.warning(f"No valid values at depth {depth}")
+                            continue
+                        # If found no data skip
+                        if len(sorted_elem) == 0:
+                            continue
+                        depth_dict[depth] = []
+                        for elem in sorted_elem[:top_n]:
+                            col = bgr2rgba(elem['colour'])
+                            kv_dict = {'className': class_name, **elem, 'colour': col}
+                            del kv_dict['roundedDepth']
+                            depth_dict[depth].append(make_record(records.mineral_point, kv_dict))
+                        # If there's only one element in list, then substitute list with element
+                        if top_n == 1 and len(depth_dict[depth]) == 1:
+                            depth_dict[depth] = depth_dict[depth][0]
+
+        # Formatting a large dict takes longer than making it
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug(f"Returning {depth_dict}")
         return depth_dict
 
+    def get_borehole_data_columns(self, log_id, height_resol, class_name, top_n=1):
+        ''' Columnar version of 'get_borehole_data()', which returns the same data as arrays instead of an object per data point,
+            so that they can be sliced and plotted without making objects. Requires the 'numpy' package
+
+            ::
+
+                cols = reader.get_borehole_data_columns(log_id, 10.0, 'Grp1 uTSAS')
+                # Mineral with the largest count at each depth
+                top = cols.rank == 0
+                plt.scatter(cols.depth[top], cols.class_count[top], c=cols.colour[top])
+                names = [cols.class_texts[code] for code in cols.class_code[top]]
+
+        :param log_id: borehole log identifier, see 'get_borehole_data()'
+        :param height_resol: height resolution, float
+        :param class_name: name of scalar class, returned in output for informational purposes
+        :param top_n: optional number of mineral classes returned at each depth
+        :returns: SimpleNamespace( 'class_name'= class name,
+                                   'depth'= float array of depths,
+                                   'rank'= integer array, 0 for the mineral class with the largest count at a depth, 1 for the next ...,
+                                   'class_code'= integer array of mineral class codes, indexes of 'class_texts',
+                                   'class_texts'= list of mineral names,
+                                   'class_count'= array of class counts,
+                                   'colour'= float array of RGBA colours, one row per data point )
+                  the arrays have one element per data point, ordered by depth then rank.
+                  On error the arrays are empty, if 'numpy' is not installed returns None
+        '''
+        LOGGER.debug(f"get_borehole_data_columns({log_id}, {height_resol}, {class_name}, {top_n}")
+        if np is None:
+            LOGGER.warning("'numpy' package is not installed, cannot return columns")
+            return None
+        if top_n < 1:
+            LOGGER.warning("top_n parameter has invalid value, setting to default")
+            top_n = 1
+        json_data = self.svc.get_downsampled_data(log_id,
+                                                  interval=height_resol, outputformat='json',
+                                                  startdepth=self.min_depth, enddepth=self.max_depth)
+        return self._parse_borehole_columns(json_data, class_name, top_n)
+
+    @staticmethod
+    def _parse_borehole_columns(json_data, class_name, top_n):
+        ''' Parses borehole mineral data columns from a JSON 'getDownsampledData' response
+
+        :param json_data: JSON response from 'get_downsampled_data()'
+        :param class_name: name of scalar class, returned in output for informational purposes
+        :param top_n: number of mineral classes to return at each depth
+        :returns: see 'get_borehole_data_columns()'
+        '''
+        if not json_data:
+            LOGGER.debug(f"no json_data = {json_data}")
+            return empty_columns(class_name)
+        try:
+            meas_list = json.loads(json_data.decode('utf-8'))
+        except json.decoder.JSONDecodeError as jde:
+            LOGGER.warning(f"Cannot parse response from server {jde}")
+            return empty_columns(class_name)
+        # Sometimes meas_list is None
+        if not isinstance(meas_list, list):
+            return empty_columns(class_name)
+        columns = columnar_borehole_data(meas_list, class_name, top_n)
+        if columns is None:
+            LOGGER.warning("Response from server has values which cannot be put in arrays")
+            return empty_columns(class_name)
+        return columns
+
+    def _call_many(self, fn, id_list, max_workers, *args, **kwargs):
+        ''' Calls a reader method for each id in a list, using a pool of worker threads
+
+        :param fn: reader method, its first parameter is an id
+        :param id_list: list of ids, duplicates are only fetched once
+        :param max_workers: number of worker threads, if None then 'MAX_WORKERS' parameter is used
+        :param args: extra positional parameters passed to 'fn'
+        :param kwargs: extra keyword parameters passed to 'fn'
+        :returns: OrderedDict: key - id, value - result of 'fn', in the same order as 'id_list'
+        '''
+        id_list = list(OrderedDict.fromkeys(id_list))
+        if not id_list:
+            return OrderedDict()
+        if max_workers is None:
+            max_workers = self.param_obj.MAX_WORKERS
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(id_list))) as executor:
+            results = executor.map(lambda id: fn(id, *args, **kwargs), id_list)
+            return OrderedDict(zip(id_list, results))
+
+    def get_borehole_data_many(self, log_id_list, height_resol, class_name, top_n=1, max_workers=None):
+        ''' Retrieves borehole mineral data for a list of logs concurrently, see 'get_borehole_data()'
+
+        :param log_id_list: list of borehole log identifiers
+        :param height_resol: height resolution, float
+        :param class_name: name of scalar class, returned in output for informational purposes
+        :param top_n: optional number
+        :param max_workers: optional number of worker threads, default is 'MAX_WORKERS' parameter
+        :returns: OrderedDict: key - log id, value - result of 'get_borehole_data()', in the same order as 'log_id_list'
+        '''
+        return self._call_many(self.get_borehole_data, log_id_list, max_workers, height_resol, class_name, top_n=top_n)
+
+    def get_datasetid_list_many(self, nvcl_id_list, max_workers=None):
+        ''' Retrieves lists of dataset ids for a list of boreholes concurrently, see 'get_datasetid_list()'
+
+        :param nvcl_id_list: list of NVCL 'holeidentifier' parameters e.g. from 'get_nvcl_id_list()'
+        :param max_workers: optional number of worker threads, default is 'MAX_WORKERS' parameter
+        :returns: OrderedDict: key - nvcl id, value - result of 'get_datasetid_list()', in the same order as 'nvcl_id_list'
+        '''
+        return self._call_many(self.get_datasetid_list, nvcl_id_list, max_workers)
+
+    def load_dataset_catalogue(self):
+        ''' Fetches the dataset headers of all the provider's boreholes in one request and indexes them by nvcl id.
+            Once loaded, 'get_datasetid_list()' and 'get_dataset_list()' answer from the catalogue instead of sending
+            a request per borehole, until it expires with the 'getDatasetCollection' CACHE_TTL.
+            The catalogue guesses each dataset's nvcl id from the end of its borehole URI, so boreholes which are
+            not in the catalogue are still requested one at a time
+
+        :returns: a 'DatasetCatalogue' object, use its 'is_valid()' method to check that it was loaded
+        '''
+        return self._set_dataset_catalogue(DatasetCatalogue(self._get_collection_response(self.svc.get_dataset_collection, 'all',
+                                                                                          headersOnly='yes')))
+
+    def _set_dataset_catalogue(self, catalogue):
+        ''' Keeps a dataset catalogue, unless the request failed or the response could not be parsed
+
+        :param catalogue: 'DatasetCatalogue' object
+        :returns: 'catalogue'
+        '''
+        if catalogue.is_valid():
+            self.dataset_catalogue = catalogue
+        else:
+            LOGGER.warning("Cannot load dataset catalogue")
+        return catalogue
+
+    def _get_dataset_catalogue(self, nvcl_id):
+        ''' Returns the dataset catalogue if it was loaded, has not expired and has the borehole's datasets
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter
+        :returns: 'DatasetCatalogue' object or None
+        '''
+        catalogue = self.dataset_catalogue
+        if catalogue is None:
+            return None
+        if self.dataset_colls.ttl is not None and time.time() - catalogue.stored_at > self.dataset_colls.ttl:
+            self.dataset_catalogue = None
+            return None
+        return catalogue if nvcl_id in catalogue else None
+
+    def get_dataset_collection(self, nvcl_id):
+        ''' Retrieves the parsed dataset collection of a borehole. Dataset collections are memoised on the reader,
+            so 'get_datasetid_list()', 'get_dataset_list()', 'get_logs_data()', 'get_imagelog_data()',
+            'get_spectrallog_data()' and 'get_profilometer_data()' share one request and one parse per borehole
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter, the 'nvcl_id' from each item retrieved from 'get_feature_list()' or 'get_nvcl_id_list()'
+        :returns: a 'DatasetCollection' object
+        '''
+        return self._get_dataset_collection(nvcl_id)
+
+    def _get_dataset_collection(self, nvcl_id):
+        ''' Reads a dataset collection from the memo, else requests and parses it.
+            Concurrent calls for the same borehole share one request and one parse
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter
+        :returns: a 'DatasetCollection' object
+        '''
+        coll = self.dataset_colls.get(nvcl_id)
+        if coll is not None:
+            return coll
+        return self.svc.flights.do(('DatasetCollection', nvcl_id), self._load_dataset_collection, nvcl_id)
+
+    def _load_dataset_collection(self, nvcl_id):
+        ''' Requests and parses a dataset collection, then memoises it
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter
+        :returns: a 'DatasetCollection' object
+        '''
+        response_str = self._get_collection_response(self.svc.get_dataset_collection, nvcl_id)
+        return self._memoise_dataset_collection(nvcl_id, DatasetCollection(response_str, self.records))
+
+    def _memoise_dataset_collection(self, nvcl_id, coll):
+        ''' Memoises a dataset collection, unless the request failed or the response could not be parsed
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter
+        :param coll: 'DatasetCollection' object
+        :returns: 'coll'
+        '''
+        if coll.is_valid():
+            self.dataset_colls.put(nvcl_id, coll)
+        return coll
+
+    def _iter_dataset_collection(self, nvcl_id, record_type):
+        ''' Returns an iterator of records from the memoised dataset collection, else streams them from a new response
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter
+        :param record_type: one of 'dataset_collection.RECORD_TYPES' e.g. 'logs'
+        :returns: an iterator of records
+        '''
+        coll = self.dataset_colls.get(nvcl_id)
+        if coll is not None:
+            return iter(getattr(coll, record_type)())
+        return iter_dataset_collection(self._get_collection_response(self.svc.get_dataset_collection, nvcl_id), record_type,
+                                       self.records)
+
+    def iter_datasetid_list(self, nvcl_id):
+        ''' Streaming version of 'get_datasetid_list()', yields dataset ids as they are parsed.
+            Raises a ValueError if the response is cut short
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter, the 'nvcl_id' from each item retrieved from 'get_feature_list()' or 'get_nvcl_id_list()'
+        :returns: a generator of dataset ids
+        '''
+        catalogue = self._get_dataset_catalogue(nvcl_id)
+        if catalogue is not None:
+            yield from catalogue.dataset_ids(nvcl_id)
+            return
+        yield from self._iter_dataset_collection(nvcl_id, 'dataset_ids')
+
+    def iter_dataset_list(self, nvcl_id):
+        ''' Streaming version of 'get_dataset_list()', yields dataset objects as they are parsed.
+            Raises a ValueError if the response is cut short
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter, the 'nvcl_id' from each item retrieved from 'get_feature_list()' or 'get_nvcl_id_list()'
+        :returns: a generator of SimpleNamespace objects, see 'get_dataset_list()'
+        '''
+        catalogue = self._get_dataset_catalogue(nvcl_id)
+        if catalogue is not None:
+            yield from catalogue.datasets(nvcl_id)
+            return
+        yield from self._iter_dataset_collection(nvcl_id, 'datasets')
+
     def get_datasetid_list(self, nvcl_id):
         ''' Retrieves a list of dataset ids
 
         :param nvcl_id: NVCL 'holeidentifier' parameter, the 'nvcl_id' from each item retrieved from 'get_feature_list()' or 'get_nvcl_id_list()'
         :returns: a list of dataset ids
         '''
-        response_str = self.svc.get_dataset_collection(nvcl_id)
-        if not response_str:
-            return []
-        root = clean_xml_parse(response_str)
-        datasetid_list = []
-        for child in root.findall('./Dataset'):
-            dataset_id = child.findtext('./DatasetID', default='')
-            if dataset_id:
-                datasetid_list.append(dataset_id)
-        return datasetid_list
+        catalogue = self._get_dataset_catalogue(nvcl_id)
+        if catalogue is not None:
+            return catalogue.dataset_ids(nvcl_id)
+        return self._get_dataset_collection(nvcl_id).dataset_ids()
 
     def get_dataset_list(self, nvcl_id):
         ''' Retrieves a list of dataset objects
@@ -315,33 +761,10 @@ class NVCLReader:
         :param nvcl_id: NVCL 'holeidentifier' parameter, the 'nvcl_id' from each item retrieved from 'get_feature_list()' or 'get_nvcl_id_list()'
         :returns: a list of SimpleNamespace objects, attributes are: dataset_id, dataset_name, borehole_uri, tray_id, section_id, domain_id, created_date, (optional datetime object), modified_date (optional datetime object)
         '''
-        response_str = self.svc.get_dataset_collection(nvcl_id)
-        if not response_str:
-            return []
-        root = clean_xml_parse(response_str)
-        dataset_list = []
-        for child in root.findall('./Dataset'):
-            # Compulsory
-            dataset_id = child.findtext('./DatasetID', default='')
-            dataset_name = child.findtext('./DatasetName', default='')
-            if not dataset_id or not dataset_name:
-                continue
-            # Optional
-            dataset_obj = SimpleNamespace(dataset_id=dataset_id,
-                                          dataset_name=dataset_name)
-            for label, key in [('borehole_uri', './boreholeURI'),
-                               ('tray_id', './trayID'),
-                               ('section_id', './sectionID'),
-                               ('domain_id', './domainID')]:
-                val = child.findtext(key, default='')
-                if val:
-                    setattr(dataset_obj, label, val)
-            # Look for created & modified dates
-            for key, val in parse_dates(child).items():
-                setattr(dataset_obj, key, val)
-
-            dataset_list.append(dataset_obj)
-        return dataset_list
+        catalogue = self._get_dataset_catalogue(nvcl_id)
+        if catalogue is not None:
+            return catalogue.datasets(nvcl_id)
+        return self._get_dataset_collection(nvcl_id).datasets()
 
     def get_all_imglogs(self, dataset_id):
         ''' Retrieves a list of all log objects from mosaic service
@@ -391,26 +814,50 @@ class NVCLReader:
         :param target_log_name: (optional) log name to search for. Default is '*' which retrieves all logs
         :return: a list of SimpleNamespace objects. Fields are: log_id, log_name, sample_count
         '''
-        response_str = self.svc.get_log_collection(dataset_id, True)
-        if not response_str:
-            return []
-        root = clean_xml_parse(response_str)
-        dataset_list = []
-        for child in root.findall('./Log'):
-            log_id = child.findtext('./LogID', default='')
-            log_name = child.findtext('./LogName', default='')
-            try:
-                sample_count = int(child.findtext('./SampleCount', default=0))
-            except ValueError:
-                sample_count = 0.0
-            if not log_id or not log_name:
-                continue
-            if target_log_name.lower() == log_name.lower() or target_log_name == '*':
-                dataset_obj = SimpleNamespace(log_id=log_id,
-                                              log_name=log_name,
-                                              sample_count=sample_count)
-                dataset_list.append(dataset_obj)
-        return dataset_list
+        return self._get_mosaic_log_index(dataset_id).logs(target_log_name)
+
+    def _get_mosaic_log_index(self, dataset_id):
+        ''' Reads a dataset's mosaic log index from the memo, else requests and parses it.
+            Concurrent calls for the same dataset share one request and one parse
+
+        :param dataset_id: dataset id, taken from 'get_datasetid_list()' or 'get_dataset_list()'
+        :returns: a 'MosaicLogIndex' object
+        '''
+        index = self.mosaic_log_indexes.get(dataset_id)
+        if index is not None:
+            return index
+        return self.svc.flights.do(('MosaicLogIndex', dataset_id), self._load_mosaic_log_index, dataset_id)
+
+    def _load_mosaic_log_index(self, dataset_id):
+        ''' Requests and parses a mosaic log collection, then memoises it
+
+        :param dataset_id: dataset id
+        :returns: a 'MosaicLogIndex' object
+        '''
+        return self._memoise_mosaic_log_index(dataset_id, MosaicLogIndex(
+            self._get_collection_response(self.svc.get_log_collection, dataset_id, True), self.records))
+
+    def _memoise_mosaic_log_index(self, dataset_id, index):
+        ''' Memoises a mosaic log index, unless the request failed or the response could not be parsed
+
+        :param dataset_id: dataset id
+        :param index: 'MosaicLogIndex' object
+        :returns: 'index'
+        '''
+        if index.is_valid():
+            self.mosaic_log_indexes.put(dataset_id, index)
+        return index
+
+    @staticmethod
+    def _parse_mosaic_logs(response_str, target_log_name='*', records=NAMESPACE_TYPES):
+        ''' Parses logs with a particular name from a mosaic 'getLogCollection' XML or JSON response
+
+        :param response_str: response from 'get_log_collection()' with 'use_mosaic' set
+        :param target_log_name: (optional) log name to search for. Default is '*' which retrieves all logs
+        :param records: (optional) record types, 'records.NAMESPACE_TYPES' (default) or 'records.COMPACT_TYPES'
+        :return: a list of SimpleNamespace objects. Fields are: log_id, log_name, sample_count
+        '''
+        return MosaicLogIndex(response_str, records).logs(target_log_name)
 
     def get_mosaic_image(self, log_id, **options):
         ''' Retrieves images of NVCL core trays
@@ -455,23 +902,39 @@ class NVCLReader:
 
         :returns: a list of SimpleNamespace objects, with attributes: 'sample_no', 'start_value' and 'end_value'
         '''
-        response_str = self.svc.get_image_tray_depth(log_id)
+        return self._parse_tray_depths(self.svc.get_image_tray_depth(log_id), self.records)
+
+    @staticmethod
+    def _parse_tray_depths(response_str, records=NAMESPACE_TYPES):
+        ''' Parses tray depths from a 'getImageTrayDepth' response
+
+        :param response_str: response from 'get_image_tray_depth()'
+        :param records: (optional) record types, 'records.NAMESPACE_TYPES' (default) or 'records.COMPACT_TYPES'
+        :returns: a list of SimpleNamespace objects, with attributes: 'sample_no', 'start_value' and 'end_value'
+        '''
         if not response_str:
             return []
         root = clean_xml_parse(response_str)
         image_tray_list = []
-        for child in root.findall('./ImageTray'):
-            sample_no = child.findtext('./SampleNo', default='')
-            start_value = child.findtext('./StartValue', default='')
-            end_value = child.findtext('./EndValue', default='')
+        for child in _TRAY_ELEMS(root):
+            sample_no, start_value, end_value = _TRAY_TEXTS(child)
             if not sample_no or not start_value or not end_value:
                 continue
-            image_tray_obj = SimpleNamespace(sample_no=sample_no,
-                                             start_value=start_value,
-                                             end_value=end_value)
+            image_tray_obj = records.tray_depth(sample_no=sample_no,
+                                                start_value=start_value,
+                                                end_value=end_value)
             image_tray_list.append(image_tray_obj)
         return image_tray_list
 
+    def get_tray_depths_many(self, log_id_list, max_workers=None):
+        ''' Gets tray depths for a list of logs concurrently, see 'get_tray_depths()'
+
+        :param log_id_list: list of log ids obtained through calling 'get_tray_thumb_imglogs()' or 'get_tray_imglogs()'
+        :param max_workers: optional number of worker threads, default is 'MAX_WORKERS' parameter
+        :returns: OrderedDict: key - log id, value - result of 'get_tray_depths()', in the same order as 'log_id_list'
+        '''
+        return self._call_many(self.get_tray_depths, log_id_list, max_workers)
+
     def get_scalar_logs(self, dataset_id):
         ''' Retrieves a list of log objects for scalar plot service
 
@@ -479,31 +942,79 @@ class NVCLReader:
 
         :returns: a list of SimpleNamespace() objects, attributes are: log_id, log_name, is_public, log_type, algorithm_id, mask_log_id. 'mask_log_id' is not supported by all services and may be an empty string. On error returns empty list
         '''
-        response_str = self.svc.get_log_collection(dataset_id)
+        return self._parse_scalar_logs(self._get_collection_response(self.svc.get_log_collection, dataset_id), self.records)
+
+    @staticmethod
+    def _parse_scalar_logs(response_str, records=NAMESPACE_TYPES):
+        ''' Parses scalar log objects from a 'getLogCollection' XML or JSON response
+
+        :param response_str: response from 'get_log_collection()'
+        :param records: (optional) record types, 'records.NAMESPACE_TYPES' (default) or 'records.COMPACT_TYPES'
+        :returns: a list of SimpleNamespace() objects, see 'get_scalar_logs()'
+        '''
         if not response_str:
             return []
-        root = clean_xml_parse(response_str)
+        if is_json(response_str):
+            log_elems, log_texts = _JSON_LOGS(load_json(response_str)), _JSON_SCALAR_LOG_TEXTS
+        else:
+            log_elems, log_texts = _LOG_ELEMS(clean_xml_parse(response_str)), _SCALAR_LOG_TEXTS
         log_list = []
-        for child in root.findall('./Log'):
-            log_id = child.findtext('./LogID', default='')
-            log_name = child.findtext('./logName', default='')
-            is_public = child.findtext('./ispublic', default='')
-            if ENFORCE_IS_PUBLIC and is_public and is_public.upper() == 'FALSE':
-                continue
-            log_type = child.findtext('./logType', default='')
-            algorithm_id = child.findtext('./algorithmoutID', default='')
-            mask_log_id = child.findtext('maskLogId', default='')
-            # Only types 1,2,5,6 can be used
-            if log_id and log_name and log_type in ['1', '2', '5', '6'] and algorithm_id:
-                log = SimpleNamespace(log_id=log_id,
-                                      log_name=log_name,
-                                      is_public=is_public,
-                                      log_type=log_type,
-                                      algorithm_id=algorithm_id,
-                                      mask_log_id=mask_log_id)
+        for child in log_elems:
+            log = NVCLReader._parse_scalar_log(child, log_texts, records)
+            if log is not None:
                 log_list.append(log)
         return log_list
 
+    def iter_scalar_logs(self, dataset_id):
+        ''' Streaming version of 'get_scalar_logs()', yields log objects as they are parsed.
+            Raises a ValueError if the response is cut short
+
+        :param dataset_id: dataset_id, taken from 'get_datasetid_list()' or 'get_dataset_list()'
+        :returns: a generator of SimpleNamespace() objects, see 'get_scalar_logs()'
+        '''
+        yield from self._iter_scalar_logs(self._get_collection_response(self.svc.get_log_collection, dataset_id), self.records)
+
+    @staticmethod
+    def _iter_scalar_logs(response_str, records=NAMESPACE_TYPES):
+        ''' Parses scalar log objects from a 'getLogCollection' response incrementally. JSON responses are decoded whole.
+            A ValueError is raised if an XML response is cut short
+
+        :param response_str: response from 'get_log_collection()'
+        :param records: (optional) record types, 'records.NAMESPACE_TYPES' (default) or 'records.COMPACT_TYPES'
+        :returns: a generator of SimpleNamespace() objects, see 'get_scalar_logs()'
+        '''
+        if not response_str:
+            return
+        if is_json(response_str):
+            yield from NVCLReader._parse_scalar_logs(response_str, records)
+            return
+        for child in iterparse_elements(response_str, ('Log',)):
+            log = NVCLReader._parse_scalar_log(child, records=records)
+            if log is not None:
+                yield log
+
+    @staticmethod
+    def _parse_scalar_log(child, log_texts=_SCALAR_LOG_TEXTS, records=NAMESPACE_TYPES):
+        ''' Parses a scalar log object from a '<Log>' element of a 'getLogCollection' response
+
+        :param child: '<Log>' XML element or JSON log dict
+        :param log_texts: extractor of the log's texts, '_SCALAR_LOG_TEXTS' or '_JSON_SCALAR_LOG_TEXTS'
+        :param records: record types, 'records.NAMESPACE_TYPES' or 'records.COMPACT_TYPES'
+        :returns: a SimpleNamespace() object, see 'get_scalar_logs()', or None if it cannot be used for scalar plots
+        '''
+        log_id, log_name, is_public, log_type, algorithm_id, mask_log_id = log_texts(child)
+        if ENFORCE_IS_PUBLIC and is_public and is_public.upper() == 'FALSE':
+            return None
+        # Only types 1,2,5,6 can be used
+        if log_id and log_name and log_type in ['1', '2', '5', '6'] and algorithm_id:
+            return records.log(log_id=log_id,
+                               log_name=log_name,
+                               is_public=is_public,
+                               log_type=log_type,
+                               algorithm_id=algorithm_id,
+                               mask_log_id=mask_log_id)
+        return None
+
     def get_scalar_data(self, log_id_list):
         ''' Downloads scalar data in CSV format
 
@@ -578,18 +1089,24 @@ class NVCLReader:
 
         :returns: a dict of { 'algorithmOutputId1': 'version1', 'algorithmOutputId2': 'version2', ... }
         '''
-        alg_str = self.svc.get_algorithms()
-        try:
-            xml_tree = ET.fromstring(alg_str)
-            algver_dict = {}
-            for alg in xml_tree.findall('algorithms/outputs/versions'):
-                alg_id = alg.find('algorithmoutputID')
-                ver = alg.find('version')
-                if alg_id is not None and ver is not None:
-                    algver_dict[alg_id.text] = ver.text
-        except ET.ParseError as pe_exc:
-            LOGGER.debug(f"get_algorithms() failed to parse response: {pe_exc}")
+        return self._parse_algorithms(self.svc.get_algorithms())
+
+    @staticmethod
+    def _parse_algorithms(alg_str):
+        ''' Parses algorithm output ids and their versions from a 'getAlgorithms' response
+
+        :param alg_str: response from 'get_algorithms()'
+        :returns: a dict of { 'algorithmOutputId1': 'version1', 'algorithmOutputId2': 'version2', ... }
+        '''
+        xml_tree = clean_xml_parse(alg_str)
+        if xml_tree.tag == '':
+            LOGGER.debug("get_algorithms() failed to parse response")
             return {}
+        algver_dict = {}
+        for alg in _ALG_VERSION_ELEMS(xml_tree):
+            alg_id, ver = _ALG_VERSION_CHILDREN(alg)
+            if alg_id is not None and ver is not None:
+                algver_dict[alg_id.text] = ver.text
         return algver_dict
 
     def get_logs_data(self, nvcl_id):
@@ -602,30 +1119,26 @@ class NVCLReader:
                   log_id, log_name, is_public, log_type, algorithm_id, mask_log_id,
                      created_date, modified_date (optional datetime objects not supported by all services)
                   NB: 'mask_log_id' is not supported by all services and may be an empty string'''
-        response_str = self.svc.get_dataset_collection(nvcl_id)
-        if not response_str:
-            return []
-        root = clean_xml_parse(response_str)
-        log_list = []
-        for ds_child in root.findall('./Dataset'):
-            # Get the dates from the 'Dataset' elements
-            date_dict = parse_dates(ds_child)
-            # Get the log data from the 'Logs' elements
-            for log_child in ds_child.findall('./Logs/Log'):
-                log_id = log_child.findtext('LogID', default='')
-                log_name = log_child.findtext('logName', default='')
-                is_public = log_child.findtext('ispublic', default='')
-                log_type = log_child.findtext('logType', default='')
-                algorithm_id = log_child.findtext('algorithmoutID', default='')
-                mask_log_id = log_child.findtext('maskLogId', default='')
-                if log_name != '' and log_id != '':
-                    log_obj = SimpleNamespace(log_id=log_id, log_name=log_name, is_public=is_public, log_type=log_type,
-                                              algorithm_id=algorithm_id, mask_log_id=mask_log_id)
-                    # Set dates, if they were found
-                    for key, val in date_dict.items():
-                        setattr(log_obj, key, val)
-                    log_list.append(log_obj)
-        return log_list
+        return self._get_dataset_collection(nvcl_id).logs()
+
+    def iter_logs_data(self, nvcl_id):
+        ''' Streaming version of 'get_logs_data()', yields log objects one dataset at a time as they are parsed.
+            Raises a ValueError if the response is cut short
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter,
+                        the 'nvcl_id' from each item retrieved from 'get_feature_list()' or 'get_nvcl_id_list()'
+        :returns: a generator of SimpleNamespace objects, see 'get_logs_data()'
+        '''
+        yield from self._iter_dataset_collection(nvcl_id, 'logs')
+
+    def get_logs_data_many(self, nvcl_id_list, max_workers=None):
+        ''' Retrieves generic log data for a list of boreholes concurrently, see 'get_logs_data()'
+
+        :param nvcl_id_list: list of NVCL 'holeidentifier' parameters e.g. from 'get_nvcl_id_list()'
+        :param max_workers: optional number of worker threads, default is 'MAX_WORKERS' parameter
+        :returns: OrderedDict: key - nvcl id, value - result of 'get_logs_data()', in the same order as 'nvcl_id_list'
+        '''
+        return self._call_many(self.get_logs_data, nvcl_id_list, max_workers)
 
     def get_imagelog_data(self, nvcl_id):
         ''' Retrieves a set of image log data for a particular borehole
@@ -636,23 +1149,17 @@ class NVCLReader:
         :returns: a list of SimpleNamespace() objects with attributes:
                   log_id, log_name, sample_count, modified_date (optional)
         '''
-        response_str = self.svc.get_dataset_collection(nvcl_id)
-        if not response_str:
-            return []
-        root = clean_xml_parse(response_str)
-        log_list = []
-        for ds_child in root.findall('./Dataset'):
-            date_dict = parse_dates(ds_child)
-            for log_child in ds_child.findall('./ImageLogs/Log'):
-                log_name = log_child.findtext('LogName', default='')
-                log_id = log_child.findtext('LogID', default='')
-                sample_count = log_child.findtext('SampleCount', default='')
-                if log_name != '' and log_id != '':
-                    log_obj = SimpleNamespace(log_id=log_id, log_name=log_name, sample_count=sample_count)
-                    for key, val in date_dict.items():
-                        setattr(log_obj, key, val)
-                    log_list.append(log_obj)
-        return log_list
+        return self._get_dataset_collection(nvcl_id).image_logs()
+
+    def iter_imagelog_data(self, nvcl_id):
+        ''' Streaming version of 'get_imagelog_data()', yields image log objects one dataset at a time as they are parsed.
+            Raises a ValueError if the response is cut short
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter,
+                        the 'nvcl_id' from each item retrieved from 'get_feature_list()' or 'get_nvcl_id_list()'
+        :returns: a generator of SimpleNamespace objects, see 'get_imagelog_data()'
+        '''
+        yield from self._iter_dataset_collection(nvcl_id, 'image_logs')
 
     def get_spectrallog_data(self, nvcl_id):
         ''' Retrieves a set of spectral log data for a particular borehole
@@ -664,36 +1171,26 @@ class NVCLReader:
                   log_id, log_name, wavelength_units, sample_count, script,
                   wavelengths
         '''
-        response_str = self.svc.get_dataset_collection(nvcl_id)
-        if not response_str:
-            return []
-        root = clean_xml_parse(response_str)
-        logid_list = []
-        for child in root.findall('./*/SpectralLogs/SpectralLog'):
-            log_id = child.findtext('./logID', default='')
-            log_name = child.findtext('./logName', default='')
-            wavelength_units = child.findtext('./wavelengthUnits', default='')
-            try:
-                sample_count = int(child.findtext('./sampleCount', default=0))
-            except ValueError:
-                sample_count = 0
-            script_raw = child.findtext('./script', default='')
-            script_str = script_raw.replace('; ', ';')
-            script_str_list = script_str.split(';')
-            script_dict = {}
-            for assgn in script_str_list:
-                var, eq, val = assgn.partition('=')
-                if var and eq == '=':
-                    script_dict[var] = val
-            wavelengths = child.findtext('./wavelengths', default='')
-            try:
-                wv_list = [float(wv_str) for wv_str in wavelengths.split(',')]
-            except ValueError:
-                wv_list = []
-            logid_list.append(SimpleNamespace(log_id=log_id, log_name=log_name, wavelength_units=wavelength_units,
-                                              sample_count=sample_count, script_raw=script_raw, script=script_dict,
-                                              wavelengths=wv_list))
-        return logid_list
+        return self._get_dataset_collection(nvcl_id).spectral_logs()
+
+    def iter_spectrallog_data(self, nvcl_id):
+        ''' Streaming version of 'get_spectrallog_data()', yields spectral log objects as they are parsed.
+            Raises a ValueError if the response is cut short
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter,
+                        the 'nvcl_id' from each item retrieved from 'get_feature_list()' or 'get_nvcl_id_list()'
+        :returns: a generator of SimpleNamespace objects, see 'get_spectrallog_data()'
+        '''
+        yield from self._iter_dataset_collection(nvcl_id, 'spectral_logs')
+
+    def get_spectrallog_data_many(self, nvcl_id_list, max_workers=None):
+        ''' Retrieves spectral log data for a list of boreholes concurrently, see 'get_spectrallog_data()'
+
+        :param nvcl_id_list: list of NVCL 'holeidentifier' parameters e.g. from 'get_nvcl_id_list()'
+        :param max_workers: optional number of worker threads, default is 'MAX_WORKERS' parameter
+        :returns: OrderedDict: key - nvcl id, value - result of 'get_spectrallog_data()', in the same order as 'nvcl_id_list'
+        '''
+        return self._call_many(self.get_spectrallog_data, nvcl_id_list, max_workers)
 
     def get_spectrallog_datasets(self, log_id, **options):
         ''' Retrieves spectral log datasets as a binary string
@@ -704,12 +1201,21 @@ class NVCLReader:
 
         :returns: a binary text string
         '''
-        in_opts = {}
+        return self.svc.get_spectral_data(log_id, **self._sample_no_opts(options))
+
+    @staticmethod
+    def _sample_no_opts(options, **in_opts):
+        ''' Converts 'start_sample_no' & 'end_sample_no' options to NVCL service parameters
+
+        :param options: dict of options, may contain 'start_sample_no' and 'end_sample_no'
+        :param in_opts: initial NVCL service parameters
+        :returns: dict of NVCL service parameters
+        '''
         if 'start_sample_no' in options:
             in_opts.update({'startsampleno': options['start_sample_no']})
         if 'end_sample_no' in options:
             in_opts.update({'endsampleno': options['end_sample_no']})
-        return self.svc.get_spectral_data(log_id, **in_opts)
+        return in_opts
 
     def get_profilometer_data(self, nvcl_id):
         ''' Retrieves a set of profilometer logs for a particular borehole
@@ -721,33 +1227,17 @@ class NVCLReader:
                   log_id, log_name, sample_count, floats_per_sample,
                   min_val, max_val
         '''
-        response_str = self.svc.get_dataset_collection(nvcl_id)
-        if not response_str:
-            return []
-        root = clean_xml_parse(response_str)
-        logid_list = []
-        for child in root.findall('./*/ProfilometerLogs/ProfLog'):
-            log_id = child.findtext('./logID', default='')
-            log_name = child.findtext('./logName', default='')
-            try:
-                sample_count = int(child.findtext('./sampleCount', default=0))
-            except ValueError:
-                sample_count = 0.0
-            try:
-                floats_per_sample = float(child.findtext('./floatsPerSample', default=0.0))
-            except ValueError:
-                floats_per_sample = 0.0
-            try:
-                min_val = float(child.findtext('./minVal', default=0.0))
-            except ValueError:
-                min_val = 0.0
-            try:
-                max_val = float(child.findtext('./maxVal', default=0.0))
-            except ValueError:
-                max_val = 0.0
-            logid_list.append(SimpleNamespace(log_id=log_id, log_name=log_name, sample_count=sample_count,
-                              floats_per_sample=floats_per_sample, min_val=min_val, max_val=max_val))
-        return logid_list
+        return self._get_dataset_collection(nvcl_id).profilometer_logs()
+
+    def iter_profilometer_data(self, nvcl_id):
+        ''' Streaming version of 'get_profilometer_data()', yields profilometer log objects as they are parsed.
+            Raises a ValueError if the response is cut short
+
+        :param nvcl_id: NVCL 'holeidentifier' parameter,
+                        the 'nvcl_id' from each item retrieved from 'get_feature_list()' or 'get_nvcl_id_list()'
+        :returns: a generator of SimpleNamespace objects, see 'get_profilometer_data()'
+        '''
+        yield from self._iter_dataset_collection(nvcl_id, 'profilometer_logs')
 
     def get_profilometer_datasets(self, proflog_id, **options):
         ''' Gets profilometer datasets in JSON format
@@ -759,18 +1249,72 @@ class NVCLReader:
         :returns: raw profilometer data as a list of 'SimpleNamespace' objects; keys are:  "sampleNo" & "floatprofdata"
                   returns an empty list upon error
         '''
-        in_opts = {'outputformat': 'json'}
-        if 'start_sample_no' in options:
-            in_opts.update({'startsampleno': options['start_sample_no']})
-        if 'end_sample_no' in options:
-            in_opts.update({'endsampleno': options['end_sample_no']})
-        prof_json = self.svc.get_prof_data(proflog_id, **in_opts)
+        prof_json = self.svc.get_prof_data(proflog_id, **self._sample_no_opts(options, outputformat='json'))
+        return self._parse_profilometer_datasets(prof_json)
+
+    @staticmethod
+    def _parse_profilometer_datasets(prof_json):
+        ''' Parses profilometer datasets from a JSON 'getprofdata' response
+
+        :param prof_json: JSON response from 'get_prof_data()'
+        :returns: a list of 'SimpleNamespace' objects; keys are:  "sampleNo" & "floatprofdata"
+        '''
         try:
             prof_obj = json.loads(prof_json)
         except json.decoder.JSONDecodeError:
             return []
         return [SimpleNamespace(**d) for d in prof_obj]
 
+    def get_cache_stats(self):
+        ''' Returns the in-memory response cache statistics
+
+        :returns: SimpleNamespace( 'hits'= number of hits, 'misses'= number of misses, 'entries'= number of responses,
+                                   'size'= total size of responses (bytes), 'max_bytes'= maximum size (bytes) )
+                  or None if the in-memory cache is disabled
+        '''
+        if self.svc.mem_cache is None:
+            return None
+        return self.svc.mem_cache.stats()
+
+    def get_cache_key_stats(self):
+        ''' Returns the hit ratio of the in-memory and persistent caches and the number of canonical cache key collisions.
+            Cache keys are canonical: parameters are sorted, numbers are normalised and default values are left out,
+            so e.g. 'startdepth=0' and 'startdepth=0.0' share a cache entry, which is counted as a collision
+
+        :returns: SimpleNamespace( 'lookups'= number of lookups, 'hits'= number of hits, 'hit_ratio'= hits / lookups,
+                                   'collisions'= number of requests which shared a canonical key with a differently written request )
+        '''
+        return self.svc.key_stats.stats()
+
+    def get_transfer_stats(self):
+        ''' Returns the number of responses and bytes received from the provider's NVCL and WFS services.
+            Responses are requested with gzip, deflate or brotli compression, so 'bytes_received' is usually much
+            smaller than 'bytes_decoded'. Counters are shared by all readers of the same provider, responses read
+            from the cache are not counted
+
+        :returns: SimpleNamespace( 'requests'= number of responses, 'bytes_received'= bytes received over the network,
+                                   'bytes_decoded'= bytes after decompression )
+        '''
+        return self.svc.stats.snapshot()
+
+    def prune_cache(self):
+        ''' Removes expired responses from the persistent cache (CACHE_PATH), then evicts responses until
+            it is no larger than CACHE_MAX_SIZE
+
+        :returns: number of responses removed
+        '''
+        if not hasattr(self.svc.cache, 'prune'):
+            return 0
+        return self.svc.cache.prune()
+
+    def vacuum_cache(self):
+        ''' Reclaims unused space in the persistent cache (CACHE_PATH). For the 'sqlite' backend the database file
+            is rebuilt, for the 'file' backend leftover temporary files, empty folders and files written by older versions
+            of nvcl_kit, which did not use sub-folders, are removed
+        '''
+        if hasattr(self.svc.cache, 'vacuum'):
+            self.svc.cache.vacuum()
+
     def get_boreholes_list(self):
         ''' Returns a list of SimpleNamespace objects, extracted from WFS requests of boreholes. Fields are mostly taken from GeoSciML v4.1 Borehole View:
 
@@ -782,6 +1326,8 @@ class NVCLReader:
                 (3) 'x', 'y', 'z' are x-coordinate, y-coordinate and elevation
                 (4) 'nvcl_id' is the GML 'id', used as an id in the NVCL services
                 (5) Use 'vars()' function to convert SimpleNamespace to a dict
+                (6) If the 'COMPACT_RECORDS' parameter is set then 'records.BoreholeRecord' objects are returned,
+                    use 'records.record_dict()' to convert them to dicts
 
             :returns: a list of SimpleNamespace whose fields correspond to a response from a WFS request of GeoSciML v4.1 BoreholeView
         '''
@@ -0,0 +1,283 @@
+"""
+This module contains compact record types, which 'NVCLReader' returns instead of SimpleNamespace objects when the
+'COMPACT_RECORDS' parameter is set. They have the same attributes as the SimpleNamespace objects, but their values are
+kept in slots instead of a per-instance '__dict__', so they are smaller.
+'==' and 'repr()' work as they do for SimpleNamespace objects, attributes which are not set are left out.
+Use the '_asdict()' method, or 'record_dict()' for either kind of record, instead of 'vars()'
+"""
+
+import sys
+import logging
+from types import SimpleNamespace
+
+LOG_LVL = logging.INFO
+''' Initialise debug level, set to 'logging.INFO' or 'logging.DEBUG'
+'''
+
+# Set up debugging
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(LOG_LVL)
+
+if not LOGGER.hasHandlers():
+
+    # Create logging console handler
+    HANDLER = logging.StreamHandler(sys.stdout)
+
+    # Create logging formatter
+    FORMATTER = logging.Formatter('%(name)s -- %(levelname)s - %(funcName)s: %(message)s')
+
+    # Add formatter to ch
+    HANDLER.setFormatter(FORMATTER)
+
+    # Add handler to LOGGER and set level
+    LOGGER.addHandler(HANDLER)
+
+_MISSING = object()
+
+# (record type, attribute names) pairs which could not be made into compact records, each is only logged once
+_MISMATCHES = set()
+
+
+class Record:
+    ''' Base class of the compact record types. Only the attributes named in '__slots__' can be set.
+        Each subclass has its own '__init__()' which sets its slots directly, so that it is as quick as possible.
+        Attributes are keyword parameters, optional attributes which are left out are not set
+
+        ::
+
+            log = LogRecord(log_id='blah-id', log_name='Mosaic', sample_count=1)
+            log._asdict() == {'log_id': 'blah-id', 'log_name': 'Mosaic', 'sample_count': 1}
+    '''
+    __slots__ = ()
+
+    def _asdict(self):
+        ''' Returns a new dict of the attributes which are set, in '__slots__' order
+
+        :returns: dict
+        '''
+        attrs = {}
+        for name in self.__slots__:
+            val = getattr(self, name, _MISSING)
+            if val is not _MISSING:
+                attrs[name] = val
+        return attrs
+
+    def __eq__(self, other):
+        if isinstance(other, type(self)):
+            return self._asdict() == other._asdict()
+        if isinstance(other, SimpleNamespace):
+            return self._asdict() == vars(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{key}={val!r}' for key, val in self._asdict().items())})"
+
+    def __getstate__(self):
+        return self._asdict()
+
+    def __setstate__(self, state):
+        for key, val in state.items():
+            setattr(self, key, val)
+
+
+class BoreholeRecord(Record):
+    ''' A borehole, see 'NVCLReader.get_boreholes_list()'
+    '''
+    __slots__ = ('nvcl_id', 'x', 'y', 'z', 'href', 'identifier', 'name', 'description', 'purpose', 'status',
+                 'drillingMethod', 'operator', 'driller', 'drillStartDate', 'drillEndDate', 'startPoint',
+                 'inclinationType', 'boreholeMaterialCustodian', 'boreholeLength_m', 'elevation_m', 'elevation_srs',
+                 'positionalAccuracy', 'source', 'parentBorehole_uri', 'metadata_uri', 'genericSymbolizer',
+                 'tenement', 'project')
+
+    def __init__(self, *, nvcl_id, x, y, z, href, identifier, name, description, purpose, status, drillingMethod,
+                 operator, driller, drillStartDate, drillEndDate, startPoint, inclinationType, boreholeMaterialCustodian,
+                 boreholeLength_m, elevation_m, elevation_srs, positionalAccuracy, source, parentBorehole_uri,
+                 metadata_uri, genericSymbolizer, tenement, project):
+        self.nvcl_id = nvcl_id
+        self.x = x
+        self.y = y
+        self.z = z
+        self.href = href
+        self.identifier = identifier
+        self.name = name
+        self.description = description
+        self.purpose = purpose
+        self.status = status
+        self.drillingMethod = drillingMethod
+        self.operator = operator
+        self.driller = driller
+        self.drillStartDate = drillStartDate
+        self.drillEndDate = drillEndDate
+        self.startPoint = startPoint
+        self.inclinationType = inclinationType
+        self.boreholeMaterialCustodian = boreholeMaterialCustodian
+        self.boreholeLength_m = boreholeLength_m
+        self.elevation_m = elevation_m
+        self.elevation_srs = elevation_srs
+        self.positionalAccuracy = positionalAccuracy
+        self.source = source
+        self.parentBorehole_uri = parentBorehole_uri
+        self.metadata_uri = metadata_uri
+        self.genericSymbolizer = genericSymbolizer
+        self.tenement = tenement
+        self.project = project
+
+
+class LogRecord(Record):
+    ''' A generic, scalar, image or mosaic log, see 'NVCLReader.get_logs_data()', 'NVCLReader.get_scalar_logs()',
+        'NVCLReader.get_imagelog_data()' and 'NVCLReader.get_mosaic_imglogs()'. Each kind of log sets some of the attributes
+    '''
+    __slots__ = ('log_id', 'log_name', 'is_public', 'log_type', 'algorithm_id', 'mask_log_id', 'sample_count',
+                 'created_date', 'modified_date')
+
+    def __init__(self, *, log_id, log_name, is_public=_MISSING, log_type=_MISSING, algorithm_id=_MISSING,
+                 mask_log_id=_MISSING, sample_count=_MISSING, created_date=_MISSING, modified_date=_MISSING):
+        self.log_id = log_id
+        self.log_name = log_name
+        if is_public is not _MISSING:
+            self.is_public = is_public
+        if log_type is not _MISSING:
+            self.log_type = log_type
+        if algorithm_id is not _MISSING:
+            self.algorithm_id = algorithm_id
+        if mask_log_id is not _MISSING:
+            self.mask_log_id = mask_log_id
+        if sample_count is not _MISSING:
+            self.sample_count = sample_count
+        if created_date is not _MISSING:
+            self.created_date = created_date
+        if modified_date is not _MISSING:
+            self.modified_date = modified_date
+
+
+class SpectralLogRecord(Record):
+    ''' A spectral log, see 'NVCLReader.get_spectrallog_data()'
+    '''
+    __slots__ = ('log_id', 'log_name', 'wavelength_units', 'sample_count', 'script_raw', 'script', 'wavelengths')
+
+    def __init__(self, *, log_id, log_name, wavelength_units, sample_count, script_raw, script, wavelengths):
+        self.log_id = log_id
+        self.log_name = log_name
+        self.wavelength_units = wavelength_units
+        self.sample_count = sample_count
+        self.script_raw = script_raw
+        self.script = script
+        self.wavelengths = wavelengths
+
+
+class ProfilometerLogRecord(Record):
+    ''' A profilometer log, see 'NVCLReader.get_profilometer_data()'
+    '''
+    __slots__ = ('log_id', 'log_name', 'sample_count', 'floats_per_sample', 'min_val', 'max_val')
+
+    def __init__(self, *, log_id, log_name, sample_count, floats_per_sample, min_val, max_val):
+        self.log_id = log_id
+        self.log_name = log_name
+        self.sample_count = sample_count
+        self.floats_per_sample = floats_per_sample
+        self.min_val = min_val
+        self.max_val = max_val
+
+
+class TrayDepth(Record):
+    ''' The depth range of a tray image, see 'NVCLReader.get_tray_depths()'
+    '''
+    __slots__ = ('sample_no', 'start_value', 'end_value')
+
+    def __init__(self, *, sample_no, start_value, end_value):
+        self.sample_no = sample_no
+        self.start_value = start_value
+        self.end_value = end_value
+
+
+class MineralPoint(Record):
+    ''' A mineral class at a depth, see 'NVCLReader.get_borehole_data()'
+    '''
+    __slots__ = ('className', 'classText', 'classCount', 'colour')
+
+    def __init__(self, *, className, classText, classCount, colour):
+        self.className = className
+        self.classText = classText
+        self.classCount = classCount
+        self.colour = colour
+
+
+NAMESPACE_TYPES = SimpleNamespace(borehole=SimpleNamespace, log=SimpleNamespace, spectral_log=SimpleNamespace,
+                                  profilometer_log=SimpleNamespace, tray_depth=SimpleNamespace,
+                                  mineral_point=SimpleNamespace)
+''' Record types used by default
+'''
+
+COMPACT_TYPES = SimpleNamespace(borehole=BoreholeRecord, log=LogRecord, spectral_log=SpectralLogRecord,
+                                profilometer_log=ProfilometerLogRecord, tray_depth=TrayDepth,
+                                mineral_point=MineralPoint)
+''' Record types used when the 'COMPACT_RECORDS' parameter is set
+'''
+
+
+def get_record_types(compact):
+    ''' Returns the record types used by a reader
+
+    :param compact: if True then the compact record types are returned
+    :returns: 'COMPACT_TYPES' or 'NAMESPACE_TYPES'
+    '''
+    return COMPACT_TYPES if compact else NAMESPACE_TYPES
+
+
+def record_dict(record):
+    ''' Returns a dict of a record's attributes, for compact records and SimpleNamespace objects
+
+    :param record: SimpleNamespace or 'Record' object
+    :returns: new dict of attribute values
+    '''
+    if isinstance(record, Record):
+        return record._asdict()
+    return dict(vars(record))
+
+
+def make_record(record_type, attrs):
+    ''' Makes a record from a dict of attributes. If a compact record type does not have one of the attributes,
+        e.g. a service returned an unexpected JSON key, or is missing a compulsory attribute, then a warning naming
+        the attributes is logged, once for each record type and set of attributes, and a SimpleNamespace object is made instead
+
+    :param record_type: SimpleNamespace or a 'Record' subclass
+    :param attrs: dict of attribute values
+    :returns: record object
+    '''
+    try:
+        return record_type(**attrs)
+    except TypeError:
+        if record_type is SimpleNamespace:
+            raise
+    mismatch = (record_type, tuple(attrs))
+    if mismatch not in _MISMATCHES:
+        _MISMATCHES.add(mismatch)
+        unexpected = [name for name in attrs if name not in record_type.__slots__]
+        missing = [name for name in record_type.__slots__ if name not in attrs and not _is_optional(record_type, name)]
+        LOGGER.warning(f"Cannot make a '{record_type.__name__}' record, unexpected attributes {unexpected}, "
+                       f"missing attributes {missing}, making a SimpleNamespace object instead")
+    return SimpleNamespace(**attrs)
+
+
+def _is_optional(record_type, name):
+    ''' Returns True if a record type's attribute may be left out
+
+    :param record_type: 'Record' subclass
+    :param name: attribute name
+    :returns: boolean
+    '''
+    defaults = record_type.__init__.__kwdefaults__ or {}
+    return name in defaults
+
+
+def copy_record(record):
+    ''' Copies a record, so that a caller which changes the copy does not change memoised records.
+        List and dict attribute values e.g. spectral log wavelengths are copied too
+
+    :param record: SimpleNamespace or 'Record' object
+    :returns: record object of the same type
+    '''
+    attrs = {key: val.copy() if isinstance(val, (list, dict)) else val for key, val in record_dict(record).items()}
+    return make_record(type(record), attrs)
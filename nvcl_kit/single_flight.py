@@ -0,0 +1,99 @@
+"""
+This module contains a coalescer of concurrent identical calls, so that they share one result
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+
+class SingleFlight:
+    ''' Coalesces concurrent calls with the same key, in threads or in coroutines.
+        The first caller runs the function, callers which arrive while it is running wait for it
+        and are given the same result or exception:
+
+        ::
+
+            flights = SingleFlight()
+            response = flights.do(key, fetch, url)
+            response = await flights.do_async(key, fetch_async, url)
+    '''
+
+    def __init__(self):
+        # Calls in flight, keyed on key for threads and on (event loop, key) for coroutines
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, func, *args):
+        ''' Calls a function, or waits for a call with the same key which is already running in another thread
+
+        :param key: call key, hashable
+        :param func: function to call
+        :param args: function arguments
+        :returns: the function's return value
+        '''
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = SimpleNamespace(done=threading.Event(), result=None, exc=None)
+                self._calls[key] = call
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.exc is not None:
+                raise call.exc
+            return call.result
+        try:
+            call.result = func(*args)
+        except BaseException as exc:
+            call.exc = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key, func, *args):
+        ''' Awaits a coroutine function, or waits for a call with the same key which is already running
+            in the same event loop. Cancelling a caller does not cancel the shared call
+
+        :param key: call key, hashable
+        :param func: coroutine function to call
+        :param args: function arguments
+        :returns: the function's return value
+        '''
+        task_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            self.calls += 1
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = asyncio.ensure_future(func(*args))
+                self._tasks[task_key] = task
+                task.add_done_callback(lambda _: self._task_done(task_key))
+            else:
+                self.shared += 1
+        return await asyncio.shield(task)
+
+    def _task_done(self, task_key):
+        ''' Removes a finished call
+
+        :param task_key: (event loop, key) tuple
+        '''
+        with self._lock:
+            self._tasks.pop(task_key, None)
+
+    def stats(self):
+        ''' Returns the call counters
+
+        :returns: SimpleNamespace( 'calls'= number of calls, 'shared'= number of calls given the result of
+                                   another call in flight )
+        '''
+        with self._lock:
+            return SimpleNamespace(calls=self.calls, shared=self.shared)
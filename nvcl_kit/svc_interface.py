@@ -2,16 +2,30 @@
 This forms the interface between the 'reader' class and the low-level web APIs.
 
 """
-import hashlib
-import os
 import time
 import urllib
 import urllib.parse
-import urllib.request
 from http.client import HTTPException
 from socket import timeout
 import sys
 import logging
+import threading
+import asyncio
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from nvcl_kit.cache import make_cache, get_ttl, canonical_key, is_cacheable, KeyStats, MemoryCache, MEM_CACHE_SIZE
+from nvcl_kit.transfer_stats import ACCEPT_ENCODING
+from nvcl_kit.single_flight import SingleFlight
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 
 LOG_LVL = logging.INFO
 ''' Initialise debug level, set to 'logging.INFO' or 'logging.DEBUG'
@@ -35,6 +49,62 @@ if not LOGGER.hasHandlers():
     # Add handler to LOGGER and set level
     LOGGER.addHandler(HANDLER)
 
+POOL_CONNECTIONS = 10
+''' Default number of per-host connection pools kept by each provider's session
+'''
+
+POOL_MAXSIZE = 10
+''' Default maximum number of keep-alive connections kept open in each connection pool
+'''
+
+REFRESH_WORKERS = 2
+''' Number of background threads refreshing stale cache entries, see 'cache_stale_window'
+'''
+
+
+class _NoLimit:
+    ''' Async context manager used when there is no 'RateLimiter', it does nothing.
+        NB: 'contextlib.nullcontext' cannot be used with 'async with' before Python 3.10
+    '''
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NO_LIMIT = _NoLimit()
+
+# Shared sessions, keyed on (host, pool_connections, pool_maxsize)
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def get_session(nvcl_url, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    ''' Returns a 'requests.Session' shared by all service interfaces connecting to the same NVCL provider.
+        Its connections are kept alive and reused between requests, so only the first request to a provider
+        pays for the TCP and TLS handshakes.
+
+    :param nvcl_url: URL of the NVCL service
+    :param pool_connections: number of per-host connection pools to keep
+    :param pool_maxsize: maximum number of keep-alive connections in each connection pool
+    :returns: requests.Session object
+    '''
+    key = (urllib.parse.urlsplit(nvcl_url).netloc, pool_connections, pool_maxsize)
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            session = requests.Session()
+            # Responses are decompressed transparently
+            session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+            # Retries are managed by '_ServiceInterface._get_response_str()'
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _SESSIONS[key] = session
+    return session
+
 
 class _ServiceInterface:
     ''' Call the web APIs for NVCL services
@@ -42,15 +112,48 @@ class _ServiceInterface:
         NB: 'ServiceInterface' should only be called from within the 'reader' class.
     '''
 
-    def __init__(self, nvcl_url, timeout, cache_path = None):
+    def __init__(self, nvcl_url, timeout, cache_path = None, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 limiter=None, cache_backend='file', mem_cache_size=MEM_CACHE_SIZE, cache_ttl=None, cache_max_size=None,
+                 cache_policy='lru', cache_compression='auto', stats=None, cache_stale_window=0,
+                 cache_negative_ttl=0):
         '''
         :param nvcl_url: URL of the NVCL service
         :param timeout: initial timeout value for connection to NVCL service, doubles at each attempt, 5 attempts in total (seconds)
-        :param cache_path: optional folder path for cache files
+        :param cache_path: optional folder path for cache files, or SQLite database file path
+        :param pool_connections: optional number of per-host connection pools kept by the provider's session
+        :param pool_maxsize: optional maximum number of keep-alive connections in each connection pool
+        :param limiter: optional 'RateLimiter' object, limits the provider's requests in flight and request rate
+        :param cache_backend: optional cache type, 'file' (default) or 'sqlite', or a cache object (see 'nvcl_kit.cache.make_cache()')
+        :param mem_cache_size: optional size of the in-memory response cache (bytes), default is 0 (disabled)
+        :param cache_ttl: optional time to live of cached responses, a number of seconds or a dict of seconds keyed on
+                          service endpoint name (see 'nvcl_kit.cache.get_ttl()'), default is never expire
+        :param cache_max_size: optional maximum total size of the persistent cache (bytes), default is no limit
+        :param cache_policy: optional eviction policy used when 'cache_max_size' is exceeded, 'lru' (default) or 'lfu'
+        :param cache_compression: optional compression of persistent cache entries, 'auto' (default), 'gzip', 'zstd' or None
+        :param stats: optional 'TransferStats' object, counts the responses and bytes received
+        :param cache_stale_window: optional stale-while-revalidate window (seconds). A response which expired less than
+                                   this long ago is returned at once and refreshed in the background, default is 0 (off)
+        :param cache_negative_ttl: optional time to live of failed and empty responses (seconds), these are cached so that
+                                   they are not requested again until this time has passed, default is 0 (off)
         '''
         self.NVCL_URL = nvcl_url
         self.CACHE_PATH = cache_path
         self.TIMEOUT = timeout
+        self.cache = make_cache(cache_path, cache_backend, cache_ttl, cache_max_size, cache_policy, cache_compression)
+        self.mem_cache = MemoryCache(mem_cache_size, cache_ttl) if mem_cache_size > 0 else None
+        self.session = get_session(nvcl_url, pool_connections, pool_maxsize)
+        self.limiter = limiter
+        self.stats = stats
+        self.cache_ttl = cache_ttl
+        self.stale_window = cache_stale_window
+        self.negative_ttl = cache_negative_ttl
+        # Background refreshes of stale entries, at most one per cache key at a time
+        self._refresh_executor = None
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        # Concurrent identical requests share one fetch
+        self.flights = SingleFlight()
+        self.key_stats = KeyStats()
 
     def get_algorithms(self):
         ''' Retrieves a list of algorithms and their output ids
@@ -229,13 +332,17 @@ class _ServiceInterface:
         url = self.NVCL_URL + '/checkwfsstatus.html'
         return self._get_response_str(url, {'email': email})
 
-    def get_log_collection(self, dataset_id, use_mosaic=False):
+    def get_log_collection(self, dataset_id, use_mosaic=False, **options):
         ''' Retrieves log details for a particular borehole's dataset
 
         :param dataset_id: dataset id parameter,
                         the 'dataset_id' from each dict item retrieved from 'get_datasetid_list()' or 'get_dataset_data()'
         :param mosaic_svc: NVCL 'mosaic_svc' parameter, if true retrieves mosaic
                            data, else scalar; boolean
+        :param options: optional parameters:
+
+            * outputformat: change output format from xml, example value=json
+
         :returns: the response as a byte string or an empty string upon error
         '''
         url = self.NVCL_URL + '/getLogCollection.html'
@@ -243,6 +350,7 @@ class _ServiceInterface:
         if use_mosaic:
             mosaic_svc = 'yes'
         params = {'datasetid': dataset_id, 'mosaicsvc': mosaic_svc}
+        params.update(options)
         return self._get_response_str(url, params)
 
     def get_spectral_data(self, spec_log_id, **options):
@@ -291,55 +399,272 @@ class _ServiceInterface:
         return self._get_response_str(url, params)
 
     def _get_response_str(self, url, params=None):
-        ''' Performs a GET request with URL and parameters and returns the response as a string
+        ''' Performs a request with URL and parameters using the provider's pooled session
+            and returns the response as a string
 
         :param url: URL of request, string
         :param params: parameters, in dictionary form
         :return: response, string; returns an empty string upon error
         '''
-        enc_params = None
-        if params is not None:
-            enc_params = urllib.parse.urlencode(params).encode('ascii')
-        req = urllib.request.Request(url, data=enc_params)
+        enc_params = self._encode_params(params)
         LOGGER.debug(f"Sending: {url}, {enc_params}")
+        if not is_cacheable(url):
+            return self._content(self._fetch(url, enc_params))
+        cache_key, entry, hit = self._lookup(url, enc_params)
+        if hit:
+            return entry.value
+        return self.flights.do(cache_key, self._fetch_and_store, url, enc_params, cache_key, entry)
+
+    @staticmethod
+    def _content(result):
+        ''' Returns the response from the result of '_fetch()', for responses which are not cached
+
+        :param result: result of '_fetch()'
+        :returns: response as a byte string; an empty string upon error
+        '''
+        return result.content if result is not None else ""
+
+    def _fetch_and_store(self, url, enc_params, cache_key, entry):
+        ''' Sends a request to the NVCL service and caches the result
+
+        :param url: URL of request, string
+        :param enc_params: encoded parameters, see '_encode_params()'
+        :param cache_key: cache key, see '_cache_key()'
+        :param entry: expired cache entry or None
+        :returns: response as a byte string; an empty string upon error
+        '''
+        result = self._fetch(url, enc_params, entry.validators if entry is not None else None)
+        return self._store_result(cache_key, entry, result)
+
+    def _encode_params(self, params):
+        ''' Encodes request parameters for sending in the body of a request
+
+        :param params: parameters, in dictionary form or a list of tuples, may be None
+        :returns: encoded parameters as a byte string or None
+        '''
+        if params is None:
+            return None
+        return urllib.parse.urlencode(params).encode('ascii')
+
+    @staticmethod
+    def _conditional_headers(validators):
+        ''' Makes the headers of a conditional request
+
+        :param validators: dict of HTTP validators from a cache entry, may be None
+        :returns: dict of headers, empty if there are no validators
+        '''
+        headers = {}
+        if validators:
+            if 'etag' in validators:
+                headers['If-None-Match'] = validators['etag']
+            if 'last_modified' in validators:
+                headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
+    @staticmethod
+    def _get_validators(headers):
+        ''' Extracts the HTTP validators from response headers
+
+        :param headers: response headers
+        :returns: dict of validators e.g. {'etag': '"abc"', 'last_modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+        '''
+        validators = {}
+        for name, header in [('etag', 'ETag'), ('last_modified', 'Last-Modified')]:
+            value = headers.get(header)
+            if isinstance(value, str):
+                validators[name] = value
+        return validators
+
+    def _fetch(self, url, enc_params, validators=None):
+        ''' Sends a request to the NVCL service, retrying with a doubling timeout.
+            If there are validators from an expired cache entry then a conditional GET request is sent instead,
+            as servers only answer '304 Not Modified' to GET requests
+
+        :param url: URL of request, string
+        :param enc_params: encoded parameters, see '_encode_params()'
+        :param validators: optional dict of HTTP validators from an expired cache entry
+        :returns: SimpleNamespace( 'content'= response as a byte string, 'validators'= dict of HTTP validators,
+                                   'not_modified'= True if the cached response is still valid ) or None upon error
+        '''
+        headers = self._conditional_headers(validators)
         response_str = b''
-        fileCachePath = None
-        if (self.CACHE_PATH is not None):
-            fileCachePath = self.CACHE_PATH + urllib.parse.quote(f'{url}?{enc_params.decode("utf-8")}', '')+'.txt'
-            if len(fileCachePath) > 256:
-                param = hashlib.sha1(enc_params).hexdigest()
-                fileCachePath = self.CACHE_PATH + urllib.parse.quote(f'{url}?{param}', '')+'.txt'
-            if (os.path.exists(fileCachePath)):
-                with open(fileCachePath, 'rb') as cacheFile:
-                    response_str = cacheFile.read()
-                    LOGGER.debug(f'read cache:{fileCachePath}')
-                    return response_str
         for cc in range(5):
             try:
-                # TODO: Upgrade to requests & urllib3 timeout and error management
-                with urllib.request.urlopen(req, timeout=self.TIMEOUT*2**cc) as response:
-                    response_str = response.read()
-                    break
+                with self.limiter or nullcontext():
+                    if headers:
+                        response = self.session.get(url, params=enc_params, headers=headers, timeout=self.TIMEOUT*2**cc)
+                    else:
+                        # Parameters are sent in the body, as per the original 'urllib' POST requests
+                        response = self.session.post(url, data=enc_params, timeout=self.TIMEOUT*2**cc)
+                if headers and response.status_code == 304:
+                    LOGGER.debug(f"Not modified: {url}")
+                    if self.stats is not None:
+                        self.stats.add_response(response)
+                    return SimpleNamespace(content=None, validators=validators, not_modified=True)
+                if response.status_code != 200:
+                    LOGGER.warning(f"HTTP Error with {url}: {response.status_code} {response.reason}")
+                    return None
+                response_str = response.content
+                if self.stats is not None:
+                    self.stats.add_response(response)
+                break
             except HTTPException as he_exc:
                 LOGGER.warning(f"HTTP Error with {url}: {he_exc}")
-                return ""
+                return None
             except OSError as os_exc:
                 # Catch and retry timeouts
-                if isinstance(os_exc, timeout):
+                if isinstance(os_exc, (timeout, requests.Timeout)):
                     LOGGER.debug(f"Timeout with {url} retry: #{cc+1}")
                     if cc < 5:
                         time.sleep(1)
                         continue
                 LOGGER.warning(f"OS Error with {url}: {os_exc}")
-                return ""
+                return None
+        else:
+            # All attempts timed out
+            return SimpleNamespace(content=response_str, validators={}, not_modified=False)
         LOGGER.debug(f"Response[:100]: {response_str[:100]}")
+        return SimpleNamespace(content=response_str, validators=self._get_validators(response.headers), not_modified=False)
+
+    def _cache_key(self, url, enc_params):
+        ''' Makes the canonical cache key for a request, see 'cache.canonical_key()'
+
+        :param url: URL of request, string
+        :param enc_params: encoded parameters, see '_encode_params()'
+        :returns: cache key, string
+        '''
+        return canonical_key(url, enc_params)
 
-        if (self.CACHE_PATH is not None and not os.path.exists(fileCachePath)):
-            with open(fileCachePath, 'wb') as cacheFile:
-                cacheFile.write(response_str)
-                cacheFile.close()
-                LOGGER.debug(f'write cache:{fileCachePath}')
-        return response_str
+    def _lookup(self, url, enc_params):
+        ''' Looks up a request in the caches and counts the lookup
+
+        :param url: URL of request, string
+        :param enc_params: encoded parameters, see '_encode_params()'
+        :returns: (cache key, cache entry or None, True if the entry may be returned) tuple
+        '''
+        cache_key = self._cache_key(url, enc_params)
+        entry = self._read_cache(cache_key)
+        hit = entry is not None and (not entry.expired or self._serve_stale(url, enc_params, cache_key, entry))
+        self.key_stats.add(cache_key, f'{url}?{(enc_params or b"").decode("ascii")}', hit)
+        return cache_key, entry, hit
+
+    def _read_cache(self, cache_key):
+        ''' Reads a response from the in-memory cache, then from the persistent cache
+
+        :param cache_key: cache key, see '_cache_key()'
+        :returns: SimpleNamespace( 'value'= response as a byte string, 'stored_at'= time when stored, 'expired'= True if expired,
+                                   'validators'= dict of HTTP validators ) or None if not in cache
+        '''
+        mem_entry = None
+        if self.mem_cache is not None:
+            mem_entry = self.mem_cache.get_entry(cache_key)
+            if mem_entry is not None and not mem_entry.expired:
+                return mem_entry
+        if self.cache is None:
+            return mem_entry
+        if not hasattr(self.cache, 'get_entry'):
+            response_str = self.cache.get(cache_key)
+            if response_str is None:
+                return mem_entry
+            return SimpleNamespace(value=response_str, stored_at=time.time(), expired=False, validators={})
+        entry = self.cache.get_entry(cache_key)
+        if entry is None:
+            return mem_entry
+        # Keep the time stored, so the entry expires from memory at the same time
+        if not entry.expired and entry.value and self.mem_cache is not None:
+            self.mem_cache.put(cache_key, entry.value, entry.stored_at)
+        return entry
+
+    def _write_cache(self, cache_key, response_str, validators=None):
+        ''' Writes a response to the in-memory cache and the persistent cache.
+            Empty responses, i.e. failed requests or empty results, are only cached if negative caching is enabled.
+            They are marked as negative entries, so that they expire after 'cache_negative_ttl' seconds
+            even if a later reader uses different cache options
+
+        :param cache_key: cache key, see '_cache_key()'
+        :param response_str: response as a byte string
+        :param validators: optional dict of HTTP validators
+        '''
+        negative_ttl = None
+        if not response_str:
+            if self.negative_ttl <= 0:
+                return
+            negative_ttl = self.negative_ttl
+        if self.mem_cache is not None:
+            self.mem_cache.put(cache_key, response_str, negative_ttl=negative_ttl)
+        if self.cache is None:
+            return
+        if hasattr(self.cache, 'touch'):
+            self.cache.put(cache_key, response_str, validators, negative_ttl)
+        elif negative_ttl is None:
+            # Cache objects which only have 'get(key)' and 'put(key, value)' methods cannot mark negative entries
+            self.cache.put(cache_key, response_str)
+
+    def _serve_stale(self, url, enc_params, cache_key, entry):
+        ''' If an expired entry is within the stale-while-revalidate window then starts refreshing it in the background
+
+        :param url: URL of request, string
+        :param enc_params: encoded parameters, see '_encode_params()'
+        :param cache_key: cache key, see '_cache_key()'
+        :param entry: expired cache entry
+        :returns: True if the expired entry may be returned
+        '''
+        ttl = get_ttl(self.cache_ttl, cache_key)
+        if self.stale_window <= 0 or ttl is None or not entry.value \
+                or time.time() - entry.stored_at > ttl + self.stale_window:
+            return False
+        with self._refresh_lock:
+            if cache_key in self._refreshing:
+                return True
+            self._refreshing.add(cache_key)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS,
+                                                            thread_name_prefix='nvcl_kit-refresh')
+        LOGGER.debug(f"Serving stale response, refreshing: {cache_key}")
+        self._refresh_executor.submit(self._refresh, url, enc_params, cache_key, entry)
+        return True
+
+    def _refresh(self, url, enc_params, cache_key, entry):
+        ''' Refreshes a stale cache entry, runs in a background thread. If the request fails then the stale entry
+            is kept until it is outside the stale-while-revalidate window
+
+        :param url: URL of request, string
+        :param enc_params: encoded parameters, see '_encode_params()'
+        :param cache_key: cache key, see '_cache_key()'
+        :param entry: expired cache entry
+        '''
+        try:
+            result = self._fetch(url, enc_params, entry.validators)
+            if result is not None and (result.not_modified or result.content):
+                self._store_result(cache_key, entry, result)
+        except Exception as exc:
+            LOGGER.warning(f"Cannot refresh {cache_key}: {exc}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(cache_key)
+
+    def _store_result(self, cache_key, entry, result):
+        ''' Caches the result of '_fetch()'
+
+        :param cache_key: cache key, see '_cache_key()'
+        :param entry: expired cache entry or None
+        :param result: result of '_fetch()'
+        :returns: response as a byte string; an empty string upon error
+        '''
+        if result is None:
+            if self.negative_ttl > 0:
+                LOGGER.debug(f"Negative caching failed request: {cache_key}")
+                self._write_cache(cache_key, b'')
+            return ""
+        if result.not_modified:
+            # Refresh the entry without transferring the response again
+            if hasattr(self.cache, 'touch'):
+                self.cache.touch(cache_key)
+            if entry.value and self.mem_cache is not None:
+                self.mem_cache.put(cache_key, entry.value)
+            return entry.value
+        self._write_cache(cache_key, result.content, result.validators)
+        return result.content
 
     def _make_multi_logids(self, log_id_list, options={}):
         ''' Converts a list of log ids to a logids for a HTTP GET request
@@ -351,3 +676,147 @@ class _ServiceInterface:
         params = [('logid', log_id) for log_id in log_id_list]
         params += list(options.items())
         return params
+
+
+class _AsyncServiceInterface(_ServiceInterface):
+    ''' Asynchronous version of '_ServiceInterface', each NVCL service call returns an awaitable.
+
+        If 'aiohttp' is installed requests are sent using a pooled 'aiohttp' session, else they are
+        sent using the provider's 'requests' session in a worker thread.
+
+        NB: '_AsyncServiceInterface' should only be called from within the 'AsyncNVCLReader' class.
+    '''
+
+    def __init__(self, nvcl_url, timeout, pool_maxsize=POOL_MAXSIZE, **options):
+        '''
+        :param nvcl_url: URL of the NVCL service
+        :param timeout: initial timeout value for connection to NVCL service, doubles at each attempt, 5 attempts in total (seconds)
+        :param pool_maxsize: optional maximum number of keep-alive connections to the provider, also limits the number of
+                             'aiohttp' requests in flight
+        :param options: other optional parameters, as per '_ServiceInterface'
+        '''
+        super().__init__(nvcl_url, timeout, pool_maxsize=pool_maxsize, **options)
+        self.POOL_MAXSIZE = pool_maxsize
+        # 'aiohttp' sessions are bound to an event loop, so they are created on first use
+        self.aio_session = None
+
+    async def close(self):
+        ''' Closes the 'aiohttp' session, if one was opened
+        '''
+        if self.aio_session is not None:
+            await self.aio_session.close()
+            self.aio_session = None
+
+    async def get_plot_multi_scalar(self, log_id_list, **options):
+        ''' Same as '_ServiceInterface.get_plot_multi_scalar()'
+        '''
+        if not log_id_list:
+            return ""
+        return await super().get_plot_multi_scalar(log_id_list, **options)
+
+    async def _get_response_str(self, url, params=None):
+        ''' Performs a request with URL and parameters and returns the response as a string
+
+        :param url: URL of request, string
+        :param params: parameters, in dictionary form
+        :return: response, string; returns an empty string upon error
+        '''
+        enc_params = self._encode_params(params)
+        LOGGER.debug(f"Sending: {url}, {enc_params}")
+        if not is_cacheable(url):
+            return self._content(await self._fetch_async(url, enc_params))
+        if self.cache is None:
+            cache_key, entry, hit = self._lookup(url, enc_params)
+        else:
+            # Persistent cache lookups are file or SQLite I/O, so they are done in a worker thread
+            cache_key, entry, hit = await asyncio.to_thread(self._lookup, url, enc_params)
+        if hit:
+            return entry.value
+        return await self.flights.do_async(cache_key, self._fetch_and_store_async, url, enc_params, cache_key, entry)
+
+    async def _fetch_and_store_async(self, url, enc_params, cache_key, entry):
+        ''' Sends a request to the NVCL service and caches the result
+
+        :param url: URL of request, string
+        :param enc_params: encoded parameters, see '_encode_params()'
+        :param cache_key: cache key, see '_cache_key()'
+        :param entry: expired cache entry or None
+        :returns: response as a byte string; an empty string upon error
+        '''
+        result = await self._fetch_async(url, enc_params, entry.validators if entry is not None else None)
+        if self.cache is None:
+            return self._store_result(cache_key, entry, result)
+        # Persistent cache writes may also evict entries, see 'cache_max_size'
+        return await asyncio.to_thread(self._store_result, cache_key, entry, result)
+
+    async def _fetch_async(self, url, enc_params, validators=None):
+        ''' Sends a request to the NVCL service using 'aiohttp' if it is installed, else from a worker thread
+
+        :param url: URL of request, string
+        :param enc_params: encoded parameters, see '_encode_params()'
+        :param validators: optional dict of HTTP validators from an expired cache entry
+        :returns: same as '_ServiceInterface._fetch()'
+        '''
+        if aiohttp is not None:
+            return await self._fetch_aiohttp(url, enc_params, validators)
+        return await asyncio.to_thread(self._fetch, url, enc_params, validators)
+
+    async def _fetch_aiohttp(self, url, enc_params, validators=None):
+        ''' Sends a request to the NVCL service using 'aiohttp', retrying with a doubling timeout
+
+        :param url: URL of request, string
+        :param enc_params: encoded parameters, see '_encode_params()'
+        :param validators: optional dict of HTTP validators from an expired cache entry
+        :returns: same as '_ServiceInterface._fetch()'
+        '''
+        if self.aio_session is None or self.aio_session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.POOL_MAXSIZE)
+            self.aio_session = aiohttp.ClientSession(connector=connector)
+        cond_headers = self._conditional_headers(validators)
+        if cond_headers:
+            # Conditional GET request, parameters are sent in the URL
+            method = 'GET'
+            req_url = f"{url}?{enc_params.decode('ascii')}" if enc_params else url
+            headers = {'Accept-Encoding': ACCEPT_ENCODING, **cond_headers}
+            data = None
+        else:
+            method = 'POST'
+            req_url = url
+            headers = {'Content-Type': 'application/x-www-form-urlencoded', 'Accept-Encoding': ACCEPT_ENCODING}
+            data = enc_params
+        response_str = b''
+        for cc in range(5):
+            try:
+                async with self.limiter or _NO_LIMIT:
+                    async with self.aio_session.request(method, req_url, data=data, headers=headers,
+                                                        timeout=aiohttp.ClientTimeout(total=self.TIMEOUT*2**cc)) as response:
+                        if cond_headers and response.status == 304:
+                            LOGGER.debug(f"Not modified: {url}")
+                            if self.stats is not None:
+                                self.stats.add(0, 0)
+                            return SimpleNamespace(content=None, validators=validators, not_modified=True)
+                        if response.status != 200:
+                            LOGGER.warning(f"HTTP Error with {url}: {response.status} {response.reason}")
+                            return None
+                        response_str = await response.read()
+                        if self.stats is not None:
+                            # 'aiohttp' decompresses transparently, 'Content-Length' is the compressed size
+                            content_length = response.headers.get('Content-Length', '')
+                            bytes_received = int(content_length) if content_length.isdigit() else len(response_str)
+                            self.stats.add(bytes_received, len(response_str))
+                        resp_validators = self._get_validators(response.headers)
+                        break
+            except asyncio.TimeoutError:
+                LOGGER.debug(f"Timeout with {url} retry: #{cc+1}")
+                await asyncio.sleep(1)
+            except aiohttp.ClientResponseError as cr_exc:
+                LOGGER.warning(f"HTTP Error with {url}: {cr_exc}")
+                return None
+            except (aiohttp.ClientError, OSError) as os_exc:
+                LOGGER.warning(f"OS Error with {url}: {os_exc}")
+                return None
+        else:
+            # All attempts timed out
+            return SimpleNamespace(content=response_str, validators={}, not_modified=False)
+        LOGGER.debug(f"Response[:100]: {response_str[:100]}")
+        return SimpleNamespace(content=response_str, validators=resp_validators, not_modified=False)
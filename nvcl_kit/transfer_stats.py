@@ -0,0 +1,90 @@
+"""
+This module contains the HTTP compression settings and per-provider counters of the bytes transferred
+by the NVCL and WFS requests
+"""
+
+import threading
+from types import SimpleNamespace
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli is not None else 'gzip, deflate'
+''' Value of the 'Accept-Encoding' header sent with all NVCL and WFS requests.
+    Brotli is only requested if the 'brotli' or 'brotlicffi' package is installed to decode it
+'''
+
+# Shared counters, keyed on provider
+_STATS = {}
+_STATS_LOCK = threading.Lock()
+
+
+def get_transfer_stats(prov):
+    ''' Returns the 'TransferStats' shared by all the NVCL and WFS requests sent to a provider
+
+    :param prov: provider e.g. 'nsw'
+    :returns: a 'TransferStats' object
+    '''
+    with _STATS_LOCK:
+        stats = _STATS.get(prov)
+        if stats is None:
+            stats = TransferStats()
+            _STATS[prov] = stats
+    return stats
+
+
+class TransferStats:
+    ''' Thread safe counters of the number of responses and bytes received
+    '''
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        self._lock = threading.Lock()
+
+    def add(self, bytes_received, bytes_decoded):
+        ''' Counts a response
+
+        :param bytes_received: size of the response body sent over the network, possibly compressed (bytes)
+        :param bytes_decoded: size of the response body after decompression (bytes)
+        '''
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += bytes_received
+            self.bytes_decoded += bytes_decoded
+
+    def add_response(self, response):
+        ''' Counts a 'requests' response, its content must have been read
+
+        :param response: 'requests.Response' object
+        '''
+        bytes_decoded = len(response.content)
+        # Number of bytes read from the socket, before decompression
+        bytes_received = getattr(response.raw, 'tell', lambda: None)()
+        if not isinstance(bytes_received, int):
+            bytes_received = bytes_decoded
+        self.add(bytes_received, bytes_decoded)
+
+    def reset(self):
+        ''' Sets the counters to zero
+        '''
+        with self._lock:
+            self.requests = 0
+            self.bytes_received = 0
+            self.bytes_decoded = 0
+
+    def snapshot(self):
+        ''' Returns the counters
+
+        :returns: SimpleNamespace( 'requests'= number of responses, 'bytes_received'= bytes received over the network,
+                                   'bytes_decoded'= bytes after decompression )
+        '''
+        with self._lock:
+            return SimpleNamespace(requests=self.requests, bytes_received=self.bytes_received,
+                                   bytes_decoded=self.bytes_decoded)
@@ -10,6 +10,9 @@ import xml.etree.ElementTree as ET
 from nvcl_kit.xml_helpers import clean_xml_parse
 from nvcl_kit.cql_filter import make_cql_filter, make_cql_request
 from nvcl_kit.xml_filter import make_xml_filter, make_xml_request
+from nvcl_kit.rate_limiter import get_limiter
+from nvcl_kit.transfer_stats import get_transfer_stats
+from nvcl_kit.records import get_record_types
 
 LOG_LVL = logging.INFO
 ''' Initialise debug level, set to 'logging.INFO' or 'logging.DEBUG'
@@ -35,46 +38,50 @@ if not LOGGER.hasHandlers():
 
 def get_borehole_list(param_obj: SimpleNamespace) -> tuple[list, bool, bool]:
     prov = param_obj.PROV
+    limiter = get_limiter(prov, getattr(param_obj, 'MAX_CONCURRENT', None), getattr(param_obj, 'RATE_LIMIT', None))
+    stats = get_transfer_stats(prov)
     if param_obj.USE_CQL:
         cql_filter = make_cql_filter(param_obj.BBOX, param_obj.POLYGON)
-        features = make_cql_request(param_obj.WFS_URL, prov, cql_filter, param_obj.MAX_BOREHOLES)
+        features = make_cql_request(param_obj.WFS_URL, prov, cql_filter, param_obj.MAX_BOREHOLES, limiter, stats)
     else:
         xml_filter = make_xml_filter(param_obj.BBOX, param_obj.POLYGON)
-        features = make_xml_request(param_obj.WFS_URL, prov, xml_filter, param_obj.MAX_BOREHOLES)
+        features = make_xml_request(param_obj.WFS_URL, prov, xml_filter, param_obj.MAX_BOREHOLES, limiter, stats)
 
     if len(features) == 0:
         return [], False, None 
 
+    # Records are made with one call, from a dict of their attributes
+    borehole_type = get_record_types(getattr(param_obj, 'COMPACT_RECORDS', False)).borehole
     borehole_list = []
     for feature in features:
         try:
-            f = SimpleNamespace()
+            f = {}
             props = feature['properties']
 
 
             # Get NVCL_ID
-            f.nvcl_id = feature['id'].split('.')[-1:][0]
+            f['nvcl_id'] = feature['id'].split('.')[-1:][0]
 
             # Get 3D coords - they are produced as floats
-            f.x = float(feature['geometry']['coordinates'][0])
-            f.y = float(feature['geometry']['coordinates'][1])
+            f['x'] = float(feature['geometry']['coordinates'][0])
+            f['y'] = float(feature['geometry']['coordinates'][1])
             try:
-                f.z = float(props['elevation_m'])
+                f['z'] = float(props['elevation_m'])
             except (ValueError, KeyError):
-                f.z = 0.0
+                f['z'] = 0.0
 
             # Get HREF
-            f.href = props['identifier']
+            f['href'] = props['identifier']
 
             # Loop over possible values (from GeoSciML BoreholeView v4.1) and 'tenement' + 'project'
             for to_attr in ('identifier', 'name', 'description', 'purpose', 'status', 'drillingMethod', 'operator', 'driller', 'drillStartDate', 'drillEndDate', 'startPoint', 'inclinationType', 'boreholeMaterialCustodian', 'boreholeLength_m', 'elevation_m', 'elevation_srs', 'positionalAccuracy', 'source', 'parentBorehole_uri', 'metadata_uri', 'genericSymbolizer', 'tenement', 'project'):
                 if to_attr in props:
-                    setattr(f, to_attr, str(props[to_attr]))
+                    f[to_attr] = str(props[to_attr])
                 else:
-                    setattr(f, to_attr, '')
+                    f[to_attr] = ''
 
         except Exception as exc:
             LOGGER.debug(f"Exception parsing JSON response from {prov}: {exc}")
             continue
-        borehole_list.append(f)
+        borehole_list.append(borehole_type(**f))
     return borehole_list, True, True
@@ -2,6 +2,7 @@ import sys
 import logging
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
+from contextlib import nullcontext
 from urllib3.exceptions import HTTPError
 from urllib3.util import Retry
 
@@ -10,6 +11,8 @@ import requests
 from requests import Session
 from requests.adapters import HTTPAdapter
 
+from nvcl_kit.transfer_stats import ACCEPT_ENCODING
+
 LOG_LVL = logging.INFO
 ''' Initialise debug level, set to 'logging.INFO' or 'logging.DEBUG'
 '''
@@ -63,7 +66,7 @@ def make_polygon_prop(coords: str) -> str:
     xml_str = ET.tostring(intersects, encoding='unicode')
     return xml_str
 
-def make_xml_request(url: str, prov: str, xml_filter: str, max_features: int) -> list:
+def make_xml_request(url: str, prov: str, xml_filter: str, max_features: int, limiter=None, stats=None) -> list:
     """
     Makes an OGC WFS GetFeature v1.0.0 request using POST and expecting a JSON response
     This also implements local feature filtering for 'nvclCollection' attribute
@@ -72,6 +75,8 @@ def make_xml_request(url: str, prov: str, xml_filter: str, max_features: int) ->
     :param prov: provider e.g. 'nsw'
     :param xml_filter: XML filter string e.g. filter by polygon
     :param max_features: maximum number of features to return, if < 1 then all boreholes are returned
+    :param limiter: optional 'RateLimiter' object, limits the provider's requests in flight and request rate
+    :param stats: optional 'TransferStats' object, counts the responses and bytes received
     :returns: list of features, each feature is a dict
     """
     BATCH_SIZE = 10000
@@ -106,9 +111,13 @@ def make_xml_request(url: str, prov: str, xml_filter: str, max_features: int) ->
                                 status_forcelist=[429, 502, 503, 504]
                             )
                 s.mount('https://', HTTPAdapter(max_retries=retries))
+                s.headers['Accept-Encoding'] = ACCEPT_ENCODING
 
                 # Sending the request
-                response = s.post(url, data=data)
+                with limiter or nullcontext():
+                    response = s.post(url, data=data)
+                if stats is not None:
+                    stats.add_response(response)
         except (HTTPError, requests.RequestException) as e:
             LOGGER.error(f"{prov} returned error sending WFS GetFeature: {e}")
             return feat_list
@@ -1,5 +1,181 @@
+import io
+import re
+import sys
+import logging
 import xml.etree.ElementTree as ET
+from datetime import datetime
+from functools import lru_cache
 from dateutil.parser import parse, ParserError
+from dateutil.tz import tzoffset, UTC
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+LOG_LVL = logging.INFO
+''' Initialise debug level, set to 'logging.INFO' or 'logging.DEBUG'
+'''
+
+# Set up debugging
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(LOG_LVL)
+
+if not LOGGER.hasHandlers():
+
+    # Create logging console handler
+    HANDLER = logging.StreamHandler(sys.stdout)
+
+    # Create logging formatter
+    FORMATTER = logging.Formatter('%(name)s -- %(levelname)s - %(funcName)s: %(message)s')
+
+    # Add formatter to ch
+    HANDLER.setFormatter(FORMATTER)
+
+    # Add handler to LOGGER and set level
+    LOGGER.addHandler(HANDLER)
+
+XML_BACKENDS = ['etree', 'lxml']
+''' XML parsers: Python's 'xml.etree.ElementTree' or 'lxml', which is used by default if it is installed
+'''
+
+_BACKEND = {'name': 'lxml' if lxml_etree is not None else 'etree'}
+
+if lxml_etree is not None:
+    # Entities are not expanded and nothing is fetched from the network
+    _LXML_PARSER = lxml_etree.XMLParser(resolve_entities=False, no_network=True)
+    # Used for strings, whose XML encoding declaration no longer applies
+    _LXML_STR_PARSER = lxml_etree.XMLParser(resolve_entities=False, no_network=True, encoding='utf-8')
+
+
+def set_xml_backend(name):
+    ''' Selects the XML parser
+
+    :param name: 'lxml' or 'etree', 'lxml' can only be selected if it is installed
+    :returns: True if selected
+    '''
+    if name not in XML_BACKENDS or (name == 'lxml' and lxml_etree is None):
+        return False
+    _BACKEND['name'] = name
+    return True
+
+
+def get_xml_backend():
+    ''' Returns the name of the XML parser in use
+
+    :returns: 'lxml' or 'etree'
+    '''
+    return _BACKEND['name']
+
+
+def _is_lxml(elem):
+    ''' Returns True if an element was made by 'lxml'
+
+    :param elem: XML element
+    '''
+    return lxml_etree is not None and isinstance(elem, lxml_etree._Element)
+
+
+def _child_tag(path):
+    ''' Returns the tag of a path which selects child elements by tag e.g. './LogID' or 'LogID'
+
+    :param path: element path
+    :returns: tag or None if the path is not that simple
+    '''
+    tag = path[2:] if path.startswith('./') else path
+    if not tag or any(char in tag for char in '/.*[@()'):
+        return None
+    return tag
+
+
+class ChildFinder:
+    ''' Finds the first child element with each of a list of tags, the same as calling 'find(tag)' for each tag,
+        but the children are scanned once
+
+        ::
+
+            alg_id_elem, version_elem = ChildFinder('algorithmoutputID', 'version')(versions_elem)
+    '''
+
+    def __init__(self, *tags):
+        '''
+        :param tags: child element tags
+        '''
+        self.tags = tags
+
+    def __call__(self, elem):
+        '''
+        :param elem: XML element
+        :returns: tuple of elements, None if there is no child with that tag
+        '''
+        found = {}
+        for child in elem:
+            if child.tag not in found:
+                found[child.tag] = child
+        return tuple(found.get(tag) for tag in self.tags)
+
+
+class TextExtractor:
+    ''' Extracts the texts of the first elements found at a list of paths, the same as calling
+        'findtext(path, default)' for each path. When all the paths select child elements by tag the children
+        are scanned once, otherwise 'lxml' elements are searched with precompiled XPath expressions
+
+        ::
+
+            log_texts = TextExtractor('./LogID', './logName', './sampleCount', defaults=('', '', 0))
+            log_id, log_name, sample_count = log_texts(log_elem)
+    '''
+
+    def __init__(self, *paths, defaults=None):
+        '''
+        :param paths: paths relative to the element e.g. './LogID'
+        :param defaults: optional tuple of values returned when a path is not found, default is all empty strings
+        '''
+        self.paths = paths
+        self.defaults = defaults if defaults is not None else ('',) * len(paths)
+        tags = [_child_tag(path) for path in paths]
+        self._children = ChildFinder(*tags) if None not in tags else None
+        self._xpaths = None
+        if self._children is None and lxml_etree is not None:
+            self._xpaths = [lxml_etree.XPath(path) for path in paths]
+
+    def __call__(self, elem):
+        '''
+        :param elem: XML element
+        :returns: tuple of texts, an element without text gives an empty string
+        '''
+        if self._children is not None:
+            return tuple(default if child is None else (child.text or '')
+                         for child, default in zip(self._children(elem), self.defaults))
+        if self._xpaths is not None and _is_lxml(elem):
+            texts = []
+            for xpath, default in zip(self._xpaths, self.defaults):
+                found = xpath(elem)
+                texts.append((found[0].text or '') if found else default)
+            return tuple(texts)
+        return tuple(elem.findtext(path, default=default) for path, default in zip(self.paths, self.defaults))
+
+
+class ElementFinder:
+    ''' Finds all the elements at a path, the same as calling 'findall(path)'.
+        'lxml' elements are searched with a precompiled XPath expression
+    '''
+
+    def __init__(self, path):
+        '''
+        :param path: path relative to the element e.g. './Dataset'
+        '''
+        self.path = path
+        self._xpath = lxml_etree.XPath(path) if lxml_etree is not None else None
+
+    def __call__(self, elem):
+        '''
+        :param elem: XML element
+        :returns: list of elements
+        '''
+        if self._xpath is not None and _is_lxml(elem):
+            return self._xpath(elem)
+        return elem.findall(self.path)
 
 
 def clean_xml_parse(xml_str):
@@ -8,12 +184,81 @@ def clean_xml_parse(xml_str):
     :param xml_str: XML string to parse
     :returns: XML ElementTree Element object, it will be empty if there was an error
     '''
+    if _BACKEND['name'] == 'lxml':
+        try:
+            if isinstance(xml_str, str):
+                return lxml_etree.fromstring(xml_str.encode('utf-8'), _LXML_STR_PARSER)
+            return lxml_etree.fromstring(xml_str, _LXML_PARSER)
+        except lxml_etree.XMLSyntaxError:
+            return ET.Element('')
     try:
         root = ET.fromstring(xml_str)
     except ET.ParseError:
         return ET.Element('')
     return root
 
+
+def iterparse_elements(xml_str, tag_path):
+    ''' Parses XML incrementally, yielding the elements found at a path of tags below the root element.
+        Each element is removed from the tree after it is yielded, as are the elements which are not on the path,
+        so that only a small part of the tree is ever in memory.
+        If there is no root element e.g. the response is not XML, a warning is logged and nothing is yielded.
+        If the XML is badly formatted after the root element started e.g. the response was cut short, a ValueError
+        is raised, so that the elements yielded so far are not mistaken for the whole response
+
+    :param xml_str: XML string or byte string to parse
+    :param tag_path: tuple of tags below the root element e.g. ('Dataset', 'Logs', 'Log'), '*' matches any tag
+    :returns: a generator of complete XML ElementTree Element objects
+    '''
+    if _BACKEND['name'] == 'lxml':
+        lxml_opts = {'resolve_entities': False, 'no_network': True}
+        if isinstance(xml_str, str):
+            xml_str = xml_str.encode('utf-8')
+            lxml_opts['encoding'] = 'utf-8'
+        events = lxml_etree.iterparse(io.BytesIO(xml_str), events=('start', 'end'), **lxml_opts)
+        parse_error = lxml_etree.XMLSyntaxError
+    else:
+        if isinstance(xml_str, str):
+            xml_str = xml_str.encode('utf-8')
+        events = ET.iterparse(io.BytesIO(xml_str), events=('start', 'end'))
+        parse_error = ET.ParseError
+    # Elements from the root element to the current element
+    stack = []
+    # Number of elements yielded, None until the root element starts
+    count = None
+    try:
+        for event, elem in events:
+            if event == 'start':
+                stack.append(elem)
+                count = count or 0
+                continue
+            stack.pop()
+            depth = len(stack)
+            if depth == 0 or depth > len(tag_path):
+                continue
+            if depth == len(tag_path) and all(tag in ('*', el.tag) for tag, el in zip(tag_path, stack[1:] + [elem])):
+                count += 1
+                yield elem
+            stack[-1].remove(elem)
+    except parse_error as exc:
+        if count is None:
+            LOGGER.warning(f"Cannot parse XML: {exc}")
+            return
+        LOGGER.warning(f"XML ended badly after {count} elements: {exc}")
+        raise ValueError(f"badly-formatted XML after {count} elements: {exc}") from exc
+
+
+_DATE_TEXTS = TextExtractor('./modifiedDate', './createdDate')
+
+DATE_MEMO_SIZE = 1024
+''' Number of parsed date strings memoised by 'parse_date_str()'
+'''
+
+# ISO 8601 dates written by NVCL services e.g. '2022-09-13T14:38:24+09:30' or '2022-09-13T05:08:24Z'
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?)?'
+                          r'(?:(Z)|([+-])(\d{2})(?::?(\d{2}))?)?')
+
+
 def parse_dates(ds_child):
     ''' Parses dates from '<Dataset>' element
 
@@ -23,15 +268,52 @@ def parse_dates(ds_child):
     '''
     date_dict = {}
     # Get the dates from the 'Dataset' elements
-    for tag, key in [('./modifiedDate', 'modified_date'), ('./createdDate', 'created_date')]:
-        date_str = ds_child.findtext(tag, default='')
-        date_obj = None
-        if date_str:
-            # Try to parse the created and modified dates from the dataset attributes
-            try:
-                date_obj = parse(date_str)
-                date_dict[key] = date_obj
-            except ParserError:
-                pass
+    for date_str, key in zip(_DATE_TEXTS(ds_child), ['modified_date', 'created_date']):
+        date_obj = parse_date_str(date_str)
+        if date_obj is not None:
+            date_dict[key] = date_obj
     return date_dict
 
+
+@lru_cache(maxsize=DATE_MEMO_SIZE)
+def parse_date_str(date_str):
+    ''' Parses a created or modified date of a dataset. ISO 8601 dates are parsed directly, see '_parse_iso_date()',
+        other dates are parsed by 'dateutil'. Results are memoised, as many datasets share dates
+
+    :param date_str: date string, may be empty
+    :returns: datetime object or None if it could not be parsed
+    '''
+    if not date_str:
+        return None
+    date_obj = _parse_iso_date(date_str)
+    if date_obj is not None:
+        return date_obj
+    try:
+        return parse(date_str)
+    except ParserError:
+        return None
+
+
+def _parse_iso_date(date_str):
+    ''' Parses an ISO 8601 date without a time zone, with a 'Z' suffix or with a UTC offset.
+        UTC dates are given the 'dateutil.tz.UTC' time zone, which 'dateutil' replaces with the local time zone
+        if that is called 'UTC', and other offsets are given a 'tzoffset' as 'dateutil' does
+
+    :param date_str: date string
+    :returns: datetime object or None if it is not in one of those formats
+    '''
+    match = _ISO_DATE_RE.fullmatch(date_str)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction, zulu, sign, off_hours, off_minutes = match.groups()
+    tzinfo = None
+    if zulu is not None:
+        tzinfo = UTC
+    elif sign is not None:
+        offset = int(off_hours) * 3600 + int(off_minutes or 0) * 60
+        tzinfo = UTC if offset == 0 else tzoffset(None, -offset if sign == '-' else offset)
+    try:
+        return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0),
+                        int(fraction.ljust(6, '0')) if fraction else 0, tzinfo=tzinfo)
+    except ValueError:
+        return None
@@ -2,6 +2,8 @@ import unittest
 from unittest.mock import Mock, MagicMock
 from io import IOBase
 import json
+import threading
+from http.server import ThreadingHTTPServer
 
 from types import SimpleNamespace
 
@@ -33,9 +35,10 @@ def setup_reqs_obj(inp, reqs_obj):
     return reqs_obj, json_obj
 
 
-def setup_reader() -> NVCLReader:
+def setup_reader(reader_cls=NVCLReader) -> NVCLReader:
     ''' Initialises NVCLReader() object
 
+    :param reader_cls: optional reader class, default is NVCLReader
     :returns: NVCLReader() object
     '''
     rdr = None
@@ -44,16 +47,16 @@ def setup_reader() -> NVCLReader:
         with open('full_wfs_cql.json') as fp:
             reqs_obj = setup_reqs_obj(fp, reqs_obj)
             param_obj = setup_param_obj()
-            rdr = NVCLReader(param_obj)
+            rdr = reader_cls(param_obj)
     return rdr
 
 
 def setup_urlopen(fn, params: dict, src_file: str, binary: bool = False, rdr: NVCLReader = None) -> list:
-    ''' Patches over 'urlopen()' call and calls a function with parameters
+    ''' Patches over the NVCL service session's 'post()' call and calls a function with parameters
 
     :param fn: function to call
     :param params: function's parameters as a dict
-    :param src_file: filename of a file containing data returned from patched 'urlopen()'
+    :param src_file: filename of a file containing data returned from patched 'post()'
     :param rdr: optional NVCLReader() object
     :returns: data returned from function call
     '''
@@ -61,20 +64,21 @@ def setup_urlopen(fn, params: dict, src_file: str, binary: bool = False, rdr: NV
     if rdr is None:
         rdr = setup_reader()
     ret_list = []
-    with unittest.mock.patch('urllib.request.urlopen', autospec=True) as mock_request:
+    with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_request:
         open_obj = mock_request.return_value
+        open_obj.status_code = 200
         if not binary:
             with open(src_file) as fp:
-                open_obj.__enter__.return_value.read.return_value = bytes(fp.read(), 'ascii')
+                open_obj.content = bytes(fp.read(), 'ascii')
         else:
             with open(src_file, 'rb') as fp:
-                open_obj.__enter__.return_value.read.return_value = fp.read()
+                open_obj.content = fp.read()
         ret_list = getattr(rdr, fn)(**params)
     return ret_list
 
 
 def setup_param_obj(max_boreholes: int = None, bbox: dict = None, polygon: shapely.geometry.LinearRing = None, 
-        depths: tuple = None, borehole_crs: str = None, cache_path = None, use_cql = None) -> SimpleNamespace:
+        depths: tuple = None, borehole_crs: str = None, cache_path = None, use_cql = None, cache_backend = None) -> SimpleNamespace:
     ''' Create a parameter object for passing to NVCLReader constructor, used for testing only
 
     :param max_boreholes: maximum number of boreholes to download
@@ -83,6 +87,7 @@ def setup_param_obj(max_boreholes: int = None, bbox: dict = None, polygon: shape
     :param depths: only retrieve data within this depth range  (0.0, 1230.0)
     :param borehole_crs: borehole coordinate system e.g. 'EPSG:4326'
     :param cache_path: path used to cache network responses to local filesystem
+    :param cache_backend: type of cache, 'file' or 'sqlite'
     :returns: SimpleNamespace() object containing parameters
     '''
     param_obj = SimpleNamespace()
@@ -100,7 +105,23 @@ def setup_param_obj(max_boreholes: int = None, bbox: dict = None, polygon: shape
         param_obj.BOREHOLE_CRS = borehole_crs
     if cache_path:
         param_obj.CACHE_PATH = cache_path
+    if cache_backend:
+        param_obj.CACHE_BACKEND = cache_backend
     if use_cql:
         param_obj.USE_CQL = use_cql
     param_obj.PROV = 'blah'
     return param_obj
+
+
+def start_http_server(test_case, handler_cls) -> str:
+    ''' Starts a local HTTP server in a thread, it is stopped when the test finishes
+
+    :param test_case: 'unittest.TestCase' object
+    :param handler_cls: 'http.server.BaseHTTPRequestHandler' subclass
+    :returns: base URL of server
+    '''
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler_cls)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    test_case.addCleanup(server.server_close)
+    test_case.addCleanup(server.shutdown)
+    return f'http://127.0.0.1:{server.server_port}'
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+'''
+Benchmarks parsing of the recorded NVCL responses in this directory with each XML parser.
+Times the XML parse alone and the parse plus the reader's extraction of records,
+and checks that both parsers give identical records
+
+    python3 parse_benchmark.py [number]
+'''
+import os
+import sys
+import timeit
+
+from nvcl_kit.xml_helpers import set_xml_backend, get_xml_backend, clean_xml_parse
+
+from test_xml_helpers import FIXTURES, parse_fixtures
+
+
+def parse_only(responses):
+    ''' Parses the responses into XML trees
+
+    :param responses: list of response byte strings
+    '''
+    for resp in responses:
+        clean_xml_parse(resp)
+
+
+def main(number):
+    responses = []
+    for file_name in FIXTURES:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), file_name), 'rb') as fp:
+            responses.append(fp.read())
+    backend = get_xml_backend()
+    timings = {}
+    results = {}
+    try:
+        for name in ['etree', 'lxml']:
+            if not set_xml_backend(name):
+                print(f"'{name}' is not installed, skipping")
+                continue
+            results[name] = parse_fixtures()
+            parse_time = min(timeit.repeat(lambda: parse_only(responses), number=number, repeat=7)) / number
+            total_time = min(timeit.repeat(parse_fixtures, number=number, repeat=7)) / number
+            timings[name] = (parse_time, total_time)
+            print(f"{name:>6}: parse {parse_time * 1000.0:.3f} ms, parse and extract {total_time * 1000.0:.3f} ms")
+    finally:
+        set_xml_backend(backend)
+    if len(timings) == 2:
+        print(f"Results identical: {results['etree'] == results['lxml']}")
+        print(f"Speedup: parse {timings['etree'][0] / timings['lxml'][0]:.2f}x, "
+              f"parse and extract {timings['etree'][1] / timings['lxml'][1]:.2f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
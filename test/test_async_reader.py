@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+import asyncio
+import unittest
+from unittest.mock import patch
+from http.client import HTTPException
+
+import gzip
+import inspect
+import threading
+import shutil
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler
+
+from nvcl_kit.reader import NVCLReader
+from nvcl_kit.async_reader import AsyncNVCLReader
+from nvcl_kit.svc_interface import _AsyncServiceInterface
+from nvcl_kit.transfer_stats import TransferStats
+from nvcl_kit.borehole_data import np
+import nvcl_kit.svc_interface
+
+from helpers import setup_reader, start_http_server
+
+'''
+Tests for the async_reader module
+'''
+
+class TestAsyncNVCLReader(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        # Use the thread pool fallback so that the 'requests' session can be patched
+        patcher = patch('nvcl_kit.svc_interface.aiohttp', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.rdr = setup_reader(AsyncNVCLReader)
+
+    async def call_reader(self, fn, params, src_file):
+        ''' Patches the NVCL service session's 'post()' call and awaits a reader method
+
+        :param fn: name of reader method to call
+        :param params: method's parameters as a dict
+        :param src_file: filename of a file containing data returned from patched 'post()'
+        :returns: data returned from method call
+        '''
+        with patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value.status_code = 200
+            with open(src_file, 'rb') as fp:
+                mock_post.return_value.content = fp.read()
+            return await getattr(self.rdr, fn)(**params)
+
+    async def test_datasetid_list(self):
+        ''' Test get_datasetid_list()
+        '''
+        dataset_id_list = await self.call_reader('get_datasetid_list', {'nvcl_id': 'blah'}, 'dataset_coll.txt')
+        self.assertEqual(dataset_id_list, ['a4c1ed7f-1e87-444a-90ae-3fe5abf9081'])
+
+    async def test_dataset_catalogue(self):
+        ''' Test that boreholes missing from the dataset catalogue are requested separately
+        '''
+        catalogue = await self.call_reader('load_dataset_catalogue', {}, 'dataset_coll.txt')
+        self.assertEqual(catalogue.nvcl_ids(), ['6315'])
+        with patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            self.assertEqual(await self.rdr.get_datasetid_list('6315'), ['a4c1ed7f-1e87-444a-90ae-3fe5abf9081'])
+            self.assertEqual(len(await self.rdr.get_dataset_list('6315')), 1)
+            mock_post.assert_not_called()
+        # The borehole URI of 'blah' ends in '6315'
+        dataset_id_list = await self.call_reader('get_datasetid_list', {'nvcl_id': 'blah'}, 'dataset_coll.txt')
+        self.assertEqual(dataset_id_list, ['a4c1ed7f-1e87-444a-90ae-3fe5abf9081'])
+        self.rdr.dataset_colls.clear()
+        with patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value.status_code = 200
+            with open('dataset_coll.txt', 'rb') as fp:
+                mock_post.return_value.content = fp.read()
+            self.assertEqual([ds async for ds in self.rdr.iter_datasetid_list('blah')], dataset_id_list)
+            self.assertEqual(len([ds async for ds in self.rdr.iter_dataset_list('blah')]), 1)
+            self.assertEqual(len(await self.rdr.get_dataset_list('blah')), 1)
+            self.assertEqual(mock_post.call_count, 3)
+
+    async def test_logs_data(self):
+        ''' Test get_logs_data()
+        '''
+        log_list = await self.call_reader('get_logs_data', {'nvcl_id': 'blah'}, 'dataset_coll.txt')
+        self.assertEqual(len(log_list), 70)
+        self.assertEqual(log_list[0].log_id, '2023a603-7b31-4c97-ad59-efb220d93d9')
+
+    async def test_iter_logs_data(self):
+        ''' Test iter_logs_data() and iter_scalar_logs() async generators
+        '''
+        with patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value.status_code = 200
+            with open('dataset_coll.txt', 'rb') as fp:
+                mock_post.return_value.content = fp.read()
+            log_list = [log async for log in self.rdr.iter_logs_data('blah')]
+            with open('logcoll_scalar.txt', 'rb') as fp:
+                mock_post.return_value.content = fp.read()
+            scalar_list = [log async for log in self.rdr.iter_scalar_logs('blah')]
+        self.assertEqual(len(log_list), 70)
+        self.assertEqual(log_list[0].log_id, '2023a603-7b31-4c97-ad59-efb220d93d9')
+        self.assertEqual(len(scalar_list), len(self.rdr._parse_scalar_logs(mock_post.return_value.content)))
+
+    async def test_borehole_data(self):
+        ''' Test get_borehole_data()
+        '''
+        bh_data = await self.call_reader('get_borehole_data', {'log_id': 'dummy-id', 'height_resol': 10.0, 'class_name': 'dummy-class'}, 'bh_data.txt')
+        self.assertEqual(len(bh_data), 28)
+        self.assertEqual(bh_data[5.0].classText, 'WHITE-MICA')
+
+    @unittest.skipIf(np is None, "'numpy' is not installed")
+    async def test_borehole_data_columns(self):
+        ''' Test get_borehole_data_columns()
+        '''
+        cols = await self.call_reader('get_borehole_data_columns', {'log_id': 'dummy-id', 'height_resol': 10.0, 'class_name': 'dummy-class'}, 'bh_data.txt')
+        self.assertEqual(len(cols.depth), 28)
+        self.assertEqual(cols.class_texts[cols.class_code[list(cols.depth).index(5.0)]], 'WHITE-MICA')
+
+    async def test_tray_depths(self):
+        ''' Test get_tray_depths()
+        '''
+        depth_list = await self.call_reader('get_tray_depths', {'log_id': 'dummy_id'}, 'img_tray_depth.txt')
+        self.assertEqual(len(depth_list), 50)
+        self.assertEqual(depth_list[3].start_value, '14.903137')
+
+    async def test_spectrallog_datasets(self):
+        ''' Test get_spectrallog_datasets()
+        '''
+        spectral_dataset = await self.call_reader('get_spectrallog_datasets', {'log_id': 'blah'}, 'spectraldata')
+        self.assertEqual(spectral_dataset[:3], bytes([129, 32, 206]))
+
+    async def test_mosaic_imglogs(self):
+        ''' Test get_mosaic_imglogs()
+        '''
+        log_list = await self.call_reader('get_mosaic_imglogs', {'dataset_id': 'blah'}, 'logcoll_mosaic.txt')
+        self.assertEqual(len(log_list), 1)
+        self.assertEqual(log_list[0].log_name, 'Mosaic')
+
+    async def test_gather(self):
+        ''' Test that many requests can be in flight at once
+        '''
+        with patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value.status_code = 200
+            with open('dataset_coll.txt', 'rb') as fp:
+                mock_post.return_value.content = fp.read()
+            results = await asyncio.gather(*[self.rdr.get_datasetid_list(f'id{i}') for i in range(20)])
+        self.assertEqual(len(results), 20)
+        self.assertTrue(all(r == ['a4c1ed7f-1e87-444a-90ae-3fe5abf9081'] for r in results))
+
+    async def test_logs_data_many(self):
+        ''' Test get_logs_data_many()
+        '''
+        log_dict = await self.call_reader('get_logs_data_many', {'nvcl_id_list': ['b', 'a', 'c'], 'max_workers': 2}, 'dataset_coll.txt')
+        self.assertEqual(list(log_dict.keys()), ['b', 'a', 'c'])
+        self.assertEqual(len(log_dict['c']), 70)
+
+    async def test_exception(self):
+        ''' Tests exception handling
+        '''
+        with patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.side_effect = HTTPException
+            with self.assertLogs('nvcl_kit.svc_interface', level='WARN') as nvcl_log:
+                self.assertEqual(await self.rdr.get_logs_data('blah'), [])
+                self.assertIn('HTTP Error with', nvcl_log.output[0])
+
+    async def test_plot_scalars_html_empty(self):
+        ''' Tests that an empty log id list returns an empty string
+        '''
+        self.assertEqual(await self.rdr.plot_scalars_html([]), "")
+
+    async def test_persistent_cache_in_thread(self):
+        ''' Tests that persistent cache lookups and writes are not done on the event loop
+        '''
+        cache_path = tempfile.mkdtemp(prefix='tmp-cache-')
+        self.addCleanup(shutil.rmtree, cache_path, ignore_errors=True)
+        svc = _AsyncServiceInterface(self.rdr.param_obj.NVCL_URL, 2, cache_path=cache_path, mem_cache_size=0)
+        loop_thread = threading.get_ident()
+        threads = []
+        get_entry, put = svc.cache.get_entry, svc.cache.put
+
+        def spy(fn):
+            def wrapper(*args):
+                threads.append(threading.get_ident())
+                return fn(*args)
+            return wrapper
+
+        with patch.object(svc.cache, 'get_entry', spy(get_entry)), patch.object(svc.cache, 'put', spy(put)), \
+                patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value.status_code = 200
+            mock_post.return_value.content = b'<DatasetCollection></DatasetCollection>'
+            self.assertEqual(await svc.get_dataset_collection('blah'), mock_post.return_value.content)
+            self.assertEqual(await svc.get_dataset_collection('blah'), mock_post.return_value.content)
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(loop_thread, threads)
+
+    async def test_cache_maintenance(self):
+        ''' Tests prune_cache() and vacuum_cache() are awaitable
+        '''
+        self.assertEqual(await self.rdr.prune_cache(), 0)
+        self.assertIsNone(await self.rdr.vacuum_cache())
+
+
+class TestAsyncNVCLReaderMethods(unittest.TestCase):
+
+    # Methods which do not call the NVCL services or the persistent cache, they are not coroutines
+    LOCAL_METHODS = {'filter_feat_list', 'get_boreholes_list', 'get_cache_key_stats', 'get_cache_stats',
+                     'get_feature_list', 'get_nvcl_id_list', 'get_transfer_stats'}
+
+    def test_public_methods(self):
+        ''' Tests that every public 'NVCLReader' method is overridden by an async method, unless it is local
+        '''
+        for name, fn in inspect.getmembers(NVCLReader, inspect.isfunction):
+            if name.startswith('_') or name in self.LOCAL_METHODS:
+                continue
+            with self.subTest(name=name):
+                async_fn = getattr(AsyncNVCLReader, name)
+                self.assertIsNot(async_fn, fn)
+                self.assertTrue(inspect.iscoroutinefunction(async_fn) or inspect.isasyncgenfunction(async_fn))
+        for name in self.LOCAL_METHODS:
+            self.assertIs(getattr(AsyncNVCLReader, name), getattr(NVCLReader, name))
+
+
+class TestAsyncServiceInterface(unittest.IsolatedAsyncioTestCase):
+
+    @unittest.skipIf(nvcl_kit.svc_interface.aiohttp is None, "'aiohttp' is not installed")
+    async def test_aiohttp_compression(self):
+        ''' Tests that 'aiohttp' requests compressed responses, decompresses and counts them
+        '''
+        body = b'{"log": [' + b'{"depth": 1.0, "classText": "WHITE-MICA"},' * 500 + b'{}]}'
+        headers_seen = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                headers_seen.append(self.headers['Accept-Encoding'])
+                gz_body = gzip.compress(body)
+                self.send_response(200)
+                self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(gz_body)))
+                self.end_headers()
+                self.wfile.write(gz_body)
+
+            def log_message(self, *args):
+                pass
+
+        base_url = start_http_server(self, Handler)
+        stats = TransferStats()
+        svc = _AsyncServiceInterface(base_url + '/NVCLDataServices', 2, stats=stats,
+                                     mem_cache_size=0)
+        try:
+            self.assertEqual(await svc.get_downsampled_data('blah'), body)
+        finally:
+            await svc.close()
+        self.assertIn('gzip', headers_seen[0])
+        counts = stats.snapshot()
+        self.assertEqual((counts.requests, counts.bytes_decoded), (1, len(body)))
+        self.assertLess(counts.bytes_received, len(body) / 10)
+
+    @unittest.skipIf(nvcl_kit.svc_interface.aiohttp is None, "'aiohttp' is not installed")
+    async def test_aiohttp_no_limiter(self):
+        ''' Tests 'aiohttp' requests without a rate limiter, using a 'nullcontext' that cannot be used
+            with 'async with', as in Python 3.9
+        '''
+        body = b'<DatasetCollection></DatasetCollection>'
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        class SyncNullContext:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                return False
+
+        base_url = start_http_server(self, Handler)
+        svc = _AsyncServiceInterface(base_url + '/NVCLDataServices', 2, mem_cache_size=0)
+        self.assertIsNone(svc.limiter)
+        try:
+            with patch('nvcl_kit.svc_interface.nullcontext', SyncNullContext):
+                self.assertEqual(await svc.get_dataset_collection('blah'), body)
+        finally:
+            await svc.close()
+
+    @unittest.skipIf(nvcl_kit.svc_interface.aiohttp is None, "'aiohttp' is not installed")
+    async def test_aiohttp_revalidation(self):
+        ''' Tests that 'aiohttp' revalidates expired cache entries with conditional GET requests
+        '''
+        body = b'<DatasetCollection>v1</DatasetCollection>'
+        requests_seen = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                requests_seen.append(('POST', None))
+                self.send_response(200)
+                self.send_header('ETag', '"v1"')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                requests_seen.append(('GET', self.headers['If-None-Match']))
+                self.send_response(304)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        base_url = start_http_server(self, Handler)
+        cache_path = tempfile.mkdtemp(prefix='tmp-cache-')
+        self.addCleanup(shutil.rmtree, cache_path, ignore_errors=True)
+        svc = _AsyncServiceInterface(base_url + '/NVCLDataServices', 2, cache_path=cache_path, cache_ttl=60,
+                                     mem_cache_size=0)
+        try:
+            self.assertEqual(await svc.get_dataset_collection('blah'), body)
+            with patch('nvcl_kit.cache.time.time', return_value=time.time() + 61.0):
+                self.assertEqual(await svc.get_dataset_collection('blah'), body)
+        finally:
+            await svc.close()
+        self.assertEqual(requests_seen, [('POST', None), ('GET', '"v1"')])
+
+
+if __name__ == '__main__':
+    unittest.main()
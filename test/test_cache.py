@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+import os
+import shutil
+import time
+import tempfile
+import unittest
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+
+import nvcl_kit.cache
+from nvcl_kit.cache import MemoryCache, FileCache, SQLiteCache, make_cache, get_ttl, canonical_key, KeyStats, SQLITE_FILENAME
+
+'''
+Tests for the cache module
+'''
+
+DC_KEY = 'https://blah/NVCLDataServices/getDatasetCollection.html?holeidentifier=X'
+SPEC_KEY = 'https://blah/NVCLDataServices/getspectraldata.html?speclogid=Y'
+TTL = {'getDatasetCollection': 100, 'getspectraldata.html': None, '*': 1000}
+
+
+class TestGetTTL(unittest.TestCase):
+
+    def test_get_ttl(self):
+        ''' Tests looking up the time to live of entries
+        '''
+        self.assertIsNone(get_ttl(None, DC_KEY))
+        self.assertEqual(get_ttl(50, DC_KEY), 50)
+        self.assertEqual(get_ttl(TTL, DC_KEY), 100)
+        self.assertIsNone(get_ttl(TTL, SPEC_KEY))
+        self.assertEqual(get_ttl(TTL, 'https://blah/NVCLDataServices/getLogCollection.html?datasetid=Z'), 1000)
+        self.assertEqual(get_ttl(TTL, None), 1000)
+        self.assertIsNone(get_ttl({'getDatasetCollection': 100}, SPEC_KEY))
+
+
+class TestCanonicalKey(unittest.TestCase):
+
+    def test_canonical_key(self):
+        ''' Tests that differently written requests are given the same key
+        '''
+        url = 'https://blah/NVCLDataServices/getDownsampledData.html'
+        key = canonical_key(url, b'logid=X&startdepth=0&enddepth=100.5&interval=1')
+        self.assertEqual(key, url + '?enddepth=100.5&interval=1&logid=X&startdepth=0')
+        self.assertEqual(canonical_key(url, b'interval=1.0&enddepth=100.50&startdepth=0.0&logid=X'), key)
+        self.assertNotEqual(canonical_key(url, b'interval=2&enddepth=100.5&startdepth=0&logid=X'), key)
+        # Only numeric parameters are normalised
+        self.assertEqual(canonical_key(url, b'logid=007'), url + '?logid=007')
+        self.assertEqual(canonical_key(url, None), url + '?')
+
+    def test_defaults(self):
+        ''' Tests that default parameter values are left out
+        '''
+        url = 'https://blah/NVCLDataServices/plotscalar.html'
+        self.assertEqual(canonical_key(url, b'logid=X&width=300.0&height=500&graphtype=1'), url + '?height=500&logid=X')
+        url = 'https://blah/NVCLDataServices/getDatasetCollection.html'
+        self.assertEqual(canonical_key(url, b'holeidentifier=X&outputformat=xml'), url + '?holeidentifier=X')
+
+    def test_repeated_params(self):
+        ''' Tests that the order of repeated parameters is kept
+        '''
+        url = 'https://blah/NVCLDataServices/plotmultiscalars.html'
+        self.assertEqual(canonical_key(url, b'logid=B&width=200&logid=A'), url + '?logid=B&logid=A&width=200')
+        self.assertNotEqual(canonical_key(url, b'logid=B&logid=A'), canonical_key(url, b'logid=A&logid=B'))
+
+    def test_key_stats(self):
+        ''' Tests counting hits and key collisions
+        '''
+        key_stats = KeyStats(max_keys=2)
+        key_stats.add('k1', 'k1', False)
+        key_stats.add('k1', 'k1', True)
+        key_stats.add('k1', 'k1-other', True)
+        stats = key_stats.stats()
+        self.assertEqual((stats.lookups, stats.hits, stats.collisions), (3, 2, 1))
+        self.assertAlmostEqual(stats.hit_ratio, 2 / 3)
+        # Oldest keys are forgotten
+        key_stats.add('k2', 'k2', False)
+        key_stats.add('k3', 'k3', False)
+        key_stats.add('k1', 'k1-another', False)
+        self.assertEqual(key_stats.stats().collisions, 1)
+        self.assertEqual(KeyStats().stats().hit_ratio, 0.0)
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def test_get_put(self):
+        ''' Tests reading and writing cache entries, and the counters
+        '''
+        cache = MemoryCache(100)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', b'response')
+        self.assertEqual(cache.get('a'), b'response')
+        cache.put('a', b'new')
+        self.assertEqual(cache.get('a'), b'new')
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries, stats.size, stats.max_bytes), (2, 1, 1, 3, 100))
+        cache.clear()
+        self.assertEqual(cache.stats().entries, 0)
+        self.assertEqual(cache.stats().size, 0)
+
+    def test_eviction(self):
+        ''' Tests that the least recently used entries are evicted to stay within the byte budget
+        '''
+        cache = MemoryCache(30)
+        cache.put('a', b'a' * 10)
+        cache.put('b', b'b' * 10)
+        cache.put('c', b'c' * 10)
+        # 'a' becomes most recently used
+        cache.get('a')
+        cache.put('d', b'd' * 10)
+        self.assertIsNone(cache.get('b'))
+        for key in ['a', 'c', 'd']:
+            self.assertIsNotNone(cache.get(key))
+        self.assertEqual(cache.stats().size, 30)
+        # Too large to store
+        cache.put('e', b'e' * 31)
+        self.assertIsNone(cache.get('e'))
+        self.assertEqual(cache.stats().entries, 3)
+
+    def test_ttl(self):
+        ''' Tests that expired entries are not returned
+        '''
+        cache = MemoryCache(1000, ttl=TTL)
+        with patch('nvcl_kit.cache.time.time', return_value=1000.0):
+            cache.put(DC_KEY, b'dc')
+            cache.put(SPEC_KEY, b'spec')
+            # Stored earlier in a persistent cache
+            cache.put('old', b'old', stored_at=0.0)
+        with patch('nvcl_kit.cache.time.time', return_value=1101.0):
+            self.assertIsNone(cache.get(DC_KEY))
+            self.assertEqual(cache.get(SPEC_KEY), b'spec')
+            self.assertIsNone(cache.get('old'))
+        self.assertEqual(cache.stats().size, 4)
+
+    def test_negative_entries(self):
+        ''' Tests that negative entries expire after their own time to live
+        '''
+        cache = MemoryCache(1000)
+        with patch('nvcl_kit.cache.time.time', return_value=1000.0):
+            cache.put(DC_KEY, b'', negative_ttl=30)
+        with patch('nvcl_kit.cache.time.time', return_value=1020.0):
+            self.assertEqual(cache.get_entry(DC_KEY).negative_ttl, 30)
+            self.assertFalse(cache.get_entry(DC_KEY).expired)
+        with patch('nvcl_kit.cache.time.time', return_value=1031.0):
+            self.assertTrue(cache.get_entry(DC_KEY).expired)
+            self.assertIsNone(cache.get(DC_KEY))
+
+
+class TestFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp(prefix='tmp-cache-')
+        self.addCleanup(shutil.rmtree, self.cache_path, ignore_errors=True)
+
+    def test_get_put(self):
+        ''' Tests reading and writing cache entries
+        '''
+        cache = FileCache(self.cache_path)
+        self.assertIsNone(cache.get('https://blah/a?x=1'))
+        cache.put('https://blah/a?x=1', b'response')
+        self.assertEqual(cache.get('https://blah/a?x=1'), b'response')
+        cache.put('https://blah/a?x=1', b'new response')
+        self.assertEqual(cache.get('https://blah/a?x=1'), b'new response')
+
+    def test_sharding(self):
+        ''' Tests that files are spread over two levels of sub-folders
+        '''
+        cache = FileCache(self.cache_path)
+        for i in range(50):
+            cache.put(f'key-{i}', b'x')
+        for dp, dn, fn in os.walk(self.cache_path):
+            rel = os.path.relpath(dp, self.cache_path)
+            if fn:
+                self.assertEqual(len(rel.split(os.sep)), 2)
+                for f in fn:
+                    self.assertEqual(f[:2] + os.sep + f[2:4], rel)
+
+    def test_concurrent_writes(self):
+        ''' Tests that concurrent writers never leave partial or temporary files
+        '''
+        cache = FileCache(self.cache_path)
+        values = [bytes([i]) * 100000 for i in range(16)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda v: cache.put('same-key', v), values))
+        self.assertIn(cache.get('same-key'), values)
+        files = [f for dp, dn, fn in os.walk(self.cache_path) for f in fn]
+        self.assertEqual(len(files), 1)
+
+    def test_write_error(self):
+        ''' Tests that a write error is logged and not raised
+        '''
+        path = os.path.join(self.cache_path, 'file')
+        with open(path, 'w') as fp:
+            fp.write('not a folder')
+        cache = FileCache(path)
+        with self.assertLogs('nvcl_kit.cache', level='WARN') as nvcl_log:
+            cache.put('key', b'value')
+            self.assertIn('Cannot write cache file', nvcl_log.output[0])
+        self.assertIsNone(cache.get('key'))
+
+    def test_not_a_cache_file(self):
+        ''' Tests that a file without a header is not read
+        '''
+        cache = FileCache(self.cache_path)
+        path = cache._path('key')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as fp:
+            fp.write(b'not a cache file')
+        with self.assertLogs('nvcl_kit.cache', level='WARN') as nvcl_log:
+            self.assertIsNone(cache.get('key'))
+            self.assertIn('Cannot read cache file', nvcl_log.output[0])
+        self.assertEqual(list(cache._list_entries()), [])
+
+    def test_old_layout(self):
+        ''' Tests that files in the flat layout of older versions are reported once and removed by vacuum
+        '''
+        old_path = os.path.join(self.cache_path, 'https%3A%2F%2Fblah%2FgetAlgorithms.html%3F.txt')
+        with open(old_path, 'wb') as fp:
+            fp.write(b'old response')
+        with patch('nvcl_kit.cache._OLD_LAYOUT_WARNED', set()):
+            with self.assertLogs('nvcl_kit.cache', level='WARN') as nvcl_log:
+                cache = FileCache(self.cache_path)
+                self.assertIn('has 1 files written by an older version', nvcl_log.output[0])
+            with patch.object(nvcl_kit.cache.LOGGER, 'warning') as mock_warning:
+                FileCache(self.cache_path)
+            mock_warning.assert_not_called()
+        self.assertEqual(list(cache._list_entries()), [])
+        cache.vacuum()
+        self.assertFalse(os.path.exists(old_path))
+
+    def test_vacuum(self):
+        ''' Tests that vacuum removes old temporary files and empty folders
+        '''
+        cache = FileCache(self.cache_path, ttl=0)
+        cache.put('key', b'value')
+        shard_dir = os.path.dirname(cache._path('key'))
+        tmp_path = os.path.join(shard_dir, '.tmp-blah')
+        with open(tmp_path, 'wb') as fp:
+            fp.write(b'partial')
+        os.utime(tmp_path, (0, 0))
+        with patch('nvcl_kit.cache.time.time', return_value=time.time() + 10.0):
+            self.assertEqual(cache.prune(), 1)
+        cache.vacuum()
+        self.assertEqual(os.listdir(self.cache_path), [])
+
+
+class TestSQLiteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp(prefix='tmp-cache-')
+        self.addCleanup(shutil.rmtree, self.cache_path, ignore_errors=True)
+        self.db_path = os.path.join(self.cache_path, 'cache.db')
+
+    def test_get_put(self):
+        ''' Tests reading and writing cache entries
+        '''
+        cache = SQLiteCache(self.db_path)
+        self.addCleanup(cache.close)
+        self.assertIsNone(cache.get('https://blah/a?x=1'))
+        cache.put('https://blah/a?x=1', b'response')
+        self.assertEqual(cache.get('https://blah/a?x=1'), b'response')
+        cache.put('https://blah/a?x=1', b'new response')
+        self.assertEqual(cache.get('https://blah/a?x=1'), b'new response')
+        # Entries are visible to another connection to the same file
+        other = SQLiteCache(self.db_path)
+        self.addCleanup(other.close)
+        self.assertEqual(other.get('https://blah/a?x=1'), b'new response')
+        self.assertEqual(os.listdir(self.cache_path).count('cache.db'), 1)
+
+    def test_wal_mode(self):
+        ''' Tests that the database uses write-ahead logging
+        '''
+        cache = SQLiteCache(self.db_path)
+        self.addCleanup(cache.close)
+        mode = cache._connect().execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_folder_path(self):
+        ''' Tests that a database file is created inside a folder path
+        '''
+        cache = SQLiteCache(self.cache_path)
+        self.addCleanup(cache.close)
+        cache.put('key', b'value')
+        self.assertTrue(os.path.isfile(os.path.join(self.cache_path, SQLITE_FILENAME)))
+
+    def test_new_folder(self):
+        ''' Tests that missing folders are created, for a new folder path and a database file path
+        '''
+        folder = os.path.join(self.cache_path, 'new', 'folder') + os.sep
+        db_path = os.path.join(self.cache_path, 'other', 'cache.db')
+        for path, db_file in [(folder, os.path.join(folder, SQLITE_FILENAME)), (db_path, db_path)]:
+            with self.subTest(path=path):
+                cache = SQLiteCache(path)
+                self.addCleanup(cache.close)
+                cache.put('key', b'value')
+                self.assertEqual(cache.get('key'), b'value')
+                self.assertTrue(os.path.isfile(db_file))
+
+    def test_concurrent_writes(self):
+        ''' Tests concurrent writes from several threads
+        '''
+        cache = SQLiteCache(self.db_path)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda i: cache.put(f'key-{i}', bytes([i]) * 1000), range(64)))
+        for i in range(64):
+            self.assertEqual(cache.get(f'key-{i}'), bytes([i]) * 1000)
+        cache.close()
+
+    def test_make_cache(self):
+        ''' Tests choosing the cache backend
+        '''
+        self.assertIsNone(make_cache(None))
+        self.assertIsInstance(make_cache(self.cache_path), FileCache)
+        sqlite_cache = make_cache(self.db_path, 'sqlite')
+        self.assertIsInstance(sqlite_cache, SQLiteCache)
+        sqlite_cache.close()
+        custom = FileCache(self.cache_path)
+        self.assertIs(make_cache(None, custom), custom)
+        with self.assertLogs('nvcl_kit.cache', level='WARN') as nvcl_log:
+            self.assertIsNone(make_cache(self.cache_path, 'blah'))
+            self.assertIn('Unknown cache backend', nvcl_log.output[0])
+
+class TestPersistentCachePolicy(unittest.TestCase):
+    ''' Tests expiry and eviction of both persistent cache backends
+    '''
+
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp(prefix='tmp-cache-')
+        self.addCleanup(shutil.rmtree, self.cache_path, ignore_errors=True)
+
+    def make_caches(self, **kwargs):
+        file_cache = FileCache(os.path.join(self.cache_path, 'files'), **kwargs)
+        sqlite_cache = SQLiteCache(os.path.join(self.cache_path, 'cache.db'), **kwargs)
+        self.addCleanup(sqlite_cache.close)
+        return [file_cache, sqlite_cache]
+
+    def test_ttl(self):
+        ''' Tests per-endpoint time to live and pruning expired entries
+        '''
+        for cache in self.make_caches(ttl=TTL):
+            with self.subTest(cache=type(cache).__name__):
+                with patch('nvcl_kit.cache.time.time', return_value=1000.0):
+                    cache.put(DC_KEY, b'dc')
+                    cache.put(SPEC_KEY, b'spec')
+                with patch('nvcl_kit.cache.time.time', return_value=1050.0):
+                    self.assertEqual(cache.get(DC_KEY), b'dc')
+                    self.assertEqual(cache.prune(), 0)
+                with patch('nvcl_kit.cache.time.time', return_value=1101.0):
+                    self.assertIsNone(cache.get(DC_KEY))
+                    entry = cache.get_entry(DC_KEY)
+                    self.assertTrue(entry.expired)
+                    self.assertEqual(entry.value, b'dc')
+                    self.assertEqual(cache.get(SPEC_KEY), b'spec')
+                    self.assertEqual(cache.prune(), 1)
+                    self.assertIsNone(cache.get_entry(DC_KEY))
+                    self.assertEqual(cache.get(SPEC_KEY), b'spec')
+
+    def test_negative_entries(self):
+        ''' Tests that negative entries expire after their own time to live, whatever the cache's time to live
+        '''
+        for cache in self.make_caches():
+            with self.subTest(cache=type(cache).__name__):
+                with patch('nvcl_kit.cache.time.time', return_value=1000.0):
+                    cache.put(DC_KEY, b'', negative_ttl=30)
+                    cache.put(SPEC_KEY, b'spec')
+                with patch('nvcl_kit.cache.time.time', return_value=1020.0):
+                    entry = cache.get_entry(DC_KEY)
+                    self.assertEqual((entry.value, entry.negative_ttl, entry.expired), (b'', 30, False))
+                with patch('nvcl_kit.cache.time.time', return_value=1031.0):
+                    self.assertTrue(cache.get_entry(DC_KEY).expired)
+                    self.assertIsNone(cache.get_entry(SPEC_KEY).negative_ttl)
+                    self.assertEqual(cache.prune(), 1)
+                    self.assertEqual(cache.get(SPEC_KEY), b'spec')
+
+    def test_lru_eviction(self):
+        ''' Tests that the least recently used entries are evicted when the maximum size is exceeded
+        '''
+        for cache in self.make_caches(max_size=25000, policy='lru'):
+            with self.subTest(cache=type(cache).__name__):
+                for idx, key in enumerate(['a', 'b', 'c']):
+                    with patch('nvcl_kit.cache.time.time', return_value=1000.0 + idx):
+                        cache.put(key, os.urandom(8000))
+                with patch('nvcl_kit.cache.time.time', return_value=1010.0):
+                    self.assertIsNotNone(cache.get('a'))
+                with patch('nvcl_kit.cache.time.time', return_value=1020.0):
+                    cache.put('d', os.urandom(8000))
+                self.assertEqual([key for key in 'abcd' if cache.get_entry(key) is not None], ['a', 'd'])
+
+    def test_lfu_eviction(self):
+        ''' Tests that the least frequently used entries are evicted when the maximum size is exceeded,
+            and that a new entry is not evicted
+        '''
+        for cache in self.make_caches(max_size=25000, policy='lfu'):
+            with self.subTest(cache=type(cache).__name__):
+                for key in ['a', 'b', 'c']:
+                    cache.put(key, os.urandom(8000))
+                for key in ['c', 'c', 'c', 'b', 'b', 'a']:
+                    cache.get(key)
+                cache.put('d', os.urandom(8000))
+                self.assertEqual([key for key in 'abcd' if cache.get_entry(key) is not None], ['c', 'd'])
+
+    def test_prune_size(self):
+        ''' Tests that prune enforces the maximum size of a cache written without one
+        '''
+        for cache in self.make_caches():
+            with self.subTest(cache=type(cache).__name__):
+                for idx in range(10):
+                    cache.put(f'key-{idx}', os.urandom(1000))
+                cache.max_size = 5500
+                self.assertEqual(cache.prune(), 5)
+                self.assertLessEqual(sum(entry.size for entry in cache._list_entries()), 5500)
+                cache.vacuum()
+
+    def test_compression(self):
+        ''' Tests that text responses are compressed and images are not
+        '''
+        xml = b'<DatasetCollection>' + b'<Dataset><DatasetID>a4c1ed7f</DatasetID></Dataset>' * 200 + b'</DatasetCollection>'
+        jpeg = b'\xff\xd8\xff\xe0' + os.urandom(2000)
+        for cache in self.make_caches(compression='gzip'):
+            with self.subTest(cache=type(cache).__name__):
+                cache.put('xml', xml)
+                cache.put('jpeg', jpeg)
+                cache.put('small', b'<a/>')
+                sizes = {entry.key: entry.size for entry in cache._list_entries()}
+                self.assertLess(sizes['xml'], len(xml) / 10)
+                self.assertGreaterEqual(sizes['jpeg'], len(jpeg))
+                # Entries are read with the codec they were written with
+                cache.codec = None
+                for key, value in [('xml', xml), ('jpeg', jpeg), ('small', b'<a/>')]:
+                    self.assertEqual(cache.get(key), value)
+                cache.put('xml', xml)
+                self.assertGreaterEqual({entry.key: entry.size for entry in cache._list_entries()}['xml'], len(xml))
+
+    def test_compression_option(self):
+        ''' Tests choosing the compression codec
+        '''
+        with patch('nvcl_kit.cache.zstandard', None):
+            self.assertEqual(FileCache(self.cache_path).codec, 'gzip')
+            with self.assertLogs('nvcl_kit.cache', level='WARN') as nvcl_log:
+                self.assertEqual(FileCache(self.cache_path, compression='zstd').codec, 'gzip')
+                self.assertIn("'zstandard' package is not installed", nvcl_log.output[0])
+        self.assertIsNone(FileCache(self.cache_path, compression=None).codec)
+        if nvcl_kit.cache.zstandard is not None:
+            cache = FileCache(self.cache_path, compression='zstd')
+            cache.put('csv', b'1.0,2.0,3.0\n' * 1000)
+            self.assertEqual(cache.get('csv'), b'1.0,2.0,3.0\n' * 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
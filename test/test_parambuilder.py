@@ -23,7 +23,11 @@ PROVS = ['vic', 'Victoria', 'sa', 'South Australia', 'nsw', 'New South Wales', '
                      'Queensland']
 
 OPTS = ['bbox', 'polygon', 'depths', 'wfs_url', 'nvcl_url',
-                   'max_boreholes', 'use_cql', 'cache_path']
+                   'max_boreholes', 'use_cql', 'cache_path', 'pool_connections', 'pool_maxsize',
+                   'max_workers', 'max_concurrent', 'rate_limit', 'cache_backend', 'mem_cache_size',
+                   'cache_ttl', 'cache_max_size', 'cache_policy', 'cache_compression',
+                   'cache_stale_window', 'cache_negative_ttl', 'use_json', 'compact_records',
+                   'borehole_data_engine']
 
 
 class TestParamBuilder(unittest.TestCase):
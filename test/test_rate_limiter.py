@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from nvcl_kit.rate_limiter import RateLimiter, get_limiter
+from nvcl_kit.reader import NVCLReader
+
+from helpers import setup_param_obj, setup_reader, setup_urlopen
+
+'''
+Tests for the rate_limiter module
+'''
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_no_limits(self):
+        ''' Tests that no limiter is made if there are no limits
+        '''
+        self.assertIsNone(get_limiter('blah'))
+
+    def test_shared(self):
+        ''' Tests that limiters are shared per provider
+        '''
+        self.assertIs(get_limiter('blah', 2, 5.0), get_limiter('blah', 2, 5.0))
+        self.assertIsNot(get_limiter('blah', 2, 5.0), get_limiter('other', 2, 5.0))
+
+    def test_max_concurrent(self):
+        ''' Tests that the number of requests in flight is limited
+        '''
+        limiter = RateLimiter(max_concurrent=2)
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'max_in_flight': 0}
+
+        def request():
+            with limiter:
+                with lock:
+                    state['in_flight'] += 1
+                    state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+                time.sleep(0.01)
+                with lock:
+                    state['in_flight'] -= 1
+
+        threads = [threading.Thread(target=request) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(state['max_in_flight'], 2)
+
+    def test_rate_limit(self):
+        ''' Tests that the token bucket spaces out requests once the burst is used up
+        '''
+        limiter = RateLimiter(rate_limit=10.0, burst=2)
+        with patch('nvcl_kit.rate_limiter.time.sleep') as mock_sleep:
+            for i in range(4):
+                with limiter:
+                    pass
+            delays = [c.args[0] for c in mock_sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        self.assertAlmostEqual(delays[0], 0.1, places=2)
+        self.assertAlmostEqual(delays[1], 0.2, places=2)
+
+    def test_async(self):
+        ''' Tests the limiter in coroutines
+        '''
+        limiter = RateLimiter(max_concurrent=1, rate_limit=1000.0)
+        state = {'in_flight': 0, 'max_in_flight': 0}
+
+        async def request():
+            async with limiter:
+                state['in_flight'] += 1
+                state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+                await asyncio.sleep(0.001)
+                state['in_flight'] -= 1
+
+        async def main():
+            await asyncio.gather(*[request() for i in range(5)])
+
+        asyncio.run(main())
+        self.assertEqual(state['max_in_flight'], 1)
+
+    def test_async_wake(self):
+        ''' Tests that waiting coroutines are woken by 'release()' from a coroutine or a thread,
+            without polling, and that a cancelled waiter does not keep a wake-up
+        '''
+        limiter = RateLimiter(max_concurrent=1)
+
+        async def main():
+            limiter.acquire()
+            order = []
+
+            async def request(name):
+                async with limiter:
+                    order.append(name)
+
+            tasks = [asyncio.create_task(request(name)) for name in ['a', 'b', 'c']]
+            await asyncio.sleep(0)
+            self.assertEqual(len(limiter._waiters), 3)
+            # Release from a thread, then cancel the waiter it woke before it runs
+            release_thread = threading.Thread(target=limiter.release)
+            release_thread.start()
+            release_thread.join()
+            tasks[0].cancel()
+            with patch('nvcl_kit.rate_limiter.asyncio.sleep') as mock_sleep:
+                start = time.monotonic()
+                await asyncio.gather(*tasks[1:])
+                self.assertLess(time.monotonic() - start, 0.05)
+                mock_sleep.assert_not_called()
+            self.assertTrue(tasks[0].cancelled())
+            self.assertEqual(order, ['b', 'c'])
+
+        asyncio.run(main())
+        # No permit was leaked
+        self.assertTrue(limiter._semaphore.acquire(blocking=False))
+        limiter.release()
+        self.assertEqual(len(limiter._waiters), 0)
+
+    def test_async_threads(self):
+        ''' Tests that the limit applies to threads and coroutines together
+        '''
+        limiter = RateLimiter(max_concurrent=2)
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'max_in_flight': 0}
+
+        def enter():
+            with lock:
+                state['in_flight'] += 1
+                state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+
+        def leave():
+            with lock:
+                state['in_flight'] -= 1
+
+        def thread_request():
+            with limiter:
+                enter()
+                time.sleep(0.005)
+                leave()
+
+        async def request():
+            async with limiter:
+                enter()
+                await asyncio.sleep(0.005)
+                leave()
+
+        async def main():
+            await asyncio.gather(*[request() for i in range(8)],
+                                 *[asyncio.to_thread(thread_request) for i in range(4)])
+
+        asyncio.run(main())
+        self.assertEqual(state['max_in_flight'], 2)
+        self.assertEqual(len(limiter._waiters), 0)
+
+    def test_reader_limiter(self):
+        ''' Tests that the reader passes the provider's limiter to the NVCL service interface
+        '''
+        rdr = setup_reader()
+        self.assertIsNone(rdr.svc.limiter)
+        param_obj = setup_param_obj()
+        param_obj.MAX_CONCURRENT = 3
+        param_obj.RATE_LIMIT = 20.0
+        with patch('nvcl_kit.wfs_helpers.make_cql_request', return_value=[]) as mock_cql:
+            rdr = NVCLReader(param_obj)
+        self.assertIs(rdr.svc.limiter, get_limiter('blah', 3, 20.0))
+        self.assertIs(mock_cql.call_args.args[4], rdr.svc.limiter)
+        dataset_id_list = setup_urlopen('get_datasetid_list', {'nvcl_id': 'blah'}, 'dataset_coll.txt', rdr=rdr)
+        self.assertEqual(len(dataset_id_list), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
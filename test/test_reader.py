@@ -1,7 +1,13 @@
 #!/usr/bin/env python3
 import sys, os
-import glob
 import random
+import shutil
+import tempfile
+import time
+import threading
+import hashlib
+import gzip
+from http.server import BaseHTTPRequestHandler
 import unittest
 import json
 import urllib3  # Used for WFS Feature request retries
@@ -17,8 +23,14 @@ from shapely import Polygon, LinearRing
 from types import SimpleNamespace
 
 from nvcl_kit.reader import NVCLReader
+from nvcl_kit.svc_interface import _ServiceInterface
+from nvcl_kit.transfer_stats import TransferStats
+from nvcl_kit.xml_helpers import iterparse_elements
+from nvcl_kit.dataset_collection import DatasetCollection, DatasetCatalogue, RECORD_TYPES, iter_dataset_collection
+from nvcl_kit.records import BoreholeRecord, LogRecord, SpectralLogRecord, ProfilometerLogRecord, TrayDepth, MineralPoint, COMPACT_TYPES, record_dict
+from nvcl_kit.borehole_data import np, numpy_borehole_data
 
-from helpers import setup_param_obj, setup_reader, setup_urlopen, setup_reqs_obj
+from helpers import setup_param_obj, setup_reader, setup_urlopen, setup_reqs_obj, start_http_server
 
 MAX_BOREHOLES = 6
 
@@ -79,6 +91,18 @@ class TestNVCLReader(unittest.TestCase):
         self.try_input_param(param_obj, "'MAX_BOREHOLES' parameter is not an integer")
 
 
+    def test_bad_max_workers_param(self):
+        ''' Tests that if has a bad 'MAX_WORKERS' parameter it issues a
+            warning message and returns wfs attribute as None
+        '''
+        param_obj = SimpleNamespace()
+        param_obj.NVCL_URL = "https://blah.blah.blah/nvcl/NVCLDataServices"
+        param_obj.WFS_URL = "http://blah.blah.blah/nvcl/geoserver/wfs"
+        param_obj.MAX_WORKERS = 0
+        param_obj.PROV = "blah"
+        self.try_input_param(param_obj, "'MAX_WORKERS' parameter is not a positive integer")
+
+
     def test_bad_bbox_param1(self):
         ''' Tests that if has a bad 'BBOX' parameter it issues a
             warning message and returns wfs attribute as None
@@ -195,6 +219,42 @@ class TestNVCLReader(unittest.TestCase):
         self.try_input_param(param_obj, "'USE_CQL' parameter is not boolean")
 
 
+    def test_bad_use_json_param(self):
+        ''' Tests that if the 'USE_JSON' is a bad value it issues a
+            warning message and returns wfs attribute as None
+        '''
+        param_obj = SimpleNamespace()
+        param_obj.NVCL_URL = "https://blah.blah.blah/nvcl/NVCLDataServices"
+        param_obj.USE_JSON = "True"
+        param_obj.WFS_URL = "http://blah.blah.blah/nvcl/geoserver/wfs"
+        param_obj.PROV = "blah"
+        self.try_input_param(param_obj, "'USE_JSON' parameter is not boolean")
+
+
+    def test_bad_compact_records_param(self):
+        ''' Tests that if the 'COMPACT_RECORDS' is a bad value it issues a
+            warning message and returns wfs attribute as None
+        '''
+        param_obj = SimpleNamespace()
+        param_obj.NVCL_URL = "https://blah.blah.blah/nvcl/NVCLDataServices"
+        param_obj.COMPACT_RECORDS = 1
+        param_obj.WFS_URL = "http://blah.blah.blah/nvcl/geoserver/wfs"
+        param_obj.PROV = "blah"
+        self.try_input_param(param_obj, "'COMPACT_RECORDS' parameter is not boolean")
+
+
+    def test_bad_borehole_data_engine_param(self):
+        ''' Tests that if the 'BOREHOLE_DATA_ENGINE' is a bad value it issues a
+            warning message and returns wfs attribute as None
+        '''
+        param_obj = SimpleNamespace()
+        param_obj.NVCL_URL = "https://blah.blah.blah/nvcl/NVCLDataServices"
+        param_obj.BOREHOLE_DATA_ENGINE = "blah"
+        param_obj.WFS_URL = "http://blah.blah.blah/nvcl/geoserver/wfs"
+        param_obj.PROV = "blah"
+        self.try_input_param(param_obj, "'BOREHOLE_DATA_ENGINE' parameter is not one of")
+
+
     def wfs_exception_tester(self, mock_reqs, excep, msg):
         ''' Creates an exception in requests get()
             and tests to see that the correct warning message is generated
@@ -420,32 +480,680 @@ class TestNVCLReader(unittest.TestCase):
     @unittest.mock.patch('nvcl_kit.cql_filter.requests.Session.get')
     def test_cache(self, mock_get):
         ''' Test CACHE_PATH option
-            Tests for existence of both forms of the cache file
+            Tests for existence of the sharded cache file, for short and long request URLs,
+            and that the second request is read from cache
+        '''
+        for log_id in ['dummy-id', 'dummy-id-' + 'x' * 300]:
+            with self.subTest(log_id=log_id[:20]):
+                cache_path = 'tmp-' + ''.join([chr(random.randint(65, 90)) for x in range(10) ])
+                key = 'https://blah.blah.blah/nvcl/NVCLDataServices/getDownsampledData.html?enddepth=10000&interval=10&' \
+                      f'logid={log_id}&outputformat=json&startdepth=0'
+                digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+                tmp_file = os.path.join(cache_path, digest[:2], digest[2:4], digest)
+                try:
+                    with open('full_wfs_cql.json') as fp:
+                        reqs_obj = mock_get.return_value
+                        reqs_obj = setup_reqs_obj(fp, reqs_obj)
+                        # Setup params for NVCLReader() with CACHE_PATH set
+                        param_obj = setup_param_obj(max_boreholes=0, cache_path=cache_path)
+                        rdr = NVCLReader(param_obj)
+                        self.assertFalse(os.path.exists(tmp_file))
+                        # Calls '_get_response_str()' which will create a cache file
+                        bh_data = setup_urlopen('get_borehole_data',
+                                      {'log_id':log_id, 'height_resol':10.0, 'class_name':"dummy-class"},
+                                      'bh_data.txt',
+                                      rdr=rdr)
+                        # Test for existence of cache file, and no temporary files
+                        self.assertTrue(os.path.isfile(tmp_file))
+                        file_list = [os.path.join(dp, f) for dp, dn, fn in os.walk(cache_path) for f in fn]
+                        self.assertEqual(file_list, [tmp_file])
+                        # Test that second request is read from cache file
+                        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+                            cached_data = rdr.get_borehole_data(log_id, 10.0, "dummy-class")
+                            mock_post.assert_not_called()
+                        self.assertEqual(len(cached_data), len(bh_data))
+                finally:
+                    # Remove cache folder
+                    shutil.rmtree(cache_path, ignore_errors=True)
+
+
+    @unittest.mock.patch('nvcl_kit.cql_filter.requests.Session.get')
+    def test_sqlite_cache(self, mock_get):
+        ''' Test CACHE_BACKEND option set to 'sqlite'
+            Tests that responses are stored in one database file and the second request is read from cache
         '''
-        temp_short = 'tmp-' + ''.join([chr(random.randint(65, 90)) for x in range(10) ])
-        temp_long = 'tmp-' + ''.join([chr(random.randint(65, 90)) for x in range(100) ])
-        with open('full_wfs_cql.json') as fp:
-            for cache_path, tmp_file in [
-                               # Test when parameters are incorporated in filename
-                               (temp_short, temp_short + 'https%3A%2F%2Fblah.blah.blah%2Fnvcl%2FNVCLDataServices%2FgetDownsampledData.html%3Flogid%3Ddummy-id%26interval%3D10.0%26outputformat%3Djson%26startdepth%3D0.0%26enddepth%3D10000.0.txt'),
-                               # Test when parameters are hashed because filename is too long
-                               (temp_long, temp_long + 'https%3A%2F%2Fblah.blah.blah%2Fnvcl%2FNVCLDataServices%2FgetDownsampledData.html%3F6024443c534411d094f0cc87b78b708c2c7f4b14.txt')]:
+        cache_path = 'tmp-' + ''.join([chr(random.randint(65, 90)) for x in range(10) ]) + '.sqlite3'
+        try:
+            with open('full_wfs_cql.json') as fp:
                 reqs_obj = mock_get.return_value
                 reqs_obj = setup_reqs_obj(fp, reqs_obj)
-                # Setup params for NVCLReader() with CACHE_PATH set
-                param_obj = setup_param_obj(max_boreholes=0, cache_path=cache_path)
+                param_obj = setup_param_obj(max_boreholes=0, cache_path=cache_path, cache_backend='sqlite')
                 rdr = NVCLReader(param_obj)
-                # Calls '_get_response_str()' which will create a cache file
-                setup_urlopen('get_borehole_data',
+                bh_data = setup_urlopen('get_borehole_data',
                               {'log_id':"dummy-id", 'height_resol':10.0, 'class_name':"dummy-class"},
                               'bh_data.txt',
                               rdr=rdr)
-                # Test for existence of cache file
-                dir_list = glob.glob("tmp-*")
-                self.assertEqual(dir_list[0], tmp_file)
-                self.assertEqual(len(dir_list), 1)
-                # Remove cache file
-                os.remove(tmp_file)
+                self.assertTrue(os.path.isfile(cache_path))
+                with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+                    cached_data = rdr.get_borehole_data("dummy-id", 10.0, "dummy-class")
+                    mock_post.assert_not_called()
+                self.assertEqual(len(cached_data), len(bh_data))
+                rdr.svc.cache.close()
+        finally:
+            for suffix in ['', '-wal', '-shm']:
+                if os.path.exists(cache_path + suffix):
+                    os.remove(cache_path + suffix)
+
+
+    def test_mem_cache(self):
+        ''' Tests that repeated requests are read from the in-memory cache and failures are not cached
+        '''
+        param_obj = setup_param_obj()
+        param_obj.MEM_CACHE_SIZE = 1024 * 1024
+        rdr = NVCLReader(param_obj, skip_bhlist=True)
+        ds_list = setup_urlopen('get_datasetid_list', {'nvcl_id':'blah'}, 'dataset_coll.txt', rdr=rdr)
+        self.assertEqual(rdr.get_cache_stats().misses, 1)
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            # Clear the parsed dataset collections, so the responses are read from the cache
+            rdr.dataset_colls.clear()
+            self.assertEqual(rdr.get_datasetid_list('blah'), ds_list)
+            rdr.dataset_colls.clear()
+            self.assertEqual(len(rdr.get_logs_data('blah')), 70)
+            mock_post.assert_not_called()
+        stats = rdr.get_cache_stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (2, 1, 1))
+        self.assertGreater(stats.size, 0)
+        # Failed requests are not cached
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value.status_code = 500
+            self.assertEqual(rdr.get_datasetid_list('other'), [])
+            self.assertEqual(rdr.get_datasetid_list('other'), [])
+            self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(rdr.get_cache_stats().entries, 1)
+
+
+    def test_mem_cache_disabled(self):
+        ''' Tests the MEM_CACHE_SIZE parameter, the in-memory cache is disabled by default
+        '''
+        rdr = NVCLReader(setup_param_obj(), skip_bhlist=True)
+        self.assertIsNone(rdr.get_cache_stats())
+        param_obj = setup_param_obj()
+        param_obj.MEM_CACHE_SIZE = 0
+        rdr = NVCLReader(param_obj, skip_bhlist=True)
+        self.assertIsNone(rdr.get_cache_stats())
+        param_obj = setup_param_obj()
+        param_obj.MEM_CACHE_SIZE = -1
+        with self.assertLogs('nvcl_kit.reader', level='WARN') as nvcl_log:
+            rdr = NVCLReader(param_obj, skip_bhlist=True)
+            self.assertIn("'MEM_CACHE_SIZE' parameter is not a non-negative integer", nvcl_log.output[0])
+
+
+    def test_uncached_endpoints(self):
+        ''' Tests that the download and status services are never read from or written to the caches
+        '''
+        cache_path = tempfile.mkdtemp(prefix='tmp-cache-')
+        self.addCleanup(shutil.rmtree, cache_path, ignore_errors=True)
+        param_obj = setup_param_obj(cache_path=cache_path)
+        param_obj.MEM_CACHE_SIZE = 1024 * 1024
+        rdr = NVCLReader(param_obj, skip_bhlist=True)
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value = Mock(status_code=200, content=b'<status/>', headers={})
+            for _ in range(2):
+                self.assertEqual(rdr.svc.get_download_tsg_status('a@b.c'), b'<status/>')
+                self.assertEqual(rdr.svc.download_tsg('a@b.c', 'X'), b'<status/>')
+                self.assertEqual(rdr.svc.download_wfs_status('a@b.c'), b'<status/>')
+                self.assertEqual(rdr.svc.download_wfs('a@b.c', 'X', {}), b'<status/>')
+            self.assertEqual(mock_post.call_count, 8)
+        self.assertEqual(rdr.get_cache_stats().entries, 0)
+        self.assertEqual(rdr.get_cache_key_stats().lookups, 0)
+        self.assertEqual([f for dp, dn, fn in os.walk(cache_path) for f in fn], [])
+
+
+    def test_cache_policy_params(self):
+        ''' Tests the CACHE_TTL, CACHE_MAX_SIZE, CACHE_POLICY, CACHE_STALE_WINDOW and CACHE_NEGATIVE_TTL parameters and pruning the cache
+        '''
+        for attr, val, msg in [('CACHE_TTL', 'blah', "'CACHE_TTL' parameter is not a number of seconds or a dict of seconds"),
+                               ('CACHE_TTL', {'getDatasetCollection': -1}, "'CACHE_TTL' parameter is not a number of seconds"),
+                               ('CACHE_MAX_SIZE', 0, "'CACHE_MAX_SIZE' parameter is not a positive integer"),
+                               ('CACHE_POLICY', 'fifo', "'CACHE_POLICY' parameter is not one of"),
+                               ('CACHE_STALE_WINDOW', -1, "'CACHE_STALE_WINDOW' parameter is not a non-negative number"),
+                               ('CACHE_NEGATIVE_TTL', 'blah', "'CACHE_NEGATIVE_TTL' parameter is not a non-negative number")]:
+            param_obj = setup_param_obj()
+            setattr(param_obj, attr, val)
+            with self.assertLogs('nvcl_kit.reader', level='WARN') as nvcl_log:
+                NVCLReader(param_obj, skip_bhlist=True)
+                self.assertIn(msg, nvcl_log.output[0])
+        cache_path = tempfile.mkdtemp(prefix='tmp-cache-')
+        self.addCleanup(shutil.rmtree, cache_path, ignore_errors=True)
+        param_obj = setup_param_obj(cache_path=cache_path)
+        param_obj.CACHE_TTL = {'getDatasetCollection': 60}
+        param_obj.CACHE_MAX_SIZE = 1000000
+        param_obj.CACHE_POLICY = 'lfu'
+        rdr = NVCLReader(param_obj, skip_bhlist=True)
+        self.assertEqual((rdr.svc.cache.ttl, rdr.svc.cache.max_size, rdr.svc.cache.policy),
+                         ({'getDatasetCollection': 60}, 1000000, 'lfu'))
+        setup_urlopen('get_datasetid_list', {'nvcl_id':'blah'}, 'dataset_coll.txt', rdr=rdr)
+        self.assertEqual(rdr.prune_cache(), 0)
+        with unittest.mock.patch('nvcl_kit.cache.time.time', return_value=time.time() + 61.0):
+            # Expired in memory and on disk
+            entry = rdr.svc._read_cache(rdr.svc._cache_key(rdr.svc.NVCL_URL + '/getDatasetCollection.html',
+                                                           b'holeidentifier=blah'))
+            self.assertTrue(entry.expired)
+            self.assertEqual(rdr.prune_cache(), 1)
+        rdr.vacuum_cache()
+        self.assertEqual(os.listdir(cache_path), [])
+
+
+    def test_http_compression(self):
+        ''' Tests that compressed responses are requested, decompressed and counted
+        '''
+        body = b'<DatasetCollection>' + b'<Dataset><DatasetID>a4c1ed7f</DatasetID></Dataset>' * 500 + b'</DatasetCollection>'
+        headers_seen = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                headers_seen.append(self.headers['Accept-Encoding'])
+                gz_body = gzip.compress(body)
+                self.send_response(200)
+                self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(gz_body)))
+                self.end_headers()
+                self.wfile.write(gz_body)
+
+            def log_message(self, *args):
+                pass
+
+        base_url = start_http_server(self, Handler)
+        stats = TransferStats()
+        svc = _ServiceInterface(base_url + '/NVCLDataServices', 2, stats=stats,
+                                mem_cache_size=0)
+        self.assertEqual(svc.get_dataset_collection('blah'), body)
+        self.assertIn('gzip', headers_seen[0])
+        counts = stats.snapshot()
+        self.assertEqual(counts.requests, 1)
+        self.assertEqual(counts.bytes_decoded, len(body))
+        self.assertLess(counts.bytes_received, len(body) / 10)
+
+
+    def test_conditional_revalidation(self):
+        ''' Tests that expired cache entries are revalidated with conditional GET requests
+        '''
+        bodies = {'"v1"': b'<DatasetCollection>v1</DatasetCollection>'}
+        current = ['"v1"']
+        requests_seen = []
+        get_paths = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def send_body(self):
+                body = bodies[current[0]]
+                self.send_response(200)
+                self.send_header('ETag', current[0])
+                self.send_header('Last-Modified', 'Wed, 21 Oct 2015 07:28:00 GMT')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                requests_seen.append(('POST', None))
+                self.send_body()
+
+            def do_GET(self):
+                requests_seen.append(('GET', self.headers['If-None-Match']))
+                get_paths.append(self.path)
+                if self.headers['If-None-Match'] == current[0]:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_body()
+
+            def log_message(self, *args):
+                pass
+
+        base_url = start_http_server(self, Handler)
+        for backend in ['file', 'sqlite']:
+            with self.subTest(backend=backend):
+                requests_seen.clear()
+                current[0] = '"v1"'
+                cache_path = tempfile.mkdtemp(prefix='tmp-cache-')
+                self.addCleanup(shutil.rmtree, cache_path, ignore_errors=True)
+                svc = _ServiceInterface(base_url + '/NVCLDataServices', 2, cache_path=cache_path, cache_backend=backend,
+                                        cache_ttl=60, mem_cache_size=0)
+                self.assertEqual(svc.get_dataset_collection('blah'), bodies['"v1"'])
+                # Fresh entry, no request is sent
+                self.assertEqual(svc.get_dataset_collection('blah'), bodies['"v1"'])
+                self.assertEqual(requests_seen, [('POST', None)])
+                key = svc._cache_key(svc.NVCL_URL + '/getDatasetCollection.html', b'holeidentifier=blah')
+                stored_at = svc.cache.get_entry(key).stored_at
+                with unittest.mock.patch('nvcl_kit.cache.time.time', return_value=time.time() + 61.0):
+                    # Expired entry is revalidated, '304 Not Modified' refreshes it
+                    self.assertEqual(svc.get_dataset_collection('blah'), bodies['"v1"'])
+                    self.assertEqual(requests_seen[-1], ('GET', '"v1"'))
+                    self.assertEqual(get_paths[-1], '/NVCLDataServices/getDatasetCollection.html?holeidentifier=blah')
+                    entry = svc.cache.get_entry(key)
+                    self.assertFalse(entry.expired)
+                    self.assertGreater(entry.stored_at, stored_at)
+                # Modified response replaces the entry
+                current[0] = '"v2"'
+                bodies['"v2"'] = b'<DatasetCollection>v2</DatasetCollection>'
+                with unittest.mock.patch('nvcl_kit.cache.time.time', return_value=time.time() + 200.0):
+                    self.assertEqual(svc.get_dataset_collection('blah'), bodies['"v2"'])
+                    self.assertEqual(requests_seen[-1], ('GET', '"v1"'))
+                self.assertEqual(svc.cache.get_entry(key).validators['etag'], '"v2"')
+                self.assertEqual(len(requests_seen), 3)
+
+
+    def test_dataset_collection_memo(self):
+        ''' Tests that the dataset collection getters share one request and one parse per borehole
+        '''
+        rdr = setup_reader()
+        setup_urlopen('get_datasetid_list', {'nvcl_id':'blah'}, 'dataset_coll.txt', rdr=rdr)
+        coll = rdr.get_dataset_collection('blah')
+        self.assertTrue(coll.is_valid())
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post, \
+                unittest.mock.patch('nvcl_kit.dataset_collection.clean_xml_parse') as mock_parse:
+            self.assertEqual(len(rdr.get_dataset_list('blah')), 1)
+            self.assertEqual(len(rdr.get_logs_data('blah')), 70)
+            self.assertEqual(len(rdr.get_imagelog_data('blah')), len(coll.image_logs()))
+            rdr.get_spectrallog_data('blah')
+            rdr.get_profilometer_data('blah')
+            mock_post.assert_not_called()
+            mock_parse.assert_not_called()
+        self.assertIs(rdr.get_dataset_collection('blah'), coll)
+        # Returned lists and records are copies
+        rdr.get_logs_data('blah').clear()
+        self.assertEqual(len(rdr.get_logs_data('blah')), 70)
+        log_list = rdr.get_logs_data('blah')
+        log_list[0].log_name = 'changed'
+        log_list[0].extra = 'blah'
+        self.assertNotEqual(rdr.get_logs_data('blah')[0].log_name, 'changed')
+        self.assertFalse(hasattr(rdr.get_logs_data('blah')[0], 'extra'))
+        # Failed requests are not memoised
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value.status_code = 500
+            self.assertEqual(rdr.get_logs_data('other'), [])
+            self.assertIsNone(rdr.dataset_colls.get('other'))
+        # Least recently used are evicted
+        rdr.dataset_colls.max_entries = 1
+        rdr.dataset_colls.put('other', coll)
+        self.assertIsNone(rdr.dataset_colls.get('blah'))
+        self.assertEqual(len(rdr.dataset_colls), 1)
+
+
+    def test_dataset_collection_memo_ttl(self):
+        ''' Tests that memoised dataset collections expire with the cached responses
+        '''
+        param_obj = setup_param_obj()
+        param_obj.CACHE_TTL = {'getDatasetCollection': 60, '*': None}
+        rdr = NVCLReader(param_obj, skip_bhlist=True)
+        self.assertEqual(rdr.dataset_colls.ttl, 60)
+        setup_urlopen('get_datasetid_list', {'nvcl_id':'blah'}, 'dataset_coll.txt', rdr=rdr)
+        self.assertIsNotNone(rdr.dataset_colls.get('blah'))
+        with unittest.mock.patch('nvcl_kit.cache.time.time', return_value=time.time() + 61.0):
+            self.assertIsNone(rdr.dataset_colls.get('blah'))
+
+
+    def test_streaming_getters(self):
+        ''' Tests that the streaming 'iter_*' methods yield the same records as their 'get_*' counterparts
+        '''
+        def records(rdr, fn, arg, src_file):
+            with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+                with open(src_file, 'rb') as fp:
+                    mock_post.return_value = Mock(status_code=200, content=fp.read(), headers={})
+                return [r if isinstance(r, str) else record_dict(r) for r in getattr(rdr, fn)(arg)]
+
+        for src_file in ['dataset_coll.txt', 'dataset_coll_time.txt', 'dataset_coll_empty.txt']:
+            for name in ['datasetid_list', 'dataset_list', 'logs_data', 'imagelog_data', 'spectrallog_data',
+                         'profilometer_data']:
+                with self.subTest(src_file=src_file, name=name):
+                    expected = records(setup_reader(), 'get_' + name, 'blah', src_file)
+                    rdr = setup_reader()
+                    self.assertEqual(records(rdr, 'iter_' + name, 'blah', src_file), expected)
+                    # Streamed responses are not memoised
+                    self.assertEqual(len(rdr.dataset_colls), 0)
+        expected = records(setup_reader(), 'get_scalar_logs', 'blah', 'logcoll_scalar.txt')
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(records(setup_reader(), 'iter_scalar_logs', 'blah', 'logcoll_scalar.txt'), expected)
+        # Memoised dataset collection is used
+        rdr = setup_reader()
+        setup_urlopen('get_logs_data', {'nvcl_id':'blah'}, 'dataset_coll.txt', rdr=rdr)
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            self.assertEqual(len(list(rdr.iter_logs_data('blah'))), 70)
+            mock_post.assert_not_called()
+
+
+    def test_iterparse_elements(self):
+        ''' Tests parsing XML incrementally
+        '''
+        xml_str = '<a><b><c>1</c><d>x</d><c>2</c></b><e><c>3</c></e><b><c>4</c></b></a>'
+        self.assertEqual([el.text for el in iterparse_elements(xml_str, ('b', 'c'))], ['1', '2', '4'])
+        self.assertEqual([el.text for el in iterparse_elements(xml_str, ('*', 'c'))], ['1', '2', '3', '4'])
+        self.assertEqual([el.findtext('c') for el in iterparse_elements(xml_str.encode(), ('b',))], ['1', '4'])
+        # XML which is cut short after an element was yielded raises an exception
+        elems = []
+        with self.assertLogs('nvcl_kit.xml_helpers', level='WARN') as nvcl_log:
+            with self.assertRaises(ValueError):
+                elems.extend(el.text for el in iterparse_elements('<a><b>1</b><b>2</b', ('b',)))
+            self.assertIn('XML ended badly after 1 elements', nvcl_log.output[0])
+        self.assertEqual(elems, ['1'])
+        # Badly-formatted XML yields nothing
+        with self.assertLogs('nvcl_kit.xml_helpers', level='WARN') as nvcl_log:
+            self.assertEqual(list(iterparse_elements('blah', ('b',))), [])
+            self.assertIn('Cannot parse XML', nvcl_log.output[0])
+
+    def test_iter_truncated_response(self):
+        ''' Tests that a truncated response is not mistaken for a complete one by the streaming methods
+        '''
+        with open('dataset_coll.txt', 'rb') as fp:
+            response = fp.read()
+        truncated = response[:response.index(b'</Log>', len(response) // 2)]
+        rdr = setup_reader()
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value = Mock(status_code=200, content=truncated, headers={})
+            log_list = []
+            with self.assertLogs('nvcl_kit.xml_helpers', level='WARN'):
+                with self.assertRaises(ValueError):
+                    log_list.extend(rdr.iter_logs_data('blah'))
+            self.assertEqual(log_list, [])
+            with self.assertLogs('nvcl_kit.xml_helpers', level='WARN'):
+                with self.assertRaises(ValueError):
+                    list(rdr.iter_datasetid_list('blah'))
+
+
+    def test_dataset_catalogue(self):
+        ''' Tests that the dataset catalogue is loaded in one request and answers the dataset getters
+        '''
+        catalogue_xml = b'''<DatasetCollection>
+<Dataset><DatasetID>ds-1</DatasetID><boreholeURI>http://blah/resource/feature/blah/borehole/6315</boreholeURI>
+<DatasetName>6315_HP4</DatasetName><createdDate>2020-01-01T00:00:00Z</createdDate></Dataset>
+<Dataset><DatasetID>ds-2</DatasetID><boreholeURI>http://blah/resource/feature/blah/borehole/6315</boreholeURI>
+<DatasetName>6315_HP5</DatasetName></Dataset>
+<Dataset><DatasetID>ds-3</DatasetID><boreholeURI>http://blah/resource/feature/blah/borehole/RKD005</boreholeURI></Dataset>
+<Dataset><DatasetID>ds-4</DatasetID></Dataset>
+</DatasetCollection>'''
+        rdr = setup_reader()
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value = Mock(status_code=200, content=catalogue_xml, headers={})
+            catalogue = rdr.load_dataset_catalogue()
+            self.assertEqual(mock_post.call_args.kwargs['data'], b'holeidentifier=all&headersOnly=yes')
+            self.assertTrue(catalogue.is_valid())
+            self.assertEqual(catalogue.nvcl_ids(), ['6315', 'RKD005'])
+            self.assertEqual(rdr.get_datasetid_list('6315'), ['ds-1', 'ds-2'])
+            self.assertEqual(rdr.get_datasetid_list('RKD005'), ['ds-3'])
+            ds_list = rdr.get_dataset_list('6315')
+            self.assertEqual([ds.dataset_name for ds in ds_list], ['6315_HP4', '6315_HP5'])
+            self.assertEqual(ds_list[0].created_date.year, 2020)
+            self.assertEqual(list(rdr.iter_datasetid_list('6315')), ['ds-1', 'ds-2'])
+            # Dataset without a name is not a dataset object
+            self.assertEqual(rdr.get_dataset_list('RKD005'), [])
+            self.assertEqual(mock_post.call_count, 1)
+        # Borehole whose nvcl id is not the end of its borehole URI is requested separately
+        ds_list = setup_urlopen('get_datasetid_list', {'nvcl_id':'blah'}, 'dataset_coll.txt', rdr=rdr)
+        self.assertEqual(ds_list, ['a4c1ed7f-1e87-444a-90ae-3fe5abf9081'])
+        self.assertEqual(len(rdr.get_dataset_list('blah')), 1)
+        self.assertEqual(list(rdr.iter_datasetid_list('blah')), ['a4c1ed7f-1e87-444a-90ae-3fe5abf9081'])
+        # Failed request keeps the previous catalogue
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value = Mock(status_code=200, content=b'not xml', headers={})
+            with self.assertLogs('nvcl_kit.reader', level='WARN') as nvcl_log:
+                self.assertFalse(rdr.load_dataset_catalogue().is_valid())
+                self.assertIn('Cannot load dataset catalogue', nvcl_log.output[0])
+        self.assertIs(rdr.dataset_catalogue, catalogue)
+        # Expired catalogue is not used
+        rdr.dataset_colls.ttl = 60
+        with unittest.mock.patch('nvcl_kit.reader.time.time', return_value=time.time() + 61.0):
+            ds_list = setup_urlopen('get_datasetid_list', {'nvcl_id':'6315'}, 'dataset_coll.txt', rdr=rdr)
+            self.assertEqual(ds_list, ['a4c1ed7f-1e87-444a-90ae-3fe5abf9081'])
+        self.assertIsNone(rdr.dataset_catalogue)
+
+
+    def test_json_collections(self):
+        ''' Tests that JSON dataset and log collections give the same records as XML
+        '''
+        def records(lst):
+            return [r if isinstance(r, str) else record_dict(r) for r in lst]
+
+        for xml_file, json_file in [('dataset_coll_time.txt', 'dataset_coll.json'),
+                                    ('logcoll_scalar.txt', 'logcoll_scalar.json'),
+                                    ('logcoll_mosaic.txt', 'logcoll_mosaic.json')]:
+            with open(xml_file, 'rb') as fp:
+                xml_resp = fp.read()
+            with open(json_file, 'rb') as fp:
+                json_resp = fp.read()
+            with self.subTest(json_file=json_file):
+                if json_file == 'dataset_coll.json':
+                    xml_coll, json_coll = DatasetCollection(xml_resp), DatasetCollection(json_resp)
+                    self.assertTrue(json_coll.is_valid())
+                    for record_type in RECORD_TYPES:
+                        expected = records(getattr(xml_coll, record_type)())
+                        self.assertEqual(records(getattr(json_coll, record_type)()), expected)
+                        self.assertEqual(records(iter_dataset_collection(json_resp, record_type)), expected)
+                    self.assertEqual(DatasetCatalogue(json_resp).datasets('1552'), xml_coll.datasets())
+                elif json_file == 'logcoll_scalar.json':
+                    expected = records(NVCLReader._parse_scalar_logs(xml_resp))
+                    self.assertGreater(len(expected), 0)
+                    self.assertEqual(records(NVCLReader._parse_scalar_logs(json_resp)), expected)
+                    self.assertEqual(records(NVCLReader._iter_scalar_logs(json_resp)), expected)
+                else:
+                    expected = records(NVCLReader._parse_mosaic_logs(xml_resp))
+                    self.assertEqual(records(NVCLReader._parse_mosaic_logs(json_resp)), expected)
+        # Wrapped JSON objects, single objects and dates in milliseconds
+        coll = DatasetCollection(b'''{"DatasetCollection": {"Dataset": {"DatasetID": "ds-1", "DatasetName": "blah",
+                                      "createdDate": 1577836800000, "Logs": {"Log": {"LogID": "log-1", "logName": "Tray"}}}}}''')
+        self.assertEqual(coll.dataset_ids(), ['ds-1'])
+        self.assertEqual(coll.datasets()[0].created_date, datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        self.assertEqual([log.log_id for log in coll.logs()], ['log-1'])
+        self.assertFalse(DatasetCollection(b'[{"blah"').is_valid())
+
+
+    def test_json_fallback(self):
+        ''' Tests that collections are requested as JSON when 'USE_JSON' is set and as XML when the provider
+            does not return JSON
+        '''
+        rdr = setup_reader()
+        self.assertFalse(rdr.use_json)
+        rdr.use_json = True
+        with open('dataset_coll.json', 'rb') as fp:
+            json_resp = fp.read()
+        with open('dataset_coll_time.txt', 'rb') as fp:
+            xml_resp = fp.read()
+        n_logs = len(DatasetCollection(xml_resp).logs())
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value = Mock(status_code=200, content=json_resp, headers={})
+            self.assertEqual(len(rdr.get_logs_data('blah')), n_logs)
+            self.assertEqual(mock_post.call_count, 1)
+            self.assertEqual(mock_post.call_args.kwargs['data'], b'holeidentifier=blah&outputformat=json')
+        # Empty response does not turn off JSON
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.side_effect = [Mock(status_code=500, content=b'', headers={}),
+                                     Mock(status_code=200, content=xml_resp, headers={})]
+            self.assertEqual(len(rdr.get_logs_data('blah2')), n_logs)
+            self.assertEqual(mock_post.call_count, 2)
+            self.assertTrue(rdr.use_json)
+        # Provider which ignores 'outputformat' returns XML, then XML is requested
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value = Mock(status_code=200, content=xml_resp, headers={})
+            self.assertEqual(len(rdr.get_logs_data('blah3')), n_logs)
+            self.assertEqual(mock_post.call_count, 2)
+            self.assertEqual(mock_post.call_args.kwargs['data'], b'holeidentifier=blah3')
+            self.assertFalse(rdr.use_json)
+            rdr.get_scalar_logs('ds-1')
+            self.assertEqual(mock_post.call_args.kwargs['data'], b'datasetid=ds-1&mosaicsvc=no')
+            self.assertEqual(mock_post.call_count, 3)
+
+
+    def test_canonical_cache_keys(self):
+        ''' Tests that the same request written differently is read from the cache and counted as a collision
+        '''
+        param_obj = setup_param_obj()
+        param_obj.MEM_CACHE_SIZE = 1024 * 1024
+        rdr = NVCLReader(param_obj, skip_bhlist=True)
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value = Mock(status_code=200, content=b'<blah/>', headers={})
+            rdr.svc.get_downsampled_data('X', startdepth=0, enddepth=10, interval=1.0)
+            rdr.svc.get_downsampled_data('X', interval=1, enddepth=10.0, startdepth='0')
+            self.assertEqual(mock_post.call_count, 1)
+        stats = rdr.get_cache_key_stats()
+        self.assertEqual((stats.lookups, stats.hits, stats.hit_ratio, stats.collisions), (2, 1, 0.5, 1))
+
+
+    def test_stale_while_revalidate(self):
+        ''' Tests that stale cache entries within the 'cache_stale_window' are returned at once and refreshed in the background
+        '''
+        current = [b'<DatasetCollection>v1</DatasetCollection>']
+        gate = threading.Event()
+        gate.set()
+        posts = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                # Delays the response until the test opens the gate
+                gate.wait(5)
+                posts.append(current[0])
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(current[0])))
+                self.end_headers()
+                self.wfile.write(current[0])
+
+            def log_message(self, *args):
+                pass
+
+        def wait_for_refresh(svc):
+            for _ in range(500):
+                with svc._refresh_lock:
+                    if not svc._refreshing:
+                        return
+                time.sleep(0.01)
+            self.fail('Background refresh did not finish')
+
+        base_url = start_http_server(self, Handler)
+        svc = _ServiceInterface(base_url + '/NVCLDataServices', 2, cache_ttl=60, cache_stale_window=60,
+                                mem_cache_size=1024 * 1024)
+        self.assertEqual(svc.get_dataset_collection('blah'), b'<DatasetCollection>v1</DatasetCollection>')
+        now = time.time()
+        with unittest.mock.patch('nvcl_kit.svc_interface.time.time', return_value=now + 90.0):
+            # Stale entry is returned while the refresh waits on the server
+            gate.clear()
+            current[0] = b'<DatasetCollection>v2</DatasetCollection>'
+            self.assertEqual(svc.get_dataset_collection('blah'), b'<DatasetCollection>v1</DatasetCollection>')
+            # Only one refresh per entry at a time
+            self.assertEqual(svc.get_dataset_collection('blah'), b'<DatasetCollection>v1</DatasetCollection>')
+            gate.set()
+            wait_for_refresh(svc)
+            self.assertEqual(len(posts), 2)
+            self.assertEqual(svc.get_dataset_collection('blah'), b'<DatasetCollection>v2</DatasetCollection>')
+            self.assertEqual(len(posts), 2)
+        # Outside the stale window the request waits for a new response
+        with unittest.mock.patch('nvcl_kit.svc_interface.time.time', return_value=now + 300.0):
+            current[0] = b'<DatasetCollection>v3</DatasetCollection>'
+            self.assertEqual(svc.get_dataset_collection('blah'), b'<DatasetCollection>v3</DatasetCollection>')
+            self.assertEqual(len(posts), 3)
+
+
+    def test_session_pool(self):
+        ''' Tests that readers connecting to the same NVCL service share one pooled session
+        '''
+        rdr1 = setup_reader()
+        rdr2 = setup_reader()
+        self.assertIs(rdr1.svc.session, rdr2.svc.session)
+        adapter = rdr1.svc.session.get_adapter(rdr1.svc.NVCL_URL)
+        self.assertEqual(adapter._pool_maxsize, 10)
+
+
+    @unittest.mock.patch('nvcl_kit.svc_interface.time.sleep')
+    def test_session_timeout_retry(self, mock_sleep):
+        ''' Tests that timeouts are retried with a doubling timeout value
+        '''
+        rdr = setup_reader()
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            resp_obj = Mock(status_code=200, content=b'<DatasetCollection/>')
+            mock_post.side_effect = [Timeout(), Timeout(), resp_obj]
+            self.assertEqual(rdr.get_datasetid_list('blah'), [])
+            self.assertEqual([c.kwargs['timeout'] for c in mock_post.call_args_list], [2, 4, 8])
+
+
+    def test_session_http_status(self):
+        ''' Tests that an HTTP error status produces a warning and an empty result
+        '''
+        rdr = setup_reader()
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value.status_code = 503
+            with self.assertLogs('nvcl_kit.svc_interface', level='WARN') as nvcl_log:
+                self.assertEqual(rdr.get_datasetid_list('blah'), [])
+                self.assertIn('HTTP Error with', nvcl_log.output[0])
+
+
+    def test_negative_cache(self):
+        ''' Tests that failed and empty responses are cached for CACHE_NEGATIVE_TTL seconds
+        '''
+        cache_path = tempfile.mkdtemp(prefix='tmp-cache-')
+        self.addCleanup(shutil.rmtree, cache_path, ignore_errors=True)
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value.status_code = 503
+            param_obj = setup_param_obj(cache_path=cache_path)
+            param_obj.CACHE_NEGATIVE_TTL = 30
+            rdr = NVCLReader(param_obj, skip_bhlist=True)
+            with self.assertLogs('nvcl_kit.svc_interface', level='WARN'):
+                self.assertEqual(rdr.get_datasetid_list('blah'), [])
+            self.assertEqual(rdr.get_datasetid_list('blah'), [])
+            self.assertEqual(mock_post.call_count, 1)
+            # Negative entries are kept in the persistent cache
+            param_obj = setup_param_obj(cache_path=cache_path)
+            param_obj.CACHE_NEGATIVE_TTL = 30
+            self.assertEqual(NVCLReader(param_obj, skip_bhlist=True).get_datasetid_list('blah'), [])
+            self.assertEqual(mock_post.call_count, 1)
+            # Negative entries expire after their own time to live, even if negative caching is off
+            rdr = NVCLReader(setup_param_obj(cache_path=cache_path), skip_bhlist=True)
+            self.assertEqual(rdr.get_datasetid_list('blah'), [])
+            self.assertEqual(mock_post.call_count, 1)
+            with unittest.mock.patch('nvcl_kit.cache.time.time', return_value=time.time() + 31.0):
+                with self.assertLogs('nvcl_kit.svc_interface', level='WARN'):
+                    self.assertEqual(rdr.get_datasetid_list('blah'), [])
+            self.assertEqual(mock_post.call_count, 2)
+            # With negative caching off, the failed request is not cached again
+            with unittest.mock.patch('nvcl_kit.cache.time.time', return_value=time.time() + 31.0):
+                with self.assertLogs('nvcl_kit.svc_interface', level='WARN'):
+                    self.assertEqual(rdr.get_datasetid_list('blah'), [])
+            self.assertEqual(mock_post.call_count, 3)
+        # Failed responses are not cached by default
+        rdr = setup_reader()
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            mock_post.return_value.status_code = 503
+            with self.assertLogs('nvcl_kit.svc_interface', level='WARN'):
+                rdr.get_datasetid_list('blah')
+                rdr.get_datasetid_list('blah')
+            self.assertEqual(mock_post.call_count, 2)
+
+
+    def test_get_logs_data_many(self):
+        ''' Tests get_logs_data_many() returns results keyed on nvcl id in input order
+        '''
+        nvcl_ids = [f'id-{i}' for i in range(12, 0, -1)] + ['id-5']
+        log_dict = setup_urlopen('get_logs_data_many', {'nvcl_id_list': nvcl_ids, 'max_workers': 4}, 'dataset_coll.txt')
+        self.assertEqual(list(log_dict.keys()), nvcl_ids[:-1])
+        for log_list in log_dict.values():
+            self.assertEqual(len(log_list), 70)
+
+
+    def test_borehole_data_many(self):
+        ''' Tests get_borehole_data_many()
+        '''
+        bh_dict = setup_urlopen('get_borehole_data_many', {'log_id_list': ['b', 'a'], 'height_resol': 10.0,
+                                'class_name': "dummy-class", 'top_n': 2}, 'bh_data.txt')
+        self.assertEqual(list(bh_dict.keys()), ['b', 'a'])
+        self.assertEqual(len(bh_dict['a']), 28)
+        self.assertEqual(bh_dict['a'][5.0][0].classText, 'WHITE-MICA')
+
+
+    def test_tray_depths_many(self):
+        ''' Tests get_tray_depths_many() and an empty id list
+        '''
+        depth_dict = setup_urlopen('get_tray_depths_many', {'log_id_list': ['x', 'y']}, 'img_tray_depth.txt')
+        self.assertEqual(list(depth_dict.keys()), ['x', 'y'])
+        self.assertEqual(len(depth_dict['y']), 50)
+        self.assertEqual(len(setup_urlopen('get_tray_depths_many', {'log_id_list': []}, 'img_tray_depth.txt')), 0)
 
 
     def test_imagelog_data(self):
@@ -488,7 +1196,7 @@ class TestNVCLReader(unittest.TestCase):
 
 
     def urllib_exception_tester(self, exc, fn, msg, params):
-        ''' Creates an exception in urllib.request.urlopen() read() and
+        ''' Creates an exception in the NVCL service session's post() and
             tests for the correct warning message
 
         :param exc: exception that is to be created
@@ -496,10 +1204,8 @@ class TestNVCLReader(unittest.TestCase):
         :param msg: warning message to test for
         :param params: dictionary of parameters for 'fn'
         '''
-        with unittest.mock.patch('urllib.request.urlopen', autospec=True) as mock_request:
-            open_obj = mock_request.return_value
-            open_obj.__enter__.return_value.read.side_effect = exc
-            open_obj.__enter__.return_value.read.return_value = '' 
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_request:
+            mock_request.side_effect = exc
             with self.assertLogs('nvcl_kit.svc_interface', level='WARN') as nvcl_log:
                 imagelog_data_list = fn(**params)
                 self.assertTrue(len(nvcl_log.output)>0, f"Missing '{msg}' in output")
@@ -598,10 +1304,11 @@ class TestNVCLReader(unittest.TestCase):
         ''' Tests get_scalar_logs() with an empty response
         '''
         rdr = setup_reader()
-        with unittest.mock.patch('urllib.request.urlopen', autospec=True) as mock_request:
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_request:
             open_obj = mock_request.return_value
+            open_obj.status_code = 200
             with open('logcoll_empty.txt') as fp:
-                open_obj.__enter__.return_value.read.return_value = fp.read()
+                open_obj.content = fp.read()
                 log_list = rdr.get_scalar_logs("blah")
                 self.assertEqual(len(log_list), 0)
 
@@ -629,14 +1336,85 @@ class TestNVCLReader(unittest.TestCase):
         ''' Tests get_mosaic_imglogs() with an empty response
         '''
         rdr = setup_reader()
-        with unittest.mock.patch('urllib.request.urlopen', autospec=True) as mock_request:
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_request:
             open_obj = mock_request.return_value
+            open_obj.status_code = 200
             with open('logcoll_empty.txt') as fp:
-                open_obj.__enter__.return_value.read.return_value = fp.read()
+                open_obj.content = fp.read()
                 log_list = rdr.get_mosaic_imglogs("blah")
                 self.assertEqual(len(log_list), 0)
 
 
+    def test_mosaic_log_index(self):
+        ''' Tests that the image log getters share one request and one parse per dataset
+        '''
+        rdr = setup_reader()
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_post:
+            with open('logcoll_mosaic.txt', 'rb') as fp:
+                mock_post.return_value = Mock(status_code=200, content=fp.read(), headers={})
+            all_logs = rdr.get_all_imglogs('blah')
+            self.assertEqual(len(all_logs), 4)
+            for fn, log_name in [('get_mosaic_imglogs', 'Mosaic'), ('get_tray_thumb_imglogs', 'Tray Thumbnail Images'),
+                                 ('get_tray_imglogs', 'Tray Images'), ('get_imagery_imglogs', 'Imagery')]:
+                log_list = getattr(rdr, fn)('blah')
+                self.assertEqual([log.log_name for log in log_list], [log_name])
+            # Log names are case insensitive
+            self.assertEqual(rdr._filter_mosaic_logs('blah', 'MOSAIC'), rdr.get_mosaic_imglogs('blah'))
+            self.assertEqual(mock_post.call_count, 1)
+            self.assertEqual(rdr.get_all_imglogs('blah'), all_logs)
+            # Returned records are copies
+            all_logs[0].log_name = 'changed'
+            self.assertNotEqual(rdr.get_all_imglogs('blah')[0].log_name, 'changed')
+            # Failed requests are not memoised
+            mock_post.return_value = Mock(status_code=200, content=b'not xml', headers={})
+            self.assertEqual(rdr.get_all_imglogs('blah2'), [])
+            self.assertEqual(len(rdr.mosaic_log_indexes), 1)
+
+
+    def test_compact_records(self):
+        ''' Tests that the 'COMPACT_RECORDS' parameter gives compact records with the same attributes
+        '''
+        with unittest.mock.patch('nvcl_kit.cql_filter.requests.Session.get', autospec=True) as mock_reqs:
+            with open('full_wfs_cql.json') as fp:
+                setup_reqs_obj(fp, mock_reqs.return_value)
+                param_obj = setup_param_obj()
+                param_obj.COMPACT_RECORDS = True
+                compact_rdr = NVCLReader(param_obj)
+        rdr = setup_reader()
+        self.assertEqual(len(compact_rdr.get_boreholes_list()), len(rdr.get_boreholes_list()))
+        for compact_bh, bh in zip(compact_rdr.get_boreholes_list(), rdr.get_boreholes_list()):
+            self.assertIsInstance(compact_bh, BoreholeRecord)
+            self.assertEqual(record_dict(compact_bh), vars(bh))
+        for fn, params, src_file, record_cls in [
+                ('get_logs_data', {'nvcl_id': 'blah'}, 'dataset_coll_time.txt', LogRecord),
+                ('get_imagelog_data', {'nvcl_id': 'blah'}, 'dataset_coll_time.txt', LogRecord),
+                ('get_spectrallog_data', {'nvcl_id': 'blah'}, 'dataset_coll.txt', SpectralLogRecord),
+                ('get_profilometer_data', {'nvcl_id': 'blah'}, 'dataset_coll.txt', ProfilometerLogRecord),
+                ('get_scalar_logs', {'dataset_id': 'blah'}, 'logcoll_scalar.txt', LogRecord),
+                ('get_all_imglogs', {'dataset_id': 'blah'}, 'logcoll_mosaic.txt', LogRecord),
+                ('get_tray_depths', {'log_id': 'blah'}, 'img_tray_depth.txt', TrayDepth),
+                ('get_borehole_data', {'log_id': 'blah', 'height_resol': 10.0, 'class_name': 'blah', 'top_n': 2}, 'bh_data.txt', MineralPoint)]:
+            with self.subTest(fn=fn):
+                compact_result = setup_urlopen(fn, params, src_file, rdr=compact_rdr)
+                result = setup_urlopen(fn, params, src_file, rdr=rdr)
+                if isinstance(result, dict):
+                    self.assertEqual(list(compact_result.keys()), list(result.keys()))
+                    compact_result = [rec for recs in compact_result.values() for rec in recs]
+                    result = [rec for recs in result.values() for rec in recs]
+                self.assertGreater(len(result), 0)
+                self.assertTrue(all(isinstance(rec, record_cls) for rec in compact_result))
+                self.assertEqual([record_dict(rec) for rec in compact_result], [vars(rec) for rec in result])
+        # Streamed records
+        with open('dataset_coll_time.txt', 'rb') as fp:
+            resp = fp.read()
+        compact_logs = list(iter_dataset_collection(resp, 'logs', compact_rdr.records))
+        self.assertTrue(all(isinstance(log, LogRecord) for log in compact_logs))
+        self.assertEqual(compact_logs, list(iter_dataset_collection(resp, 'logs')))
+        compact_logs = list(iter_dataset_collection(resp, 'spectral_logs', compact_rdr.records))
+        self.assertTrue(all(isinstance(log, SpectralLogRecord) for log in compact_logs))
+        self.assertEqual(compact_logs, list(iter_dataset_collection(resp, 'spectral_logs')))
+
+
     def test_mosaic_imglogs_exception(self):
         ''' Tests exception handling in get_mosaic_imglogs()
         '''
@@ -657,10 +1435,11 @@ class TestNVCLReader(unittest.TestCase):
         ''' Test get_datasetid_list() with an empty response
         '''
         rdr = setup_reader()
-        with unittest.mock.patch('urllib.request.urlopen', autospec=True) as mock_request:
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_request:
             open_obj = mock_request.return_value
+            open_obj.status_code = 200
             with open('dataset_coll_empty.txt') as fp:
-                open_obj.__enter__.return_value.read.return_value = fp.read()
+                open_obj.content = fp.read()
                 dataset_id_list = rdr.get_datasetid_list("blah")
                 self.assertEqual(len(dataset_id_list), 0)
 
@@ -691,10 +1470,11 @@ class TestNVCLReader(unittest.TestCase):
         ''' Test get_dataset_list() with an empty response
         '''
         rdr = setup_reader()
-        with unittest.mock.patch('urllib.request.urlopen', autospec=True) as mock_request:
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_request:
             open_obj = mock_request.return_value
+            open_obj.status_code = 200
             with open('dataset_coll_empty.txt') as fp:
-                open_obj.__enter__.return_value.read.return_value = fp.read()
+                open_obj.content = fp.read()
                 dataset_list = rdr.get_dataset_list("blah")
                 self.assertEqual(len(dataset_list), 0)
 
@@ -703,10 +1483,11 @@ class TestNVCLReader(unittest.TestCase):
         ''' Test get_dataset_list() with modified time in response
         '''
         rdr = setup_reader()
-        with unittest.mock.patch('urllib.request.urlopen', autospec=True) as mock_request:
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_request:
             open_obj = mock_request.return_value
+            open_obj.status_code = 200
             with open('dataset_coll_time.txt') as fp:
-                open_obj.__enter__.return_value.read.return_value = fp.read()
+                open_obj.content = fp.read()
                 dataset_list = rdr.get_dataset_list("blah")
                 self.assertEqual(len(dataset_list), 1)
                 self.assertEqual(dataset_list[0].created_date, datetime.datetime(2022, 9, 13, 14, 38, 24, tzinfo=tzoffset(None, 34200)))
@@ -717,10 +1498,11 @@ class TestNVCLReader(unittest.TestCase):
         ''' Test get_dataset_list() with bad modified time in response
         '''
         rdr = setup_reader()
-        with unittest.mock.patch('urllib.request.urlopen', autospec=True) as mock_request:
+        with unittest.mock.patch('nvcl_kit.svc_interface.requests.Session.post', autospec=True) as mock_request:
             open_obj = mock_request.return_value
+            open_obj.status_code = 200
             with open('dataset_coll_time_bad.txt') as fp:
-                open_obj.__enter__.return_value.read.return_value = fp.read()
+                open_obj.content = fp.read()
                 dataset_list = rdr.get_dataset_list("blah")
                 self.assertEqual(len(dataset_list), 1)
                 self.assertFalse(hasattr(dataset_list[0], 'modified_date'))
@@ -796,6 +1578,105 @@ class TestNVCLReader(unittest.TestCase):
         self.assertEqual(len(bh_data_list), 0)
 
 
+    @unittest.skipIf(np is None, "'numpy' is not installed")
+    def test_borehole_data_engines(self):
+        ''' Tests that the 'numpy' and 'python' versions of get_borehole_data() give the same results
+        '''
+        rnd = random.Random(1)
+        classes = ['KAOLIN', 'WHITE-MICA', 'CHLORITE', 'CARBONATE', 'INVALID', 'NOTAROK', 'invalid']
+        meas_list = [{'roundedDepth': rnd.choice([depth * 0.5, int(depth * 0.5)]), 'classCount': rnd.randint(1, 5),
+                      'classText': rnd.choice(classes), 'colour': rnd.randint(0, 2 ** 24 - 1)} for depth in range(2000)]
+        # Data points with the same count at the same depth keep their order
+        meas_list += [dict(meas, classText='KAOLIN', colour=0) for meas in meas_list[:500]]
+        meas_list += [{'roundedDepth': 5000.0, 'classText': 'INVALID'}, {'roundedDepth': 5001.0, 'classCount': 3}]
+        rnd.shuffle(meas_list)
+        responses = {'random': json.dumps(meas_list).encode('utf-8'),
+                     # Irregular data is left to the 'python' version
+                     'strings': json.dumps([{'roundedDepth': '1.0', 'classCount': '2', 'classText': 'KAOLIN', 'colour': 0}]).encode('utf-8')}
+        for src_file in ['bh_data.txt', 'bh_data_avgval.txt']:
+            with open(src_file, 'rb') as fp:
+                responses[src_file] = fp.read()
+        for name, json_data in responses.items():
+            for top_n in [1, 2, 3]:
+                for records in [None, COMPACT_TYPES]:
+                    with self.subTest(name=name, top_n=top_n, records=records):
+                        args = (json_data, 'blah', top_n) if records is None else (json_data, 'blah', top_n, records)
+                        numpy_dict = NVCLReader._parse_borehole_data(*args, engine='numpy')
+                        python_dict = NVCLReader._parse_borehole_data(*args, engine='python')
+                        self.assertEqual(numpy_dict, python_dict)
+                        self.assertEqual([(type(depth), depth) for depth in numpy_dict], [(type(depth), depth) for depth in python_dict])
+        self.assertGreater(len(NVCLReader._parse_borehole_data(responses['random'], 'blah', 1, engine='numpy')), 1000)
+
+
+    @unittest.skipIf(np is None, "'numpy' is not installed")
+    def test_borehole_data_engines_random(self):
+        ''' Tests that the 'numpy' and 'python' versions of get_borehole_data() give the same results for many
+            random responses with tied counts, integer and float depths and counts, and NaN values
+        '''
+        classes = ['KAOLIN', 'WHITE-MICA', 'CHLORITE', 'INVALID', 'notarok']
+        for seed in range(50):
+            rnd = random.Random(seed)
+            # Few depths and counts, so that many data points share a depth and a count
+            depths = [rnd.choice([depth, float(depth), depth + 0.5]) for depth in range(rnd.randint(0, 20))] or [1.0]
+            meas_list = [{'roundedDepth': rnd.choice(depths), 'classCount': rnd.choice([1, 2, 2.0, 3, 0.5]),
+                          'classText': rnd.choice(classes), 'colour': rnd.randint(0, 2 ** 24 - 1)} for _ in range(rnd.randint(0, 200))]
+            valid_list = [meas for meas in meas_list if meas['classText'] in classes[:3]]
+            has_nan = valid_list and seed % 5 == 0
+            if has_nan:
+                rnd.choice(valid_list)[rnd.choice(['roundedDepth', 'classCount'])] = float('nan')
+            # Counts of invalid data points are not used
+            invalid_list = [meas for meas in meas_list if meas['classText'] not in classes[:3]]
+            if invalid_list and seed % 5 == 1:
+                rnd.choice(invalid_list)['classCount'] = float('nan')
+            meas_list = json.loads(json.dumps(meas_list))
+            for top_n in [1, 2, 3, 5]:
+                with self.subTest(seed=seed, top_n=top_n):
+                    # NaN values are left to the 'python' version
+                    self.assertEqual(numpy_borehole_data(meas_list, 'blah', top_n) is None, bool(has_nan))
+                    json_data = json.dumps(meas_list).encode('utf-8')
+                    numpy_dict = NVCLReader._parse_borehole_data(json_data, 'blah', top_n, engine='numpy')
+                    python_dict = NVCLReader._parse_borehole_data(json_data, 'blah', top_n, engine='python')
+                    # Compared as text, because NaN is not equal to itself
+                    self.assertEqual(repr(numpy_dict), repr(python_dict))
+                    self.assertEqual([type(depth) for depth in numpy_dict], [type(depth) for depth in python_dict])
+        # 'python' is the default
+        self.assertEqual(setup_reader().bh_data_engine, 'python')
+
+
+    @unittest.skipIf(np is None, "'numpy' is not installed")
+    def test_borehole_data_columns(self):
+        ''' Tests that get_borehole_data_columns() returns the same data points as get_borehole_data()
+        '''
+        for top_n in [1, 2, 3]:
+            with self.subTest(top_n=top_n):
+                params = {'log_id': "dummy-id", 'height_resol': 10.0, 'class_name': "dummy-class", 'top_n': top_n}
+                cols = setup_urlopen('get_borehole_data_columns', params, 'bh_data.txt')
+                bh_data = setup_urlopen('get_borehole_data', params, 'bh_data.txt')
+                points = []
+                for depth, depth_points in bh_data.items():
+                    if not isinstance(depth_points, list):
+                        depth_points = [depth_points]
+                    points += [(depth, rank, point.classText, point.classCount, point.colour) for rank, point in enumerate(depth_points)]
+                self.assertEqual(cols.class_name, "dummy-class")
+                self.assertEqual(list(zip(cols.depth.tolist(), cols.rank.tolist(), [cols.class_texts[code] for code in cols.class_code],
+                                          cols.class_count.tolist(), [tuple(colour) for colour in cols.colour.tolist()])), points)
+                self.assertEqual(len(set(cols.class_texts)), len(cols.class_texts))
+                self.assertEqual(cols.colour.shape, (len(points), 4))
+        # Only invalid classes
+        cols = setup_urlopen('get_borehole_data_columns', {'log_id': "dummy-id", 'height_resol': 10.0, 'class_name': "dummy-class"}, 'bh_data_avgval.txt')
+        self.assertEqual(len(cols.depth), 0)
+        self.assertEqual(cols.colour.shape, (0, 4))
+        # Bad responses
+        with self.assertLogs('nvcl_kit.reader', level='WARN') as nvcl_log:
+            cols = NVCLReader._parse_borehole_columns(b'[{"blah"', "dummy-class", 1)
+            self.assertIn('Cannot parse response from server', nvcl_log.output[0])
+        self.assertEqual(len(cols.class_count), 0)
+        with self.assertLogs('nvcl_kit.reader', level='WARN') as nvcl_log:
+            cols = NVCLReader._parse_borehole_columns(b'[{"roundedDepth": "1.0", "classCount": 2, "classText": "KAOLIN", "colour": 0}]', "dummy-class", 1)
+            self.assertIn('cannot be put in arrays', nvcl_log.output[0])
+        self.assertEqual(len(NVCLReader._parse_borehole_columns(b'', "dummy-class", 1).rank), 0)
+
+
     def test_borehole_data_top_n(self):
         ''' Test get_borehole_data() with top_n parameter
         '''
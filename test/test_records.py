@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+import sys
+import copy
+import pickle
+import unittest
+from types import SimpleNamespace
+
+from nvcl_kit.records import BoreholeRecord, LogRecord, TrayDepth, MineralPoint, make_record, copy_record, record_dict
+
+'''
+Tests for the records module
+'''
+
+class TestRecords(unittest.TestCase):
+
+    def test_attributes(self):
+        ''' Tests attribute access, '_asdict()' and 'record_dict()'
+        '''
+        log = LogRecord(log_id='blah-id', log_name='Mosaic', sample_count=1)
+        self.assertEqual(log.log_id, 'blah-id')
+        self.assertEqual(log._asdict(), {'log_id': 'blah-id', 'log_name': 'Mosaic', 'sample_count': 1})
+        self.assertEqual(record_dict(log), log._asdict())
+        self.assertEqual(record_dict(SimpleNamespace(**log._asdict())), log._asdict())
+        # Slotted records do not pretend to have a '__dict__'
+        with self.assertRaises(TypeError):
+            vars(log)
+        # Optional attributes which are not set are missing, as they are for SimpleNamespace objects
+        self.assertFalse(hasattr(log, 'created_date'))
+        log.created_date = 'blah'
+        self.assertEqual(log._asdict()['created_date'], 'blah')
+        # New attributes cannot be added
+        with self.assertRaises(AttributeError):
+            log.blah = 1
+        # Compulsory attributes
+        with self.assertRaises(TypeError):
+            TrayDepth(sample_no='1')
+        with self.assertRaises(TypeError):
+            TrayDepth(sample_no='1', start_value='2.0', end_value='3.0', blah=1)
+        with self.assertRaises(TypeError):
+            TrayDepth('1', '2.0', '3.0')
+        self.assertEqual(TrayDepth(sample_no='1', start_value='2.0', end_value='3.0')._asdict(),
+                         {'sample_no': '1', 'start_value': '2.0', 'end_value': '3.0'})
+
+    def test_equality(self):
+        ''' Tests comparisons with SimpleNamespace objects, 'repr()', copying and pickling
+        '''
+        attrs = {'className': 'blah', 'classText': 'KAOLIN', 'classCount': 5, 'colour': (1.0, 0.0, 0.0, 1.0)}
+        point = MineralPoint(**attrs)
+        self.assertEqual(point, SimpleNamespace(**attrs))
+        self.assertEqual(SimpleNamespace(**attrs), point)
+        self.assertNotEqual(point, SimpleNamespace(**attrs, blah=1))
+        self.assertNotEqual(point, attrs)
+        self.assertEqual(repr(point), "MineralPoint(className='blah', classText='KAOLIN', classCount=5, colour=(1.0, 0.0, 0.0, 1.0))")
+        self.assertEqual(copy.copy(point), point)
+        self.assertIsInstance(copy.copy(point), MineralPoint)
+        self.assertEqual(copy.deepcopy(point), point)
+        self.assertEqual(pickle.loads(pickle.dumps(point)), point)
+        log = LogRecord(log_id='blah-id', log_name='Mosaic')
+        self.assertFalse(hasattr(copy.copy(log), 'sample_count'))
+        # Unexpected or missing attributes give a SimpleNamespace object and a warning naming them, once
+        self.assertIsInstance(make_record(MineralPoint, attrs), MineralPoint)
+        with self.assertLogs('nvcl_kit.records', level='WARN') as nvcl_log:
+            self.assertEqual(make_record(MineralPoint, {**attrs, 'blah': 1}), SimpleNamespace(**attrs, blah=1))
+            make_record(MineralPoint, {**attrs, 'blah': 2})
+            self.assertEqual(make_record(LogRecord, {'log_id': 'blah-id', 'blah': 1}), SimpleNamespace(log_id='blah-id', blah=1))
+        self.assertEqual(len(nvcl_log.output), 2)
+        self.assertIn("unexpected attributes ['blah'], missing attributes []", nvcl_log.output[0])
+        self.assertIn("unexpected attributes ['blah'], missing attributes ['log_name']", nvcl_log.output[1])
+
+    def test_copy_record(self):
+        ''' Tests that copied records do not share mutable attribute values
+        '''
+        point = MineralPoint(className='blah', classText='KAOLIN', classCount=5, colour=[1.0, 0.0, 0.0, 1.0])
+        point_copy = copy_record(point)
+        self.assertEqual(point_copy, point)
+        self.assertIsNot(point_copy, point)
+        point_copy.colour.append(2.0)
+        self.assertEqual(len(point.colour), 4)
+        ns = SimpleNamespace(blah=1)
+        ns_copy = copy_record(ns)
+        self.assertEqual(ns_copy, ns)
+        self.assertIsNot(ns_copy, ns)
+
+    def test_size(self):
+        ''' Tests that records are smaller than SimpleNamespace objects
+        '''
+        attrs = {name: '' for name in BoreholeRecord.__slots__}
+        bh_ns = SimpleNamespace(**attrs)
+        self.assertLess(sys.getsizeof(BoreholeRecord(**attrs)), sys.getsizeof(bh_ns) + sys.getsizeof(vars(bh_ns)))
+
+
+if __name__ == '__main__':
+    unittest.main()
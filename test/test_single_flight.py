@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+import asyncio
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+
+from nvcl_kit.single_flight import SingleFlight
+from nvcl_kit.svc_interface import _ServiceInterface, _AsyncServiceInterface
+
+from helpers import start_http_server
+
+'''
+Tests for the single_flight module
+'''
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_threads(self):
+        ''' Tests that concurrent calls with the same key in threads share one call
+        '''
+        flights = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def func(val):
+            calls.append(val)
+            started.set()
+            time.sleep(0.1)
+            return val * 2
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            first = executor.submit(flights.do, 'key', func, 1)
+            started.wait(5)
+            futures = [executor.submit(flights.do, 'key', func, 1) for i in range(4)]
+            other = executor.submit(flights.do, 'other', func, 2)
+            self.assertEqual([f.result() for f in [first] + futures], [2] * 5)
+            self.assertEqual(other.result(), 4)
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertEqual((flights.stats().calls, flights.stats().shared), (6, 4))
+        # Finished calls are not shared
+        self.assertEqual(flights.do('key', func, 1), 2)
+        self.assertEqual(len(calls), 3)
+
+    def test_exception(self):
+        ''' Tests that an exception is raised in all the callers
+        '''
+        flights = SingleFlight()
+        started = threading.Event()
+
+        def func():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError('blah')
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(flights.do, 'key', func)
+            started.wait(5)
+            second = executor.submit(flights.do, 'key', func)
+            for future in [first, second]:
+                with self.assertRaises(ValueError):
+                    future.result()
+
+    def test_async(self):
+        ''' Tests that concurrent calls with the same key in coroutines share one call
+        '''
+        flights = SingleFlight()
+        calls = []
+
+        async def func(val):
+            calls.append(val)
+            await asyncio.sleep(0.01)
+            return val * 2
+
+        async def main():
+            return await asyncio.gather(*[flights.do_async('key', func, 1) for i in range(5)],
+                                        flights.do_async('other', func, 2))
+
+        self.assertEqual(asyncio.run(main()), [2, 2, 2, 2, 2, 4])
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertEqual(flights.stats().shared, 4)
+
+    def test_svc_coalescing(self):
+        ''' Tests that concurrent identical NVCL requests send one request
+        '''
+        posts = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                posts.append(self.path)
+                time.sleep(0.2)
+                body = b'<DatasetCollection/>'
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        base_url = start_http_server(self, Handler)
+        svc = _ServiceInterface(base_url + '/NVCLDataServices', 2, mem_cache_size=0)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(svc.get_dataset_collection, ['blah'] * 4))
+        self.assertEqual(results, [b'<DatasetCollection/>'] * 4)
+        self.assertEqual(len(posts), 1)
+
+        async def main():
+            async_svc = _AsyncServiceInterface(base_url + '/NVCLDataServices', 2, mem_cache_size=0)
+            try:
+                return await asyncio.gather(*[async_svc.get_dataset_collection('blah') for i in range(4)])
+            finally:
+                await async_svc.close()
+
+        self.assertEqual(asyncio.run(main()), [b'<DatasetCollection/>'] * 4)
+        self.assertEqual(len(posts), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+import os
+import unittest
+from unittest.mock import patch
+import xml.etree.ElementTree as ET
+from dateutil.parser import parse
+from dateutil.tz import UTC
+
+from nvcl_kit.reader import NVCLReader
+from nvcl_kit.dataset_collection import DatasetCollection
+from nvcl_kit.xml_helpers import TextExtractor, ElementFinder, ChildFinder, set_xml_backend, get_xml_backend, lxml_etree
+from nvcl_kit.xml_helpers import parse_date_str
+
+'''
+Tests for the xml_helpers module
+'''
+
+FIXTURES = ['dataset_coll.txt', 'logcoll_scalar.txt', 'logcoll_mosaic.txt', 'img_tray_depth.txt', 'algorithms.txt']
+
+
+def parse_fixtures():
+    ''' Parses the recorded responses with the reader's parsing functions
+
+    :returns: list of parsed results
+    '''
+    results = []
+    for file_name in FIXTURES:
+        with open(os.path.join(os.path.dirname(__file__), file_name), 'rb') as fp:
+            resp = fp.read()
+        if file_name == 'dataset_coll.txt':
+            coll = DatasetCollection(resp)
+            results.append([coll.datasets(), coll.logs(), coll.image_logs(), coll.profilometer_logs()])
+        elif file_name == 'logcoll_scalar.txt':
+            results.append(NVCLReader._parse_scalar_logs(resp))
+        elif file_name == 'logcoll_mosaic.txt':
+            results.append(NVCLReader._parse_mosaic_logs(resp))
+        elif file_name == 'img_tray_depth.txt':
+            results.append(NVCLReader._parse_tray_depths(resp))
+        else:
+            results.append(NVCLReader._parse_algorithms(resp))
+    return results
+
+
+class TestXMLHelpers(unittest.TestCase):
+
+    def test_extractors(self):
+        ''' Tests that the extractors give the same results as 'findtext()' and 'findall()'
+        '''
+        root = ET.fromstring('<Logs><Log><LogID>id1</LogID><logName/></Log><Log><LogID>id2</LogID></Log></Logs>')
+        logs = ElementFinder('./Log')(root)
+        self.assertEqual(logs, root.findall('./Log'))
+        texts = TextExtractor('./LogID', './logName', './sampleCount', defaults=('', '', 0))
+        self.assertEqual(texts(logs[0]), ('id1', '', 0))
+        self.assertEqual(texts(logs[1]), ('id2', '', 0))
+        self.assertEqual(TextExtractor('./LogID', './logName')(logs[1]), ('id2', ''))
+        self.assertEqual(ChildFinder('LogID', 'logName', 'blah')(logs[0]),
+                         (logs[0].find('LogID'), logs[0].find('logName'), None))
+        # Other paths are searched
+        self.assertEqual(TextExtractor('./Log/LogID', 'Log/blah', defaults=('', None))(root), ('id1', None))
+
+    def test_set_backend(self):
+        ''' Tests selecting the XML parser
+        '''
+        backend = get_xml_backend()
+        try:
+            self.assertFalse(set_xml_backend('blah'))
+            self.assertTrue(set_xml_backend('etree'))
+            self.assertEqual(get_xml_backend(), 'etree')
+            self.assertEqual(set_xml_backend('lxml'), lxml_etree is not None)
+        finally:
+            set_xml_backend(backend)
+
+    def test_parse_date_str(self):
+        ''' Tests that dates are parsed the same as 'dateutil' and memoised
+        '''
+        for date_str in ['2022-09-13T14:38:24+09:30', '2022-09-13T14:38:24.5-0500', '2022-09-13T14:38:24.123456+09',
+                         '2022-09-13 14:38:24', '2022-09-13T14:38', '2022-09-13', 'Sep 13 2022 14:38']:
+            with self.subTest(date_str=date_str):
+                self.assertEqual(repr(parse_date_str(date_str)), repr(parse(date_str)))
+        for date_str in ['', 'dfdfdfgdfgd', '2022-02-30T00:00:00']:
+            with self.subTest(date_str=date_str):
+                self.assertIsNone(parse_date_str(date_str))
+        hits = parse_date_str.cache_info().hits
+        parse_date_str('2022-09-13T14:38:24+09:30')
+        self.assertEqual(parse_date_str.cache_info().hits, hits + 1)
+        # ISO 8601 dates, including UTC dates, do not need 'dateutil'. UTC dates are always given the UTC time zone,
+        # 'dateutil' gives them the local time zone if it is called 'UTC'
+        parse_date_str.cache_clear()
+        with patch('nvcl_kit.xml_helpers.parse') as mock_parse:
+            for date_str in ['2022-09-13T14:38:24Z', '2022-09-13T14:38:24.5Z', '2022-09-13T14:38:24+00:00',
+                             '2022-09-13T14:38:24-00:00', '2022-09-13T14:38:24-05:00']:
+                with self.subTest(date_str=date_str):
+                    date_obj = parse_date_str(date_str)
+                    self.assertEqual(date_obj, parse(date_str))
+                    self.assertEqual(date_obj.utcoffset(), parse(date_str).utcoffset())
+                    if date_str.endswith(('Z', '00:00')):
+                        self.assertIs(date_obj.tzinfo, UTC)
+            mock_parse.assert_not_called()
+        parse_date_str.cache_clear()
+
+    @unittest.skipIf(lxml_etree is None, "'lxml' is not installed")
+    def test_backends_identical(self):
+        ''' Tests that both XML parsers give identical results on the recorded responses
+        '''
+        backend = get_xml_backend()
+        try:
+            set_xml_backend('etree')
+            etree_results = parse_fixtures()
+            set_xml_backend('lxml')
+            self.assertEqual(parse_fixtures(), etree_results)
+        finally:
+            set_xml_backend(backend)
+
+
+if __name__ == '__main__':
+    unittest.main()